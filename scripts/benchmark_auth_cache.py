@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark of authenticated request throughput in the Flask backends.
+
+Builds a small Flask app with the backends' User model on a temporary
+SQLite file and calls one token-protected endpoint through the test
+client, with two versions of ``token_required``:
+
+    uncached  jwt.decode and a user query on every request (the previous code)
+    cached    utils.auth_cache.AuthCache (the current code)
+
+Reports requests per second and database queries per request.
+
+Usage:
+    python scripts/benchmark_auth_cache.py
+    python scripts/benchmark_auth_cache.py --requests 50000 --users 100
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+import jwt
+from flask import Flask, jsonify, request
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+
+from src.strodservice.database.engine import engine_options, install_sqlite_pragmas
+from src.strodservice.exceptions import AuthenticationError
+from src.strodservice.utils.auth_cache import AuthCache, CachedUser
+
+SECRET = "benchmark-secret-benchmark-secret-32"
+
+
+def build_app(url):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = url
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(url)
+    db = SQLAlchemy(app)
+
+    class User(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+        username = db.Column(db.String(80), unique=True, nullable=False)
+        password_hash = db.Column(db.String(120), nullable=False)
+        role = db.Column(db.String(20), default="employee")
+        auth_version = db.Column(db.Integer, nullable=False, default=1)
+
+    def load_user(user_id):
+        user = db.session.get(User, user_id)
+        return None if user is None else CachedUser(user.id, user.username, user.role, user.auth_version)
+
+    auth_cache = AuthCache(load_user, ttl=30)
+
+    def uncached_required(f):
+        def decorated(*args, **kwargs):
+            try:
+                data = jwt.decode(request.headers["Authorization"], SECRET, algorithms=["HS256"])
+                current_user = User.query.filter_by(id=data["user_id"]).first()
+            except Exception:
+                return jsonify({"message": "invalid"}), 401
+            return f(current_user, *args, **kwargs)
+        decorated.__name__ = f.__name__
+        return decorated
+
+    def cached_required(f):
+        def decorated(*args, **kwargs):
+            try:
+                current_user = auth_cache.authenticate(request.headers["Authorization"], SECRET)
+            except AuthenticationError:
+                return jsonify({"message": "invalid"}), 401
+            return f(current_user, *args, **kwargs)
+        decorated.__name__ = f.__name__
+        return decorated
+
+    @app.route("/uncached")
+    @uncached_required
+    def uncached(current_user):
+        return jsonify({"user": current_user.username})
+
+    @app.route("/cached")
+    @cached_required
+    def cached(current_user):
+        return jsonify({"user": current_user.username})
+
+    with app.app_context():
+        install_sqlite_pragmas(db.engine)
+        db.create_all()
+        queries = {"count": 0}
+        event.listen(db.engine, "before_cursor_execute", lambda *args: queries.__setitem__("count", queries["count"] + 1))
+    return app, db, User, queries
+
+
+def main():
+    """Run the authentication cache benchmark."""
+    parser = argparse.ArgumentParser(description="Authenticated request throughput benchmark")
+    parser.add_argument("--requests", type=int, default=20_000, help="Requests per variant")
+    parser.add_argument("--users", type=int, default=20, help="Distinct users (tokens) in rotation")
+    args = parser.parse_args()
+
+    temp_dir = Path(tempfile.mkdtemp())
+    app, db, User, queries = build_app(f"sqlite:///{temp_dir / 'auth.db'}")
+    with app.app_context():
+        db.session.add_all([User(username=f"user{i}", password_hash="x") for i in range(args.users)])
+        db.session.commit()
+        ids = [user.id for user in User.query.all()]
+    tokens = [jwt.encode({"user_id": user_id, "ver": 1, "exp": datetime.utcnow() + timedelta(hours=1)},
+                         SECRET, algorithm="HS256") for user_id in ids]
+
+    client = app.test_client()
+    print(f"{'variant':<10}{'requests/s':>12}{'queries/request':>18}")
+    for variant in ("uncached", "cached"):
+        queries["count"] = 0
+        started = time.perf_counter()
+        for i in range(args.requests):
+            response = client.get(f"/{variant}", headers={"Authorization": tokens[i % len(tokens)]})
+            assert response.status_code == 200
+        elapsed = time.perf_counter() - started
+        print(f"{variant:<10}{args.requests / elapsed:>12.0f}{queries['count'] / args.requests:>18.3f}")
+
+    with app.app_context():
+        db.engine.dispose()
+    for path in temp_dir.glob("auth.db*"):
+        path.unlink()
+    temp_dir.rmdir()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark of bulk field data loading.
+
+Loads the same generated rows into a fresh temporary SQLite database with
+the application engine settings in three ways:
+
+    orm     FieldData objects, session.add_all and one commit
+    core    INSERT executemany of the rows through SQLAlchemy Core
+            (no validation, no daily rollup)
+    bulk    services.field_import.bulk_insert_field_data
+            (validation, reference checks, daily rollup)
+
+Usage:
+    python scripts/benchmark_field_import.py
+    python scripts/benchmark_field_import.py --rows 500000 --days 30
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy.orm import sessionmaker
+
+from src.strodservice.database.base import Base
+from src.strodservice.database.engine import create_db_engine
+from src.strodservice.models.models import FieldData, LineType, Material, Object, Organization
+from src.strodservice.services.field_import import bulk_insert_field_data
+
+OBJECTS = 20
+LINE_TYPES = 5
+START_DATE = datetime(2023, 1, 1)
+
+
+def generate_rows(count, days, seed=1):
+    rng = random.Random(seed)
+    return [{
+        "object_id": rng.randint(1, OBJECTS),
+        "line_type_id": rng.randint(1, LINE_TYPES),
+        "length": rng.uniform(1, 500),
+        "width": 0.1,
+        "material_used": rng.uniform(0.1, 50),
+        "date": (START_DATE + timedelta(seconds=rng.randrange(days * 86400))).isoformat(),
+    } for _ in range(count)]
+
+
+def prepare(url):
+    engine = create_db_engine(url, echo=False)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    org = Organization(name="Организация")
+    material = Material(name="Краска", unit="кг")
+    session.add_all([org, material])
+    session.flush()
+    session.add_all([LineType(name=f"1.{i}", width=0.1, material_id=material.id) for i in range(LINE_TYPES)])
+    session.add_all([Object(name=f"Объект {i}", organization_id=org.id) for i in range(OBJECTS)])
+    session.commit()
+    session.close()
+    return engine
+
+
+def load_orm(engine, rows):
+    session = sessionmaker(bind=engine)()
+    records = []
+    for row in rows:
+        record = FieldData(row["object_id"], row["line_type_id"], row["length"],
+                           row["width"], row["material_used"])
+        record.date = datetime.fromisoformat(row["date"])
+        records.append(record)
+    session.add_all(records)
+    session.commit()
+    session.close()
+
+
+def load_core(engine, rows):
+    converted = [dict(row, date=datetime.fromisoformat(row["date"])) for row in rows]
+    with engine.begin() as connection:
+        for offset in range(0, len(converted), 5000):
+            connection.execute(FieldData.__table__.insert(), converted[offset:offset + 5000])
+
+
+def load_bulk(engine, rows):
+    with engine.begin() as connection:
+        result = bulk_insert_field_data(connection, rows)
+    assert result.inserted == len(rows) and not result.errors, result.errors
+
+
+METHODS = {"orm": load_orm, "core": load_core, "bulk": load_bulk}
+
+
+def main():
+    """Run the bulk loading benchmark."""
+    parser = argparse.ArgumentParser(description="Bulk field data loading benchmark")
+    parser.add_argument("--rows", type=int, default=100_000, help="Rows to load")
+    parser.add_argument("--days", type=int, default=365, help="Days the rows are spread over")
+    parser.add_argument("--methods", default="orm,core,bulk", help="Comma-separated methods to run")
+    args = parser.parse_args()
+
+    rows = generate_rows(args.rows, args.days)
+    temp_dir = Path(tempfile.mkdtemp())
+    print(f"{'method':<8}{'seconds':>10}{'rows/s':>12}")
+    for name in args.methods.split(","):
+        engine = prepare(f"sqlite:///{temp_dir / (name + '.db')}")
+        started = time.perf_counter()
+        METHODS[name](engine, rows)
+        elapsed = time.perf_counter() - started
+        engine.dispose()
+        print(f"{name:<8}{elapsed:>10.2f}{args.rows / elapsed:>12.0f}")
+        for path in temp_dir.glob(name + ".db*"):
+            path.unlink()
+    temp_dir.rmdir()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
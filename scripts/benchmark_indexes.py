@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the report indexes added by migration m0001_report_indexes.
+
+Builds a synthetic SQLite database, runs the report queries without the
+indexes, applies the migrations and runs them again. For every query the
+SQLite query plan and the best time of several runs are printed.
+
+Usage:
+    python scripts/benchmark_indexes.py
+    python scripts/benchmark_indexes.py --rows 5000000 --db /tmp/bench.db --repeat 10
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from src.strodservice.database.base import Base
+from src.strodservice.database.migrations import downgrade, upgrade
+from src.strodservice.models.models import Document
+from src.strodservice.services.report_queries import (
+    aggregate_field_data, field_data_rows, summarize_field_data
+)
+
+BATCH_SIZE = 100_000
+START_DATE = datetime(2022, 1, 1)
+DAYS = 3 * 365
+MATERIALS = 5
+LINE_TYPES = 20
+DOCUMENT_TYPES = ("ИД", "Акт", "Протокол")
+
+
+def populate(engine, rows, objects, documents, seed=1):
+    """Fill the database with reproducible synthetic data."""
+    rng = random.Random(seed)
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "INSERT INTO organizations (id, name) VALUES (1, 'Организация')"
+        )
+        connection.exec_driver_sql(
+            "INSERT INTO materials (id, name, unit) VALUES (?, ?, 'кг')",
+            [(i, f"Материал {i}") for i in range(1, MATERIALS + 1)],
+        )
+        connection.exec_driver_sql(
+            "INSERT INTO line_types (id, name, width, material_id) VALUES (?, ?, 0.1, ?)",
+            [(i, f"1.{i}", (i % MATERIALS) + 1) for i in range(1, LINE_TYPES + 1)],
+        )
+        connection.exec_driver_sql(
+            "INSERT INTO objects (id, name, organization_id) VALUES (?, ?, 1)",
+            [(i, f"Объект {i}") for i in range(1, objects + 1)],
+        )
+
+        for offset in range(0, rows, BATCH_SIZE):
+            batch = []
+            for _ in range(min(BATCH_SIZE, rows - offset)):
+                moment = START_DATE + timedelta(seconds=rng.randrange(DAYS * 86400))
+                batch.append((
+                    rng.randint(1, objects), rng.randint(1, LINE_TYPES),
+                    rng.uniform(1, 500), 0.1, rng.uniform(0.1, 50),
+                    moment.strftime("%Y-%m-%d %H:%M:%S.000000"),
+                ))
+            connection.exec_driver_sql(
+                "INSERT INTO field_data (object_id, line_type_id, length, width, material_used, date) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                batch,
+            )
+
+        connection.exec_driver_sql(
+            "INSERT INTO documents (object_id, type, path) VALUES (?, ?, ?)",
+            [
+                (rng.randint(1, objects), rng.choice(DOCUMENT_TYPES), f"docs/{i}.pdf")
+                for i in range(documents)
+            ],
+        )
+
+
+def report_queries(objects):
+    """Report access paths, each a callable taking a session."""
+    month_start, month_end = date(2023, 6, 1), date(2023, 6, 30)
+    object_id = objects // 2
+    return [
+        ("field report, one object, one month",
+         lambda s: field_data_rows(s, month_start, month_end, object_id)),
+        ("summary totals, one month",
+         lambda s: summarize_field_data(s, month_start, month_end)),
+        ("summary by line type, one object, one month",
+         lambda s: aggregate_field_data(s, month_start, month_end, "line_type", object_id)),
+        ("documents of one object by type",
+         lambda s: s.query(Document).filter(Document.object_id == object_id,
+                                            Document.type == "Акт").all()),
+    ]
+
+
+def measure(engine, session_factory, queries, repeat):
+    """Run every query and return {name: (best seconds, query plan lines)}."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    results = {}
+    for name, run in queries:
+        timings = []
+        for _ in range(repeat):
+            session = session_factory()
+            statements.clear()
+            event.listen(engine, "before_cursor_execute", capture)
+            try:
+                started = time.perf_counter()
+                run(session)
+                timings.append(time.perf_counter() - started)
+            finally:
+                event.remove(engine, "before_cursor_execute", capture)
+                session.close()
+
+        statement, parameters = statements[-1]
+        with engine.connect() as connection:
+            plan = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+        results[name] = (min(timings), [row[-1] for row in plan])
+    return results
+
+
+def main():
+    """Run the index benchmark."""
+    parser = argparse.ArgumentParser(description="Report index benchmark on synthetic data")
+    parser.add_argument("--rows", type=int, default=2_000_000, help="Number of field_data rows")
+    parser.add_argument("--objects", type=int, default=1000, help="Number of objects")
+    parser.add_argument("--documents", type=int, default=200_000, help="Number of documents")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per query, the best time is shown")
+    parser.add_argument("--db", help="Database file (a temporary file by default)")
+    args = parser.parse_args()
+
+    if args.db:
+        db_path = Path(args.db)
+        db_path.unlink(missing_ok=True)
+    else:
+        db_path = Path(tempfile.mkdtemp()) / "benchmark.db"
+    engine = create_engine(f"sqlite:///{db_path}")
+    session_factory = sessionmaker(bind=engine)
+
+    # The models declare the indexes too: mark the schema as migrated and
+    # roll the migrations back to get the schema without them
+    Base.metadata.create_all(engine)
+    upgrade(engine)
+    downgrade(engine)
+
+    print(f"Populating {db_path} with {args.rows} field_data rows...")
+    started = time.perf_counter()
+    populate(engine, args.rows, args.objects, args.documents)
+    print(f"Populated in {time.perf_counter() - started:.1f} s")
+
+    queries = report_queries(args.objects)
+    before = measure(engine, session_factory, queries, args.repeat)
+
+    started = time.perf_counter()
+    upgrade(engine)
+    print(f"Migrations applied in {time.perf_counter() - started:.1f} s\n")
+
+    after = measure(engine, session_factory, queries, args.repeat)
+
+    for name, _ in queries:
+        time_before, plan_before = before[name]
+        time_after, plan_after = after[name]
+        print(name)
+        print(f"  before: {time_before * 1000:9.2f} ms  plan: {'; '.join(plan_before)}")
+        print(f"  after:  {time_after * 1000:9.2f} ms  plan: {'; '.join(plan_after)}")
+        print(f"  speedup: {time_before / time_after:.0f}x\n")
+
+    engine.dispose()
+    if not args.db:
+        db_path.unlink()
+        db_path.parent.rmdir()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark of notification sending on the request path.
+
+Starts a minimal local SMTP server that answers every command after a
+fixed delay (a stand-in for the round trip to a remote mail server) and
+sends the same messages two ways:
+
+    inline  a new SMTP connection per message inside the call (the previous code)
+    outbox  services.notification_outbox: the call only enqueues, workers deliver
+
+Reports the latency a caller (an API request) waits per message, the time
+until all messages are delivered and the number of SMTP connections.
+
+Usage:
+    python scripts/benchmark_notifications.py
+    python scripts/benchmark_notifications.py --messages 500 --rtt 0.02 --workers 4
+"""
+
+import argparse
+import smtplib
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+from email.mime.text import MIMEText
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.strodservice.services.notification_outbox import NotificationOutbox, SmtpTransport
+
+
+class SlowSMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib, with a delay before every reply"""
+
+    def reply(self, line):
+        time.sleep(self.server.rtt)
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        with self.server.lock:
+            self.server.connections += 1
+        self.reply("220 localhost ready")
+        for raw in self.rfile:
+            command = raw.decode(errors="replace").strip().upper()
+            if command.startswith("DATA"):
+                self.reply("354 end with <CRLF>.<CRLF>")
+                for line in self.rfile:
+                    if line in (b".\r\n", b".\n"):
+                        break
+                with self.server.lock:
+                    self.server.messages += 1
+                self.reply("250 OK")
+            elif command.startswith("QUIT"):
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 OK")
+
+
+class SlowSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, rtt):
+        super().__init__(("127.0.0.1", 0), SlowSMTPHandler)
+        self.rtt = rtt
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.messages = 0
+
+
+def send_inline(port, subject):
+    """The previous send_email: connect, send and quit inside the call"""
+    msg = MIMEText("Проверьте новые данные.")
+    msg["Subject"] = subject
+    msg["From"] = "admin@company.com"
+    msg["To"] = "manager@company.com"
+    with smtplib.SMTP("127.0.0.1", port) as server:
+        server.send_message(msg)
+
+
+def report(name, server, call_seconds, total_seconds, count):
+    print(f"{name:<8}{call_seconds / count * 1000:>14.2f}{total_seconds:>12.2f}{server.connections:>14}")
+
+
+def main():
+    """Run the notification benchmark."""
+    parser = argparse.ArgumentParser(description="Notification sending benchmark")
+    parser.add_argument("--messages", type=int, default=200, help="Messages per variant")
+    parser.add_argument("--rtt", type=float, default=0.01, help="SMTP server delay per reply, seconds")
+    parser.add_argument("--workers", type=int, default=2, help="Outbox worker threads")
+    args = parser.parse_args()
+
+    print(f"{'variant':<8}{'ms per call':>14}{'total, s':>12}{'connections':>14}")
+
+    server = SlowSMTPServer(args.rtt)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    started = time.perf_counter()
+    for index in range(args.messages):
+        send_inline(server.server_address[1], f"Новые данные {index}")
+    elapsed = time.perf_counter() - started
+    report("inline", server, elapsed, elapsed, args.messages)
+    server.shutdown()
+    server.server_close()
+
+    server = SlowSMTPServer(args.rtt)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    temp_dir = Path(tempfile.mkdtemp())
+    outbox = NotificationOutbox(
+        temp_dir / "outbox.db",
+        {"email": lambda: SmtpTransport("127.0.0.1", port, username="", starttls=False)},
+        workers=args.workers)
+    outbox.start()
+    started = time.perf_counter()
+    for index in range(args.messages):
+        outbox.enqueue("email", "manager@company.com", "Проверьте новые данные.", subject=f"Новые данные {index}")
+    enqueued = time.perf_counter() - started
+    while server.messages < args.messages:
+        time.sleep(0.005)
+    report("outbox", server, enqueued, time.perf_counter() - started, args.messages)
+
+    outbox.close()
+    server.shutdown()
+    server.server_close()
+    for path in temp_dir.glob("outbox.db*"):
+        path.unlink()
+    temp_dir.rmdir()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Script to downscale and re-encode field photos for customers.
+
+Usage:
+    python scripts/transcode_photos.py --input photos/ --output out/ --max-size 2048x2048
+    python scripts/transcode_photos.py --tag object_12 --output out/ --format webp --workers 8
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.strodservice.filestorage.file_storage import FileStorage
+from src.strodservice.utils.image_transcoder import (
+    OUTPUT_FORMATS, plan_directory, plan_storage_tag, transcode_batch
+)
+
+
+def parse_size(value):
+    """Parse a WIDTHxHEIGHT argument."""
+    try:
+        width, height = value.lower().split("x")
+        return int(width), int(height)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid size '{value}', expected WIDTHxHEIGHT")
+
+
+def main():
+    """Transcode a directory or a tagged set of stored photos."""
+    parser = argparse.ArgumentParser(description="Batch photo downscaling and re-encoding")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", help="Directory with source photos")
+    source.add_argument("--tag", help="FileStorage tag selecting source photos")
+    parser.add_argument("--storage", help="FileStorage path (configured path by default)")
+    parser.add_argument("--output", required=True, help="Output directory")
+    parser.add_argument("--max-size", type=parse_size, default=(2048, 2048), help="WIDTHxHEIGHT bounding box")
+    parser.add_argument("--format", choices=sorted(OUTPUT_FORMATS), default="jpeg", help="Output format")
+    parser.add_argument("--quality", type=int, default=85, help="Encoder quality")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (CPU count by default)")
+    args = parser.parse_args()
+
+    if args.input:
+        jobs = plan_directory(args.input, args.output, args.format)
+    else:
+        storage = FileStorage(args.storage)
+        jobs = plan_storage_tag(storage, args.tag, args.output, args.format)
+        storage.close()
+
+    def progress(done, total):
+        print(f"\r{done}/{total}", end="", flush=True)
+
+    report = transcode_batch(
+        jobs, args.output, args.max_size, output_format=args.format,
+        quality=args.quality, workers=args.workers, progress=progress
+    )
+    print()
+    print(report.summary())
+    for path, error in report.errors.items():
+        print(f"{path}: {error}", file=sys.stderr)
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
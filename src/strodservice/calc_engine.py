@@ -5,7 +5,7 @@ import sys
 BASE_DIR = Path(__file__).resolve().parents[2]   # два уровня вверх → корень проекта
 sys.path.insert(0, str(BASE_DIR))
 from strodservice.models.models import LineType, Material
-from strodservice.database.init_db import SessionLocal, engine
+from strodservice.database.init_db import SessionLocal
 from strodservice.gost_engine import get_material_norm
 
 def calculate_materials_for_object(object_id, line_data):
@@ -1,6 +1,6 @@
 """Application settings and configuration management."""
 import os
-from typing import Optional, Set
+from typing import List, Optional, Set, Tuple
 from dataclasses import dataclass, field
 from dotenv import load_dotenv
 
@@ -15,6 +15,15 @@ def get_allowed_extensions() -> Set[str]:
     )
 
 
+def get_thumbnail_sizes() -> List[Tuple[int, int]]:
+    """Helper function to get the default thumbnail sizes of ThumbnailCache.pregenerate()."""
+    sizes = []
+    for item in os.getenv("THUMBNAIL_PREGENERATE_SIZES", "800x600").split(","):
+        width, height = item.strip().lower().split("x")
+        sizes.append((int(width), int(height)))
+    return sizes
+
+
 @dataclass
 class Settings:
     """Application settings class."""
@@ -23,6 +32,21 @@ class Settings:
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./ksk.db")
     DATABASE_POOL_SIZE: int = int(os.getenv("DATABASE_POOL_SIZE", "5"))
     DATABASE_POOL_TIMEOUT: int = int(os.getenv("DATABASE_POOL_TIMEOUT", "30"))
+    DATABASE_MAX_OVERFLOW: int = int(os.getenv("DATABASE_MAX_OVERFLOW", "10"))
+    DATABASE_POOL_RECYCLE: int = int(os.getenv("DATABASE_POOL_RECYCLE", "1800"))  # seconds
+    
+    # SQLite settings (applied to every new connection)
+    SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL").upper()
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").upper()
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))  # 256MB default
+    SQLITE_CACHE_SIZE_KB: int = int(os.getenv("SQLITE_CACHE_SIZE_KB", str(64 * 1024)))  # 64MB default
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    
+    # Report settings (periods this long or longer are read from field_data_daily)
+    REPORT_ROLLUP_MIN_DAYS: int = int(os.getenv("REPORT_ROLLUP_MIN_DAYS", "31"))
+    
+    # Bulk field data import (rows per INSERT executemany)
+    FIELD_DATA_BULK_CHUNK: int = int(os.getenv("FIELD_DATA_BULK_CHUNK", "5000"))
     
     # Application settings
     APP_NAME: str = os.getenv("APP_NAME", "Strod-Service Technology")
@@ -33,10 +57,25 @@ class Settings:
     STORAGE_PATH: str = os.getenv("STORAGE_PATH", "./storage")
     MAX_FILE_SIZE: int = int(os.getenv("MAX_FILE_SIZE", str(50 * 1024 * 1024)))  # 50MB default
     ALLOWED_FILE_EXTENSIONS: Set[str] = field(default_factory=get_allowed_extensions)
+    STORAGE_INDEX_MODE: str = os.getenv("STORAGE_INDEX_MODE", "json").lower()
+    STORAGE_DEDUP: bool = os.getenv("STORAGE_DEDUP", "False").lower() == "true"
+    STORAGE_JOURNAL_COMPACT_EVERY: int = int(os.getenv("STORAGE_JOURNAL_COMPACT_EVERY", "1000"))
+    STORAGE_INGEST_WORKERS: int = int(os.getenv("STORAGE_INGEST_WORKERS", "4"))
+    STORAGE_COLD_AFTER_DAYS: int = int(os.getenv("STORAGE_COLD_AFTER_DAYS", "180"))
+    STORAGE_COLD_COMPRESSION: str = os.getenv("STORAGE_COLD_COMPRESSION", "gzip").lower()
+    STORAGE_ACCESS_UPDATE_INTERVAL: int = int(os.getenv("STORAGE_ACCESS_UPDATE_INTERVAL", "86400"))
+    
+    # Thumbnail cache settings
+    THUMBNAIL_CACHE_DIR: str = os.getenv("THUMBNAIL_CACHE_DIR", "./cache/thumbnails")
+    THUMBNAIL_CACHE_MAX_SIZE: int = int(os.getenv("THUMBNAIL_CACHE_MAX_SIZE", str(256 * 1024 * 1024)))  # 256MB default
+    THUMBNAIL_PREGENERATE_SIZES: List[Tuple[int, int]] = field(default_factory=get_thumbnail_sizes)
+    THUMBNAIL_WORKERS: int = int(os.getenv("THUMBNAIL_WORKERS", "2"))
     
     # Security settings
     SECRET_KEY: str = os.getenv("SECRET_KEY", "dev-secret-key-change-in-production")
     PASSWORD_HASH_ALGORITHM: str = os.getenv("PASSWORD_HASH_ALGORITHM", "sha256")
+    AUTH_CACHE_TTL: float = float(os.getenv("AUTH_CACHE_TTL", "30"))  # seconds a verified token/user is reused
+    AUTH_CACHE_MAX_SIZE: int = int(os.getenv("AUTH_CACHE_MAX_SIZE", "10000"))
     
     # Logging settings
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
@@ -46,7 +85,41 @@ class Settings:
     # API settings
     API_BASE_URL: str = os.getenv("API_BASE_URL", "http://localhost:8000")
     API_TIMEOUT: int = int(os.getenv("API_TIMEOUT", "30"))
+    API_PAGE_SIZE: int = int(os.getenv("API_PAGE_SIZE", "100"))  # rows per list page by default
+    API_MAX_PAGE_SIZE: int = int(os.getenv("API_MAX_PAGE_SIZE", "1000"))
+    API_BATCH_MAX_ITEMS: int = int(os.getenv("API_BATCH_MAX_ITEMS", "1000"))  # records per POST /api/field_data/batch
     
+    # Incremental sync settings (services/sync_changes.py)
+    SYNC_PAGE_SIZE: int = int(os.getenv("SYNC_PAGE_SIZE", "500"))  # changes per response by default
+    SYNC_MAX_PAGE_SIZE: int = int(os.getenv("SYNC_MAX_PAGE_SIZE", "5000"))
+    SYNC_SETTLE_SECONDS: int = int(os.getenv("SYNC_SETTLE_SECONDS", "5"))  # changes younger than this wait for the next poll
+    SYNC_TOMBSTONE_RETENTION_DAYS: int = int(os.getenv("SYNC_TOMBSTONE_RETENTION_DAYS", "90"))
+
+    # Notification outbox settings (services/notification_outbox.py)
+    NOTIFY_OUTBOX_PATH: str = os.getenv("NOTIFY_OUTBOX_PATH", "./data/outbox.db")
+    NOTIFY_WORKERS: int = int(os.getenv("NOTIFY_WORKERS", "2"))
+    NOTIFY_BATCH_SIZE: int = int(os.getenv("NOTIFY_BATCH_SIZE", "100"))  # messages claimed per worker pass
+    NOTIFY_DIGEST_SECONDS: float = float(os.getenv("NOTIFY_DIGEST_SECONDS", "30"))  # burst window for messages with a digest key
+    NOTIFY_MAX_ATTEMPTS: int = int(os.getenv("NOTIFY_MAX_ATTEMPTS", "8"))  # then the message moves to dead_letters
+    NOTIFY_RETRY_BASE_SECONDS: float = float(os.getenv("NOTIFY_RETRY_BASE_SECONDS", "30"))  # doubled after every failed attempt
+    NOTIFY_RETRY_MAX_SECONDS: float = float(os.getenv("NOTIFY_RETRY_MAX_SECONDS", "3600"))
+    NOTIFY_LEASE_SECONDS: float = float(os.getenv("NOTIFY_LEASE_SECONDS", "300"))  # a claimed message is retried after this if its worker died
+    NOTIFY_POLL_SECONDS: float = float(os.getenv("NOTIFY_POLL_SECONDS", "5"))
+    NOTIFY_FAKE_SINK: bool = os.getenv("NOTIFY_FAKE_SINK", "False").lower() == "true"  # log messages instead of sending them
+    SMTP_HOST: str = os.getenv("SMTP_HOST", "smtp.gmail.com")
+    SMTP_PORT: int = int(os.getenv("SMTP_PORT", "587"))
+    SMTP_STARTTLS: bool = os.getenv("SMTP_STARTTLS", "True").lower() == "true"
+    SMTP_USERNAME: str = os.getenv("SMTP_USERNAME", "your_email@gmail.com")
+    SMTP_PASSWORD: str = os.getenv("SMTP_PASSWORD", "password")
+    SMTP_FROM: str = os.getenv("SMTP_FROM", "admin@company.com")
+    SMTP_TIMEOUT: float = float(os.getenv("SMTP_TIMEOUT", "30"))
+    SMTP_IDLE_SECONDS: float = float(os.getenv("SMTP_IDLE_SECONDS", "60"))  # an idle connection is reopened after this
+    TWILIO_ACCOUNT_SID: str = os.getenv("TWILIO_ACCOUNT_SID", "TWILIO_SID")
+    TWILIO_AUTH_TOKEN: str = os.getenv("TWILIO_AUTH_TOKEN", "TWILIO_TOKEN")
+    TWILIO_FROM_NUMBER: str = os.getenv("TWILIO_FROM_NUMBER", "+1234567890")
+    TELEGRAM_BOT_TOKEN: str = os.getenv("TELEGRAM_BOT_TOKEN", "YOUR_BOT_TOKEN")
+    TELEGRAM_CHAT_ID: str = os.getenv("TELEGRAM_CHAT_ID", "YOUR_CHAT_ID")
+
     # Environment settings
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development").lower()
     
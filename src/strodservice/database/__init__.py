@@ -1,6 +1,8 @@
 # strodservice/database/__init__.py
 
-from .session import engine, SessionLocal
+# Движок не реэкспортируется: configure_engine() заменяет его, и копия,
+# импортированная отсюда, указывала бы на старую базу. Текущий движок - get_engine()
+from .session import SessionLocal, configure_engine, get_engine
 from ..models.models import Base  # вместо from strodservice.models.models import Base
 
-__all__ = ["engine", "SessionLocal", "Base"]
+__all__ = ["get_engine", "configure_engine", "SessionLocal", "Base"]
@@ -0,0 +1,123 @@
+"""
+Фабрика движков базы данных.
+
+Все точки входа (настольное приложение, скрипты, веб-приложения) создают
+движок через create_db_engine, поэтому настройки подключения задаются в
+одном месте - в config/settings.py.
+
+Для SQLite на каждом новом соединении выполняются PRAGMA:
+    journal_mode=WAL       читатели не блокируются записью и наоборот
+    synchronous=NORMAL     в режиме WAL безопасно и без fsync на каждую транзакцию
+    mmap_size              чтение страниц через отображение файла в память
+    cache_size             больший кэш страниц на соединение
+    busy_timeout           ожидание блокировки вместо немедленной ошибки
+    temp_store=MEMORY      временные таблицы сортировок и группировок в памяти
+
+Для серверных баз (PostgreSQL) используется пул QueuePool с проверкой
+соединений перед выдачей и периодическим пересозданием.
+"""
+
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import StaticPool
+
+from ..config.settings import settings
+
+
+def is_sqlite(url) -> bool:
+    return make_url(str(url)).get_backend_name() == "sqlite"
+
+
+def _is_memory_sqlite(url) -> bool:
+    database = make_url(str(url)).database
+    return not database or database == ":memory:" or database.startswith("file::memory:")
+
+
+def engine_options(url) -> Dict[str, Any]:
+    """
+    Параметры create_engine для базы url (без PRAGMA, см. install_sqlite_pragmas).
+
+    Возвращаются и для веб-приложений на flask_sqlalchemy
+    (SQLALCHEMY_ENGINE_OPTIONS).
+    """
+    if is_sqlite(url):
+        # Соединения используются из пула потоков интерфейса, а
+        # последовательный доступ обеспечивает пул
+        options = {"connect_args": {"check_same_thread": False,
+                                    "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000}}
+        if _is_memory_sqlite(url):
+            # База в памяти существует, пока открыто ее единственное соединение
+            options["poolclass"] = StaticPool
+        else:
+            options["pool_size"] = settings.DATABASE_POOL_SIZE
+            options["max_overflow"] = settings.DATABASE_MAX_OVERFLOW
+            options["pool_timeout"] = settings.DATABASE_POOL_TIMEOUT
+        return options
+    return {
+        "pool_size": settings.DATABASE_POOL_SIZE,
+        "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+        "pool_timeout": settings.DATABASE_POOL_TIMEOUT,
+        "pool_recycle": settings.DATABASE_POOL_RECYCLE,
+        "pool_pre_ping": True,  # Verify connections before use
+    }
+
+
+def sqlite_pragmas(memory: bool = False) -> Dict[str, Any]:
+    """PRAGMA, выполняемые на каждом новом соединении SQLite"""
+    pragmas = {
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "cache_size": -settings.SQLITE_CACHE_SIZE_KB,  # отрицательное значение - в КиБ
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+        "temp_store": "MEMORY",
+    }
+    if not memory:
+        # У базы в памяти нет файла: журнал WAL и mmap к ней не применимы
+        pragmas["journal_mode"] = settings.SQLITE_JOURNAL_MODE
+        pragmas["mmap_size"] = settings.SQLITE_MMAP_SIZE
+    return pragmas
+
+
+def install_sqlite_pragmas(engine: Engine, pragmas: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Выполняет PRAGMA на каждом новом соединении движка SQLite.
+
+    Args:
+        engine: Движок SQLite
+        pragmas: PRAGMA и значения (по умолчанию sqlite_pragmas())
+    """
+    if pragmas is None:
+        pragmas = sqlite_pragmas(_is_memory_sqlite(engine.url))
+    statements = [f"PRAGMA {name}={value}" for name, value in pragmas.items()]
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+
+def create_db_engine(url: Optional[str] = None, tuned: bool = True, **overrides) -> Engine:
+    """
+    Создает движок базы данных с настройками приложения.
+
+    Args:
+        url: Адрес базы (по умолчанию settings.DATABASE_URL)
+        tuned: Применять PRAGMA SQLite (False - только для сравнения в бенчмарке)
+        **overrides: Параметры create_engine, заменяющие параметры по умолчанию
+
+    Returns:
+        Engine: Новый движок
+    """
+    url = url or settings.DATABASE_URL
+    options = engine_options(url)
+    options.setdefault("echo", settings.DEBUG)
+    options.update(overrides)
+    engine = create_engine(url, **options)
+    if tuned and is_sqlite(url):
+        install_sqlite_pragmas(engine)
+    return engine
@@ -5,33 +5,56 @@
 """
 
 from .base import Base
+from .migrations import upgrade
+from . import session as db_session
+from .engine import is_sqlite
+from sqlalchemy.engine import make_url
 from ..models.models import *  # импортируем все модели для регистрации
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-import sys
+from ..services import field_rollup  # noqa: F401  пересчет суточных итогов при сохранении FieldData
+from ..services.sync_changes import purge_tombstones  # и отметки об удалении для синхронизации
+import os
 from pathlib import Path
 
-# Глобальные переменные для подключения к базе данных
-engine = None
-SessionLocal = None
+# Общий движок и фабрика сессий (см. database/session.py). SessionLocal -
+# один и тот же объект до и после init_db(), поэтому его можно
+# импортировать заранее; engine обновляется при вызове init_db()
+engine = db_session.engine
+SessionLocal = db_session.SessionLocal
+
+
+def default_database_url():
+    """
+    Адрес базы по умолчанию: DATABASE_URL из окружения, если задан,
+    иначе файл data/ksk.db в корне проекта.
+    """
+    if os.getenv("DATABASE_URL"):
+        return os.getenv("DATABASE_URL")
+    return f"sqlite:///{Path(__file__).resolve().parents[3] / 'data' / 'ksk.db'}"  # ../.. → src → корень
 
 
 def init_db(db_path=None):
     """Инициализация базы данных и создание таблиц."""
-    global engine, SessionLocal
+    global engine
     print("🔧 Инициализация базы данных...")
-    # Если путь к базе данных не передан, используем путь по умолчанию
     if db_path is None:
-        # Используем относительный путь к папке data в корне проекта
-        db_path = Path(__file__).resolve().parents[3] / "data" / "ksk.db"  # ../.. → src → корень
+        url = default_database_url()
+    else:
+        url = f"sqlite:///{db_path}"
     
-    # Создаем директорию, если она не существует
-    db_path.parent.mkdir(parents=True, exist_ok=True)
+    # Создаем директорию файла SQLite, если она не существует
+    database = make_url(url).database if is_sqlite(url) else None
+    if database and database != ":memory:":
+        Path(database).parent.mkdir(parents=True, exist_ok=True)
     
-    engine = create_engine(f"sqlite:///{db_path}", echo=False)
-    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    engine = db_session.configure_engine(url)
     Base.metadata.create_all(bind=engine)
     print("✅ Таблицы созданы:", list(Base.metadata.tables.keys()))
+    # Базы, созданные до появления миграций, получают недостающие индексы
+    applied = upgrade(engine)
+    if applied:
+        print("✅ Применены миграции:", applied)
+    with engine.begin() as connection:
+        purge_tombstones(connection)
     return engine
 
 
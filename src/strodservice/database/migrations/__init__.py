@@ -0,0 +1,95 @@
+"""
+Миграции схемы базы данных.
+
+Миграция - модуль этого пакета с именем вида m0001_описание.py: номер в
+имени задает порядок применения. Модуль определяет функции
+upgrade(connection) и downgrade(connection). Номер последней примененной
+миграции хранится в таблице schema_version, поэтому повторный запуск
+применяет только новые миграции. Каждая миграция выполняется в отдельной
+транзакции вместе с обновлением номера версии.
+"""
+
+import importlib
+import pkgutil
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+VERSION_TABLE = "schema_version"
+
+_MODULE_NAME = re.compile(r"^m(\d{4})_\w+$")
+
+
+def available_migrations() -> List[Tuple[int, object]]:
+    """Возвращает пары (номер, модуль) всех миграций пакета по возрастанию номера"""
+    migrations = []
+    for module_info in pkgutil.iter_modules(__path__):
+        match = _MODULE_NAME.match(module_info.name)
+        if match:
+            module = importlib.import_module(f"{__name__}.{module_info.name}")
+            migrations.append((int(match.group(1)), module))
+    return sorted(migrations, key=lambda item: item[0])
+
+
+def _ensure_version_table(connection: Connection) -> None:
+    connection.execute(text(f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} (version INTEGER NOT NULL)"))
+
+
+def current_version(connection: Connection) -> int:
+    """Номер последней примененной миграции, 0 если миграции не применялись"""
+    _ensure_version_table(connection)
+    version = connection.execute(text(f"SELECT MAX(version) FROM {VERSION_TABLE}")).scalar()
+    return version or 0
+
+
+def _set_version(connection: Connection, version: int) -> None:
+    connection.execute(text(f"DELETE FROM {VERSION_TABLE}"))
+    connection.execute(text(f"INSERT INTO {VERSION_TABLE} (version) VALUES (:version)"), {"version": version})
+
+
+def upgrade(engine: Engine, target: Optional[int] = None) -> List[int]:
+    """
+    Применяет миграции новее текущей версии.
+
+    Args:
+        engine: Движок базы данных
+        target: Номер миграции, до которой обновить схему (по умолчанию последняя)
+
+    Returns:
+        list: Номера примененных миграций
+    """
+    applied = []
+    for version, module in available_migrations():
+        if target is not None and version > target:
+            break
+        with engine.begin() as connection:
+            if version <= current_version(connection):
+                continue
+            module.upgrade(connection)
+            _set_version(connection, version)
+        applied.append(version)
+    return applied
+
+
+def downgrade(engine: Engine, target: int = 0) -> List[int]:
+    """
+    Откатывает миграции новее target в обратном порядке.
+
+    Returns:
+        list: Номера откаченных миграций
+    """
+    migrations = available_migrations()
+    reverted = []
+    for index in range(len(migrations) - 1, -1, -1):
+        version, module = migrations[index]
+        if version <= target:
+            break
+        with engine.begin() as connection:
+            if version > current_version(connection):
+                continue
+            module.downgrade(connection)
+            _set_version(connection, migrations[index - 1][0] if index > 0 else 0)
+        reverted.append(version)
+    return reverted
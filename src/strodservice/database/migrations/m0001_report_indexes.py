@@ -0,0 +1,26 @@
+"""
+Индексы для отчетов и фильтров.
+
+Отчеты по полевым данным выбирают записи за период, часто по одному
+объекту или типу линии; документы выводятся по объекту и типу.
+"""
+
+from sqlalchemy import text
+
+INDEXES = [
+    ("ix_field_data_object_id_date", "field_data", ("object_id", "date")),
+    ("ix_field_data_date", "field_data", ("date",)),
+    ("ix_field_data_line_type_id_date", "field_data", ("line_type_id", "date")),
+    ("ix_documents_object_id_type", "documents", ("object_id", "type")),
+]
+
+
+def upgrade(connection):
+    # IF NOT EXISTS: в базах, созданных через create_all, индексы уже есть
+    for name, table, columns in INDEXES:
+        connection.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"))
+
+
+def downgrade(connection):
+    for name, _, _ in INDEXES:
+        connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
@@ -0,0 +1,86 @@
+"""
+Индексы для поиска в списках объектов, материалов и документов.
+
+В SQLite создаются полнотекстовые таблицы FTS5 с внешним содержимым
+(content=...): текст хранится только в исходной таблице, а индекс
+поддерживают триггеры. Токенизатор unicode61 приводит к одному регистру
+и кириллицу, чего не умеют встроенные LIKE и lower() SQLite. Если SQLite
+собран без FTS5, миграция ничего не создает и поиск выполняется через LIKE.
+
+В PostgreSQL для тех же столбцов создаются триграммные индексы pg_trgm,
+которые используются запросами ILIKE '%текст%'.
+"""
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+# (таблица поиска, исходная таблица, столбец)
+SEARCH_INDEXES = [
+    ("objects_fts", "objects", "name"),
+    ("materials_fts", "materials", "name"),
+    ("documents_fts", "documents", "type"),
+]
+
+FTS_TOKENIZER = "unicode61 remove_diacritics 2"
+
+
+def _sqlite_has_fts5(connection) -> bool:
+    try:
+        connection.execute(text("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(value)"))
+    except OperationalError:
+        return False
+    connection.execute(text("DROP TABLE temp.fts5_probe"))
+    return True
+
+
+def _upgrade_sqlite(connection):
+    if not _sqlite_has_fts5(connection):
+        return
+    for fts, table, column in SEARCH_INDEXES:
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+            f"{column}, content='{table}', content_rowid='id', tokenize='{FTS_TOKENIZER}')"
+        ))
+        connection.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END"
+        ))
+        connection.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.id, old.{column}); END"
+        ))
+        connection.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {column} ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.id, old.{column}); "
+            f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END"
+        ))
+        # Индексирует записи, добавленные до миграции
+        connection.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+def _upgrade_postgresql(connection):
+    connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    for _, table, column in SEARCH_INDEXES:
+        connection.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{table}_{column}_trgm "
+            f"ON {table} USING gin ({column} gin_trgm_ops)"
+        ))
+
+
+def upgrade(connection):
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        _upgrade_sqlite(connection)
+    elif dialect == "postgresql":
+        _upgrade_postgresql(connection)
+
+
+def downgrade(connection):
+    dialect = connection.dialect.name
+    for fts, table, column in SEARCH_INDEXES:
+        if dialect == "sqlite":
+            for suffix in ("ai", "ad", "au"):
+                connection.execute(text(f"DROP TRIGGER IF EXISTS {fts}_{suffix}"))
+            connection.execute(text(f"DROP TABLE IF EXISTS {fts}"))
+        elif dialect == "postgresql":
+            connection.execute(text(f"DROP INDEX IF EXISTS ix_{table}_{column}_trgm"))
@@ -0,0 +1,46 @@
+"""
+Таблица суточных итогов полевых данных field_data_daily.
+
+Миграция создает таблицу (в базах, созданных через create_all, она уже
+есть) и заполняет ее по всем имеющимся записям field_data. Дальше
+таблицу поддерживает services/field_rollup.py.
+"""
+
+from sqlalchemy import text
+
+CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS field_data_daily (
+    object_id INTEGER NOT NULL,
+    line_type_id INTEGER NOT NULL,
+    day DATE NOT NULL,
+    records INTEGER NOT NULL,
+    total_length FLOAT NOT NULL,
+    total_area FLOAT NOT NULL,
+    total_material_used FLOAT NOT NULL,
+    material_records INTEGER NOT NULL,
+    PRIMARY KEY (object_id, line_type_id, day)
+)
+"""
+
+# date(...) есть и в SQLite, и в PostgreSQL
+FILL_TABLE = """
+INSERT INTO field_data_daily (object_id, line_type_id, day, records, total_length,
+                              total_area, total_material_used, material_records)
+SELECT object_id, line_type_id, date(date), COUNT(id),
+       COALESCE(SUM(length), 0), COALESCE(SUM(length * width), 0),
+       COALESCE(SUM(material_used), 0), COUNT(material_used)
+FROM field_data
+WHERE date IS NOT NULL
+GROUP BY object_id, line_type_id, date(date)
+"""
+
+
+def upgrade(connection):
+    connection.execute(text(CREATE_TABLE))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_field_data_daily_day ON field_data_daily (day)"))
+    connection.execute(text("DELETE FROM field_data_daily"))
+    connection.execute(text(FILL_TABLE))
+
+
+def downgrade(connection):
+    connection.execute(text("DROP TABLE IF EXISTS field_data_daily"))
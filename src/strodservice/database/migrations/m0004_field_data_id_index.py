@@ -0,0 +1,17 @@
+"""
+Удаление индекса ix_field_data_id.
+
+Индекс дублирует первичный ключ field_data (в SQLite первичный ключ
+INTEGER - это rowid) и только замедляет вставку записей, в том числе
+массовую загрузку services/field_import.py.
+"""
+
+from sqlalchemy import text
+
+
+def upgrade(connection):
+    connection.execute(text("DROP INDEX IF EXISTS ix_field_data_id"))
+
+
+def downgrade(connection):
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_field_data_id ON field_data (id)"))
@@ -0,0 +1,46 @@
+"""
+Инкрементальная синхронизация: отметки об удалении и индексы по updated_at.
+
+Миграция создает таблицу deleted_records (в базах, созданных через
+create_all, она уже есть), индексы (updated_at, id) для выборки
+изменений с момента последней синхронизации и заполняет пустой
+updated_at старых записей: без него запись не попала бы ни в одну
+выборку изменений.
+"""
+
+from sqlalchemy import text
+
+SYNC_TABLES = ("field_data", "objects", "materials")
+
+CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS deleted_records (
+    id INTEGER NOT NULL PRIMARY KEY,
+    table_name VARCHAR(64) NOT NULL,
+    record_id INTEGER NOT NULL,
+    deleted_at DATETIME NOT NULL
+)
+"""
+
+# Формат даты типа DateTime SQLAlchemy в SQLite
+EPOCH = "1970-01-01 00:00:00.000000"
+
+
+def upgrade(connection):
+    connection.execute(text(CREATE_TABLE))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_deleted_records_table_name_deleted_at_id "
+        "ON deleted_records (table_name, deleted_at, id)"
+    ))
+    for table in SYNC_TABLES:
+        connection.execute(text(
+            f"UPDATE {table} SET updated_at = COALESCE(created_at, :epoch) WHERE updated_at IS NULL"
+        ), {"epoch": EPOCH})
+        connection.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{table}_updated_at_id ON {table} (updated_at, id)"
+        ))
+
+
+def downgrade(connection):
+    for table in SYNC_TABLES:
+        connection.execute(text(f"DROP INDEX IF EXISTS ix_{table}_updated_at_id"))
+    connection.execute(text("DROP TABLE IF EXISTS deleted_records"))
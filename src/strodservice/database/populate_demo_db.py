@@ -7,14 +7,13 @@ from datetime import datetime
 BASE_DIR = Path(__file__).resolve().parent.parent  # один уровень вверх от database
 sys.path.insert(0, str(BASE_DIR))
 
-from sqlalchemy.orm import sessionmaker
-from strodservice.database.init_db import engine, SessionLocal
+from strodservice.database.init_db import init_db, SessionLocal
 from strodservice.models.models import (
     Object, Material, Organization, LineType, Contractor, Document, FieldData, Base
 )
 
-# --- Создание таблиц ---
-Base.metadata.create_all(bind=engine)
+# --- Создание таблиц и настройка общего движка ---
+init_db()
 
 # --- Создание сессии ---
 session = SessionLocal()
@@ -1,23 +1,43 @@
-import sys
-import os
 from contextlib import contextmanager
-from sqlalchemy import create_engine
+from typing import Optional
+
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
-from ..config.settings import settings
-
-# Use the configured database URL from settings
-engine = create_engine(
-    settings.DATABASE_URL,
-    echo=settings.DEBUG,
-    future=True,
-    pool_size=settings.DATABASE_POOL_SIZE,
-    pool_timeout=settings.DATABASE_POOL_TIMEOUT,
-    pool_pre_ping=True,  # Verify connections before use
-)
+
+from .engine import create_db_engine
+
+# The shared engine, created from settings.DATABASE_URL. configure_engine()
+# replaces it; SessionLocal follows, so modules that imported SessionLocal
+# before the database was configured still get sessions of the current engine.
+engine = create_db_engine()
 
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
 
+def get_engine() -> Engine:
+    """Return the shared engine."""
+    return engine
+
+
+def configure_engine(url: Optional[str] = None, **overrides) -> Engine:
+    """
+    Point the shared engine and SessionLocal at another database.
+
+    Args:
+        url: Database URL (settings.DATABASE_URL by default)
+        **overrides: create_engine options overriding the defaults
+
+    Returns:
+        Engine: The new shared engine
+    """
+    global engine
+    previous = engine
+    engine = create_db_engine(url, **overrides)
+    SessionLocal.configure(bind=engine)
+    previous.dispose()
+    return engine
+
+
 @contextmanager
 def get_db_session():
     """Context manager for database sessions with automatic commit/rollback."""
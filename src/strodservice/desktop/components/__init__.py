@@ -0,0 +1,18 @@
+"""
+Переиспользуемые компоненты интерфейса: модели таблиц, делегаты,
+фоновое выполнение задач и отложенный вызов.
+"""
+
+from .background import BackgroundRunner, CancellationToken
+from .debounce import Debouncer
+from .lazy_table_model import LazyQueryTableModel, TableColumn
+from .row_actions_delegate import RowActionsDelegate
+
+__all__ = [
+    'BackgroundRunner',
+    'CancellationToken',
+    'Debouncer',
+    'LazyQueryTableModel',
+    'TableColumn',
+    'RowActionsDelegate',
+]
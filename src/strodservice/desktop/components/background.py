@@ -0,0 +1,211 @@
+"""
+Модуль фонового выполнения запросов к базе данных и внешним API.
+
+Функции выполняются в QThreadPool, а результат возвращается сигналом в
+поток интерфейса, где вызывается обработчик. Задачи объединяются в
+каналы - по одному на представление (таблицу, отчет, баланс карты).
+Новая задача канала отменяет предыдущую: еще не начавшаяся задача
+снимается с очереди, выполняющаяся получает отмену через
+CancellationToken, а ее результат, если он все же придет, отбрасывается.
+Так представление обновляет только последний запрос.
+
+Пример:
+    self.background = BackgroundRunner(self)
+    self.background.submit('fuel_balance', get_fuel_balance, card_id,
+                           on_result=self.show_balance, on_error=self.show_error)
+"""
+
+import itertools
+import logging
+import threading
+from typing import Callable, Dict, Optional, Set
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+
+from ...exceptions import TaskCancelledError
+
+
+class CancellationToken:
+    """
+    Признак отмены фоновой задачи.
+
+    Долгие функции могут принимать токен (submit(..., pass_token=True)) и
+    проверять его между шагами, например между страницами запроса.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self) -> None:
+        """Прерывает задачу исключением TaskCancelledError, если она отменена"""
+        if self._event.is_set():
+            raise TaskCancelledError("Задача отменена")
+
+
+class _TaskSignals(QObject):
+    finished = pyqtSignal(str, int, object)
+    failed = pyqtSignal(str, int, object)
+    progress = pyqtSignal(str, int, object)
+    done = pyqtSignal(object)
+
+
+class _Task(QRunnable):
+    """Задача пула потоков, выполняющая одну функцию"""
+
+    def __init__(self, channel, generation, token, function, args, kwargs):
+        super().__init__()
+        # Задачей владеет BackgroundRunner, а не пул: так ее можно безопасно
+        # снять с очереди и после запуска
+        self.setAutoDelete(False)
+        self.channel = channel
+        self.generation = generation
+        self.token = token
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = _TaskSignals()
+
+    def report_progress(self, *values):
+        """Передает ход выполнения в поток интерфейса"""
+        self.signals.progress.emit(self.channel, self.generation, values)
+
+    def run(self):
+        try:
+            if self.token.cancelled:
+                return
+            result = self.function(*self.args, **self.kwargs)
+        except TaskCancelledError:
+            pass
+        except Exception as e:
+            self.signals.failed.emit(self.channel, self.generation, e)
+        else:
+            self.signals.finished.emit(self.channel, self.generation, result)
+        finally:
+            self.signals.done.emit(self)
+
+
+class BackgroundRunner(QObject):
+    """
+    Выполнение функций в пуле потоков с доставкой результата в поток
+    интерфейса и отменой устаревших задач.
+
+    Функции выполняются вне потока интерфейса, поэтому не должны
+    обращаться к виджетам и должны открывать собственную сессию базы
+    данных: сессия SQLAlchemy не потокобезопасна.
+    """
+
+    def __init__(self, parent=None, max_threads: Optional[int] = None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        if max_threads:
+            self.pool.setMaxThreadCount(max_threads)
+        self._generations = itertools.count(1)
+        # Последняя задача каждого канала: (поколение, задача, обработчики результата, ошибки и хода)
+        self._current: Dict[str, tuple] = {}
+        # Все задачи в очереди или в работе, включая отмененные
+        self._tasks: Set[_Task] = set()
+
+    def submit(self, channel: str, function: Callable, *args,
+               on_result: Optional[Callable] = None, on_error: Optional[Callable] = None,
+               on_progress: Optional[Callable] = None, pass_token: bool = False,
+               **kwargs) -> CancellationToken:
+        """
+        Ставит функцию в очередь пула потоков, отменяя предыдущую задачу канала.
+
+        Args:
+            channel: Имя канала; результат доставляется, только если после
+                этой задачи в канал не поступило новой
+            function: Выполняемая функция
+            *args, **kwargs: Аргументы функции
+            on_result: Вызывается в потоке интерфейса с результатом функции
+            on_error: Вызывается в потоке интерфейса с исключением функции
+                (по умолчанию ошибка записывается в журнал)
+            on_progress: Если задан, функция получает аргумент progress;
+                аргументы каждого вызова progress(...) передаются в
+                on_progress в потоке интерфейса
+            pass_token: Передать функции токен отмены аргументом cancel_token
+
+        Returns:
+            CancellationToken: Токен отмены задачи
+        """
+        self.cancel(channel)
+        token = CancellationToken()
+        if pass_token:
+            kwargs['cancel_token'] = token
+        generation = next(self._generations)
+        task = _Task(channel, generation, token, function, args, kwargs)
+        if on_progress is not None:
+            task.kwargs['progress'] = task.report_progress
+            task.signals.progress.connect(self._on_progress)
+        task.signals.finished.connect(self._on_finished)
+        task.signals.failed.connect(self._on_failed)
+        task.signals.done.connect(self._on_done)
+        self._current[channel] = (generation, task, on_result, on_error, on_progress)
+        self._tasks.add(task)
+        self.pool.start(task)
+        return token
+
+    def cancel(self, channel: str) -> None:
+        """Отменяет текущую задачу канала; ее результат не будет доставлен"""
+        current = self._current.pop(channel, None)
+        if current is None:
+            return
+        task = current[1]
+        task.token.cancel()
+        if self.pool.tryTake(task):
+            # Задача не начиналась и уже не начнется
+            self._tasks.discard(task)
+
+    def cancel_all(self) -> None:
+        """Отменяет задачи всех каналов"""
+        for channel in list(self._current):
+            self.cancel(channel)
+
+    def is_running(self, channel: str) -> bool:
+        """Есть ли у канала задача, результат которой еще не доставлен"""
+        return channel in self._current
+
+    def wait(self, msecs: int = -1) -> bool:
+        """Ожидает завершения всех задач пула (для закрытия окна и тестов)"""
+        return self.pool.waitForDone(msecs)
+
+    def _take_current(self, channel: str, generation: int):
+        current = self._current.get(channel)
+        if current is None or current[0] != generation:
+            # Результат устаревшей задачи: канал уже ждет более новый
+            return None
+        del self._current[channel]
+        return current
+
+    @pyqtSlot(object)
+    def _on_done(self, task):
+        self._tasks.discard(task)
+
+    @pyqtSlot(str, int, object)
+    def _on_progress(self, channel, generation, values):
+        current = self._current.get(channel)
+        if current is not None and current[0] == generation:
+            current[4](*values)
+
+    @pyqtSlot(str, int, object)
+    def _on_finished(self, channel, generation, result):
+        current = self._take_current(channel, generation)
+        if current is not None and current[2] is not None:
+            current[2](result)
+
+    @pyqtSlot(str, int, object)
+    def _on_failed(self, channel, generation, error):
+        current = self._take_current(channel, generation)
+        if current is None:
+            return
+        if current[3] is not None:
+            current[3](error)
+        else:
+            logging.getLogger(__name__).error(f"Ошибка фоновой задачи {channel}: {str(error)}")
@@ -0,0 +1,50 @@
+"""
+Модуль отложенного вызова функции (debounce).
+
+Поле фильтра вызывает trigger() на каждое изменение текста, а функция
+выполняется один раз - когда ввод прекратился на заданное время. Так при
+наборе слова в базу уходит один запрос, а не по запросу на каждую букву.
+"""
+
+from typing import Callable
+
+from PyQt5.QtCore import QObject, QTimer
+
+DEFAULT_DELAY_MS = 300
+
+
+class Debouncer(QObject):
+    """
+    Вызывает функцию после паузы в вызовах trigger().
+
+    Пример:
+        self.obj_filter_debounce = Debouncer(self.load_objects_to_table, parent=self)
+        self.obj_filter_input.textChanged.connect(self.obj_filter_debounce.trigger)
+        self.obj_filter_input.returnPressed.connect(self.obj_filter_debounce.flush)
+    """
+
+    def __init__(self, callback: Callable[[], None], delay_ms: int = DEFAULT_DELAY_MS, parent=None):
+        super().__init__(parent)
+        self.callback = callback
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self.callback)
+
+    def trigger(self, *args) -> None:
+        """Откладывает вызов; аргументы сигнала игнорируются"""
+        self._timer.start()
+
+    def flush(self) -> None:
+        """Выполняет отложенный вызов сразу, если он ожидается"""
+        if self._timer.isActive():
+            self._timer.stop()
+            self.callback()
+
+    def cancel(self) -> None:
+        """Отменяет ожидающий вызов"""
+        self._timer.stop()
+
+    @property
+    def pending(self) -> bool:
+        return self._timer.isActive()
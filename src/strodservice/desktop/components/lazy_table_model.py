@@ -0,0 +1,239 @@
+"""
+Модуль табличной модели с постраничной загрузкой строк из базы данных.
+
+Модель не создает виджетов для ячеек и хранит только значения уже
+загруженных строк. Очередная страница запрашивается, когда представление
+прокручивается к концу загруженной части (canFetchMore/fetchMore), поэтому
+таблица на десятки тысяч записей открывается сразу. С BackgroundRunner
+страницы загружаются в пуле потоков, и медленный запрос не блокирует
+интерфейс.
+"""
+
+import logging
+from dataclasses import dataclass
+from operator import attrgetter
+from typing import Any, Callable, List, Optional, Sequence, Union
+
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt, pyqtSignal
+
+DEFAULT_PAGE_SIZE = 200
+
+
+@dataclass
+class TableColumn:
+    """
+    Описание столбца модели.
+
+    Attributes:
+        header: Заголовок столбца
+        value: Имя атрибута строки запроса или функция, получающая строку
+            и возвращающая значение ячейки. None - столбец без данных
+            (например, столбец действий, который рисует делегат)
+        format: Функция преобразования значения в отображаемый текст
+        editable: Разрешено ли редактирование ячейки в представлении
+    """
+    header: str
+    value: Union[str, Callable[[Any], Any], None] = None
+    format: Optional[Callable[[Any], str]] = None
+    editable: bool = False
+
+    def extract(self, row) -> Any:
+        if self.value is None:
+            return None
+        if isinstance(self.value, str):
+            return attrgetter(self.value)(row)
+        return self.value(row)
+
+    def display(self, value) -> Optional[str]:
+        if value is None:
+            return None if self.value is None else ""
+        return self.format(value) if self.format else str(value)
+
+
+class LazyQueryTableModel(QAbstractTableModel):
+    """
+    Модель таблицы, загружающая результат запроса SQLAlchemy страницами.
+
+    Запрос строит функция query_factory(session); у запроса должен быть
+    однозначный порядок (ORDER BY), иначе страницы могут пересекаться.
+    Для каждой страницы открывается и сразу закрывается отдельная сессия,
+    а строки сохраняются в виде списков значений столбцов. Если задан
+    runner, страница загружается в фоне; смена запроса или refresh()
+    отменяет загрузку, и страница старого запроса в модель не попадет.
+
+    Signals:
+        load_failed(str): Ошибка при загрузке страницы; загрузка прекращается
+            до следующего refresh()
+    """
+
+    load_failed = pyqtSignal(str)
+
+    def __init__(self, session_factory: Callable, columns: Sequence[TableColumn],
+                 query_factory: Optional[Callable] = None, key: Union[str, Callable, None] = 'id',
+                 page_size: int = DEFAULT_PAGE_SIZE, runner=None, parent=None):
+        """
+        Инициализация модели.
+
+        Args:
+            session_factory: Фабрика сессий базы данных
+            columns: Описание столбцов
+            query_factory: Функция, строящая запрос по сессии (можно задать позже)
+            key: Атрибут или функция, дающая ключ строки (по умолчанию id)
+            page_size: Число строк, загружаемых за раз
+            runner: BackgroundRunner для загрузки страниц вне потока интерфейса
+                (по умолчанию страницы загружаются синхронно)
+            parent: Родительский объект Qt
+        """
+        super().__init__(parent)
+        self.session_factory = session_factory
+        self.columns = list(columns)
+        self.page_size = page_size
+        self._key = TableColumn("", key) if key is not None else None
+        self._query_factory = query_factory
+        self._rows: List[list] = []
+        self._keys: List[Any] = []
+        self._exhausted = query_factory is None
+        self.runner = runner
+        self._loading = False
+        self._channel = f"table-model-{id(self)}"
+
+    def set_query(self, query_factory: Optional[Callable]) -> None:
+        """Заменяет запрос модели и сбрасывает загруженные строки"""
+        self._query_factory = query_factory
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Сбрасывает загруженные строки; первая страница загрузится по запросу представления"""
+        if self.runner is not None:
+            self.runner.cancel(self._channel)
+        self._loading = False
+        self.beginResetModel()
+        self._rows = []
+        self._keys = []
+        self._exhausted = self._query_factory is None
+        self.endResetModel()
+
+    # --- Постраничная загрузка ---
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        if parent.isValid():
+            return False
+        return not self._exhausted and not self._loading
+
+    def fetchMore(self, parent=QModelIndex()) -> None:
+        if not self.canFetchMore(parent):
+            return
+        if self.runner is None:
+            self._fetch_now()
+            return
+        self._loading = True
+        self.runner.submit(
+            self._channel, self._load_page, self._query_factory, len(self._rows),
+            on_result=lambda result: self._append_page(*result),
+            on_error=self._on_load_failed,
+        )
+
+    def fetch_all(self) -> None:
+        """Синхронно загружает все оставшиеся страницы"""
+        if self.runner is not None:
+            self.runner.cancel(self._channel)
+        self._loading = False
+        while self.canFetchMore():
+            self._fetch_now()
+
+    def _fetch_now(self) -> None:
+        try:
+            page, exhausted = self._load_page(self._query_factory, len(self._rows))
+        except Exception as e:
+            # fetchMore вызывается из Qt, исключение здесь не дошло бы до окна
+            self._on_load_failed(e)
+            return
+        self._append_page(page, exhausted)
+
+    def _load_page(self, query_factory, offset):
+        """
+        Загружает страницу начиная со строки offset. Может выполняться в
+        другом потоке, поэтому не меняет состояние модели.
+
+        Returns:
+            tuple: Список пар (значения столбцов, ключ) и признак последней страницы
+        """
+        session = self.session_factory()
+        try:
+            # Лишняя строка показывает, есть ли следующая страница
+            records = query_factory(session).offset(offset).limit(self.page_size + 1).all()
+            page = [
+                ([column.extract(record) for column in self.columns],
+                 self._key.extract(record) if self._key else None)
+                for record in records[:self.page_size]
+            ]
+        finally:
+            session.close()
+        return page, len(records) <= self.page_size
+
+    def _append_page(self, page, exhausted) -> None:
+        self._loading = False
+        self._exhausted = exhausted
+        if not page:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+        for values, key in page:
+            self._rows.append(values)
+            self._keys.append(key)
+        self.endInsertRows()
+
+    def _on_load_failed(self, error) -> None:
+        self._loading = False
+        self._exhausted = True
+        logging.getLogger(__name__).error(f"Ошибка загрузки строк таблицы: {str(error)}")
+        self.load_failed.emit(str(error))
+
+    # --- Доступ к данным ---
+
+    def row_key(self, row: int) -> Any:
+        """Ключ строки (например, id записи) или None для несуществующей строки"""
+        if 0 <= row < len(self._keys):
+            return self._keys[row]
+        return None
+
+    def value(self, row: int, column: int) -> Any:
+        """Значение ячейки без форматирования"""
+        return self._rows[row][column]
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            value = self._rows[index.row()][index.column()]
+            if role == Qt.EditRole:
+                return value
+            return self.columns[index.column()].display(value)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.columns[section].header
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if self.columns[index.column()].editable:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.EditRole) -> bool:
+        """Изменяет значение в загруженной строке; запись в базу выполняет окно"""
+        if not index.isValid() or role != Qt.EditRole or not self.columns[index.column()].editable:
+            return False
+        self._rows[index.row()][index.column()] = value
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+        return True
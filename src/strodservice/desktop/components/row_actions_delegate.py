@@ -0,0 +1,101 @@
+"""
+Модуль делегата, рисующего кнопки действий в строке таблицы.
+
+Вместо отдельного виджета с кнопками для каждой строки делегат рисует
+кнопки средствами текущего стиля и определяет нажатую кнопку по
+координатам щелчка. Сколько бы строк ни было в таблице, виджетов
+не создается.
+"""
+
+from typing import List, Sequence, Tuple
+
+from PyQt5.QtCore import QEvent, QRect, QSize, Qt, pyqtSignal
+from PyQt5.QtWidgets import QApplication, QStyle, QStyledItemDelegate, QStyleOptionButton
+
+BUTTON_MARGIN = 4
+BUTTON_PADDING = 12
+
+
+class RowActionsDelegate(QStyledItemDelegate):
+    """
+    Делегат столбца действий.
+
+    Signals:
+        action_triggered(str, int): Имя действия и номер строки модели
+    """
+
+    action_triggered = pyqtSignal(str, int)
+
+    def __init__(self, actions: Sequence[Tuple[str, str]], parent=None):
+        """
+        Инициализация делегата.
+
+        Args:
+            actions: Пары (имя действия, подпись кнопки), например
+                [('edit', "Редактировать"), ('delete', "Удалить")]
+            parent: Родительский объект Qt
+        """
+        super().__init__(parent)
+        self.actions = list(actions)
+        self._pressed = None
+
+    def _style(self, option):
+        widget = option.widget
+        return widget.style() if widget is not None else QApplication.style()
+
+    def button_rects(self, option) -> List[QRect]:
+        """Прямоугольники кнопок внутри ячейки"""
+        rects = []
+        x = option.rect.x() + BUTTON_MARGIN
+        height = option.rect.height() - 2 * BUTTON_MARGIN
+        for _, label in self.actions:
+            width = option.fontMetrics.horizontalAdvance(label) + 2 * BUTTON_PADDING
+            rects.append(QRect(x, option.rect.y() + BUTTON_MARGIN, width, height))
+            x += width + BUTTON_MARGIN
+        return rects
+
+    def paint(self, painter, option, index):
+        style = self._style(option)
+        style.drawPrimitive(QStyle.PE_PanelItemViewItem, option, painter, option.widget)
+        painter.save()
+        painter.setClipRect(option.rect)
+        for (name, label), rect in zip(self.actions, self.button_rects(option)):
+            button = QStyleOptionButton()
+            button.rect = rect
+            button.text = label
+            button.state = QStyle.State_Enabled
+            if self._pressed == (index.row(), name):
+                button.state |= QStyle.State_Sunken
+            else:
+                button.state |= QStyle.State_Raised
+            style.drawControl(QStyle.CE_PushButton, button, painter, option.widget)
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        rects = self.button_rects(option)
+        width = (rects[-1].right() - option.rect.x() + BUTTON_MARGIN) if rects else 0
+        height = option.fontMetrics.height() + 2 * (BUTTON_MARGIN + 4)
+        return QSize(width, height)
+
+    def action_at(self, option, pos):
+        """Имя действия, кнопка которого содержит точку pos, или None"""
+        if not option.rect.contains(pos):
+            return None
+        for (name, _), rect in zip(self.actions, self.button_rects(option)):
+            if rect.contains(pos):
+                return name
+        return None
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonPress and event.button() == Qt.LeftButton:
+            name = self.action_at(option, event.pos())
+            if name is not None:
+                self._pressed = (index.row(), name)
+                return True
+        elif event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            pressed, self._pressed = self._pressed, None
+            name = self.action_at(option, event.pos())
+            if name is not None and pressed == (index.row(), name):
+                self.action_triggered.emit(name, index.row())
+                return True
+        return super().editorEvent(event, model, option, index)
@@ -10,7 +10,7 @@ from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QListWidget, QStackedWidget,
     QVBoxLayout, QHBoxLayout, QLabel, QTableWidget, QTableWidgetItem,
     QPushButton, QLineEdit, QFormLayout, QMessageBox, QFileDialog,
-    QHeaderView, QComboBox, QDateEdit
+    QHeaderView, QComboBox, QDateEdit, QTableView
 )
 from PyQt5.QtCore import Qt
 import matplotlib.pyplot as plt
@@ -26,6 +26,7 @@ from strodservice.calc_engine import calculate_materials_for_object
 from strodservice.notifications import notify_manager_low_material
 from strodservice.contractor_manager import ContractorForm
 from strodservice.services.reports import generate_materials_report
+from strodservice.services.list_search import apply_text_search
 from strodservice.apifuel_card_api import get_fuel_balance, get_fuel_transactions
 from strodservice.utils.telegram_bot import send_telegram_message
 from strodservice.utils.logger import app_logger
@@ -34,8 +35,15 @@ from strodservice.utils.autostart import add_to_startup, remove_from_startup
 from strodservice.config.settings_manager import SettingsWidget
 from strodservice.services.error_reporter import report_error
 from strodservice.field_data_form import FieldDataForm
+from strodservice.desktop.components import (
+    BackgroundRunner, Debouncer, LazyQueryTableModel, TableColumn, RowActionsDelegate
+)
 from strodservice.utils.offline_calc import OfflineCalcWidget
 
+# Кнопки в столбце "Действия" таблиц объектов, материалов и документов
+ROW_ACTIONS = [('edit', "Редактировать"), ('delete', "Удалить")]
+
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -67,6 +75,9 @@ class MainWindow(QMainWindow):
         # Центральный виджет
         self.stacked_widget = QStackedWidget()
 
+        # Запросы к базе и внешним API выполняются вне потока интерфейса
+        self.background = BackgroundRunner(self)
+
         # Создание страниц
         self.objects_page = self.create_objects_page()
         self.materials_page = self.create_materials_page()
@@ -109,6 +120,18 @@ class MainWindow(QMainWindow):
     def switch_page(self, index):
         self.stacked_widget.setCurrentIndex(index)
 
+    def background_error_handler(self, message):
+        """Обработчик ошибки фоновой задачи: запись в журнал и отчет об ошибке"""
+        def handler(error):
+            app_logger.error(f"{message}: {error}")
+            report_error(error)
+        return handler
+
+    def closeEvent(self, event):
+        # Результаты незавершенных фоновых задач окну уже не нужны
+        self.background.cancel_all()
+        event.accept()
+
     # === СТРАНИЦА: Объекты ===
     def create_objects_page(self):
         layout = QVBoxLayout()
@@ -117,15 +140,25 @@ class MainWindow(QMainWindow):
         filter_layout = QHBoxLayout()
         self.obj_filter_input = QLineEdit()
         self.obj_filter_input.setPlaceholderText("Фильтр по названию...")
+        self.obj_filter_debounce = Debouncer(self.load_objects_to_table, parent=self)
         self.obj_filter_input.textChanged.connect(self.filter_objects)
+        self.obj_filter_input.returnPressed.connect(self.obj_filter_debounce.flush)
         filter_layout.addWidget(QLabel("Фильтр:"))
         filter_layout.addWidget(self.obj_filter_input)
 
         layout.addLayout(filter_layout)
 
         # Таблица
-        self.objects_table = QTableWidget(0, 4)
-        self.objects_table.setHorizontalHeaderLabels(["ID", "Название", "Местоположение", "Действия"])
+        self.objects_model = LazyQueryTableModel(SessionLocal, [
+            TableColumn("ID", 'id'),
+            TableColumn("Название", 'name'),
+            TableColumn("Местоположение", 'location'),
+            TableColumn("Действия"),
+        ], runner=self.background)
+        self.objects_table = self.create_lazy_table(self.objects_model, {
+            'edit': self.edit_object,
+            'delete': self.delete_object,
+        })
         header = self.objects_table.horizontalHeader()
         header.setSectionResizeMode(1, QHeaderView.Stretch)
         self.load_objects_to_table()
@@ -145,41 +178,45 @@ class MainWindow(QMainWindow):
         page.setLayout(layout)
         return page
 
+    def create_lazy_table(self, model, handlers):
+        """
+        Таблица с постраничной загрузкой строк. Кнопки последнего столбца
+        рисует делегат; handlers сопоставляет имени действия функцию,
+        получающую ключ строки.
+        """
+        table = QTableView()
+        table.setModel(model)
+        table.setSelectionBehavior(QTableView.SelectRows)
+
+        delegate = RowActionsDelegate(ROW_ACTIONS, table)
+        delegate.action_triggered.connect(
+            lambda action, row: handlers[action](model.row_key(row))
+        )
+        table.setItemDelegateForColumn(model.columnCount() - 1, delegate)
+        table.verticalHeader().setDefaultSectionSize(table.fontMetrics().height() + 16)
+        table.horizontalHeader().setSectionResizeMode(model.columnCount() - 1, QHeaderView.ResizeToContents)
+
+        model.load_failed.connect(lambda message: app_logger.error(f"Ошибка загрузки таблицы: {message}"))
+        return table
+
     def load_objects_to_table(self):
         try:
-            session = SessionLocal()
-            objects = session.query(Object).all()
-            self.objects_table.setRowCount(len(objects))
-            for i, obj in enumerate(objects):
-                self.objects_table.setItem(i, 0, QTableWidgetItem(str(obj.id)))
-                self.objects_table.setItem(i, 1, QTableWidgetItem(obj.name))
-                self.objects_table.setItem(i, 2, QTableWidgetItem(obj.location))
-
-                # Кнопки "Редактировать", "Удалить"
-                btn_layout = QHBoxLayout()
-                btn_edit = QPushButton("Редактировать")
-                btn_edit.clicked.connect(lambda _, id=obj.id: self.edit_object(id))
-                btn_delete = QPushButton("Удалить")
-                btn_delete.clicked.connect(lambda _, id=obj.id: self.delete_object(id))
-
-                btn_widget = QWidget()
-                btn_widget.setLayout(btn_layout)
-                btn_layout.addWidget(btn_edit)
-                btn_layout.addWidget(btn_delete)
-                btn_layout.setContentsMargins(4, 2, 4, 2)
-                self.objects_table.setCellWidget(i, 3, btn_widget)
+            name_filter = self.obj_filter_input.text().strip()
 
-            session.close()
+            def query(session):
+                q = session.query(Object.id, Object.name, Object.location)
+                q = apply_text_search(q, session, Object.name, name_filter)
+                return q.order_by(Object.id)
+
+            self.objects_model.set_query(query)
         except Exception as e:
             app_logger.error(f"Ошибка загрузки объектов: {e}")
             report_error(e)
 
     def filter_objects(self):
-        text = self.obj_filter_input.text().lower()
-        for row in range(self.objects_table.rowCount()):
-            item = self.objects_table.item(row, 1)  # Название
-            visible = text in item.text().lower() if item else False
-            self.objects_table.setRowHidden(row, not visible)
+        # Фильтр применяется в запросе, а не скрытием загруженных строк;
+        # запрос выполняется, когда пользователь перестал печатать
+        self.obj_filter_debounce.trigger()
 
     def add_object(self):
         try:
@@ -282,9 +319,8 @@ class MainWindow(QMainWindow):
     # ✅ Функция расчёта материалов
     def calculate_materials_for_current_object(self):
         try:
-            selected = self.objects_table.currentRow()
-            if selected >= 0:
-                obj_id = int(self.objects_table.item(selected, 0).text())
+            obj_id = self.objects_model.row_key(self.objects_table.currentIndex().row())
+            if obj_id is not None:
                 line_data = [
                     {'type_id': 1, 'length': 100.0, 'width': 0.15},
                     {'type_id': 2, 'length': 50.0, 'width': 0.2}
@@ -303,15 +339,27 @@ class MainWindow(QMainWindow):
         filter_layout = QHBoxLayout()
         self.mat_filter_input = QLineEdit()
         self.mat_filter_input.setPlaceholderText("Фильтр по названию...")
+        self.mat_filter_debounce = Debouncer(self.refresh_materials_table, parent=self)
         self.mat_filter_input.textChanged.connect(self.filter_materials)
+        self.mat_filter_input.returnPressed.connect(self.mat_filter_debounce.flush)
         filter_layout.addWidget(QLabel("Фильтр:"))
         filter_layout.addWidget(self.mat_filter_input)
 
         layout.addLayout(filter_layout)
 
         # Таблица
-        self.materials_table = QTableWidget(0, 6)  # +1 столбец "Остаток"
-        self.materials_table.setHorizontalHeaderLabels(["ID", "Название", "Ед. изм.", "Норма", "Остаток", "Действия"])
+        self.materials_model = LazyQueryTableModel(SessionLocal, [
+            TableColumn("ID", 'id'),
+            TableColumn("Название", 'name'),
+            TableColumn("Ед. изм.", 'unit'),
+            TableColumn("Норма", 'norm'),
+            TableColumn("Остаток", lambda mat: getattr(mat, 'current_stock', 0)),
+            TableColumn("Действия"),
+        ], runner=self.background)
+        self.materials_table = self.create_lazy_table(self.materials_model, {
+            'edit': self.edit_material,
+            'delete': self.delete_material,
+        })
         header = self.materials_table.horizontalHeader()
         header.setSectionResizeMode(1, QHeaderView.Stretch)
         self.load_materials_to_table()
@@ -332,43 +380,30 @@ class MainWindow(QMainWindow):
         return page
 
     def load_materials_to_table(self):
+        # Первая загрузка и изменения материалов: обновляем таблицу и
+        # проверяем нехватку
+        self.refresh_materials_table()
+        self.check_low_materials()
+
+    def refresh_materials_table(self):
+        # Только перезапрос таблицы с текущим фильтром (вызывается и при вводе фильтра)
         try:
-            session = SessionLocal()
-            materials = session.query(Material).all()
-            self.materials_table.setRowCount(len(materials))
-            for i, mat in enumerate(materials):
-                self.materials_table.setItem(i, 0, QTableWidgetItem(str(mat.id)))
-                self.materials_table.setItem(i, 1, QTableWidgetItem(mat.name))
-                self.materials_table.setItem(i, 2, QTableWidgetItem(mat.unit))
-                self.materials_table.setItem(i, 3, QTableWidgetItem(str(mat.norm)))
-                self.materials_table.setItem(i, 4, QTableWidgetItem(str(getattr(mat, 'current_stock', 0))))
-
-                # Кнопки "Редактировать", "Удалить"
-                btn_layout = QHBoxLayout()
-                btn_edit = QPushButton("Редактировать")
-                btn_edit.clicked.connect(lambda _, id=mat.id: self.edit_material(id))
-                btn_delete = QPushButton("Удалить")
-                btn_delete.clicked.connect(lambda _, id=mat.id: self.delete_material(id))
-
-                btn_widget = QWidget()
-                btn_widget.setLayout(btn_layout)
-                btn_layout.addWidget(btn_edit)
-                btn_layout.addWidget(btn_delete)
-                btn_layout.setContentsMargins(4, 2, 4, 2)
-                self.materials_table.setCellWidget(i, 5, btn_widget)
+            name_filter = self.mat_filter_input.text().strip()
 
-            session.close()
-            self.check_low_materials()
+            def query(session):
+                q = session.query(Material)
+                q = apply_text_search(q, session, Material.name, name_filter)
+                return q.order_by(Material.id)
+
+            self.materials_model.set_query(query)
         except Exception as e:
             app_logger.error(f"Ошибка загрузки материалов: {e}")
             report_error(e)
 
     def filter_materials(self):
-        text = self.mat_filter_input.text().lower()
-        for row in range(self.materials_table.rowCount()):
-            item = self.materials_table.item(row, 1)  # Название
-            visible = text in item.text().lower() if item else False
-            self.materials_table.setRowHidden(row, not visible)
+        # Фильтр применяется в запросе, а не скрытием загруженных строк;
+        # запрос выполняется, когда пользователь перестал печатать
+        self.mat_filter_debounce.trigger()
 
     def add_material(self):
         try:
@@ -476,23 +511,39 @@ class MainWindow(QMainWindow):
 
     # ✅ Проверка нехватки материалов
     def check_low_materials(self):
+        # Запрос выполняется в фоне, окна с предупреждениями показываются
+        # в потоке интерфейса (создавать виджеты в других потоках нельзя)
+        self.background.submit(
+            'low_materials', self.find_low_materials,
+            on_result=self.notify_low_materials,
+            on_error=self.background_error_handler("Ошибка проверки нехватки материалов"),
+        )
+
+    @staticmethod
+    def find_low_materials():
+        """Материалы с остатком ниже 10% нормы: список (название, недостача) (выполняется в фоне)"""
+        session = SessionLocal()
         try:
-            session = SessionLocal()
-            materials = session.query(Material).all()
-            for mat in materials:
+            low = []
+            for mat in session.query(Material).all():
                 current_stock = getattr(mat, 'current_stock', 0)
                 if current_stock < mat.norm * 0.1:
-                    notify_manager_low_material(mat.name, mat.norm - current_stock)
+                    low.append((mat.name, mat.norm - current_stock))
+            return low
+        finally:
             session.close()
-        except Exception as e:
-            app_logger.error(f"Ошибка проверки нехватки материалов: {e}")
-            report_error(e)
+
+    @staticmethod
+    def notify_low_materials(low_materials):
+        """Уведомляет менеджера о нехватке материалов (в потоке интерфейса)"""
+        for name, shortage in low_materials:
+            notify_manager_low_material(name, shortage)
 
     # ✅ Отправка уведомления
     def send_notification(self):
         try:
             send_telegram_message("Уведомление: проверьте остатки материалов.")
-            QMessageBox.information(self, "Уведомление", "Сообщение отправлено в Telegram.")
+            QMessageBox.information(self, "Уведомление", "Сообщение поставлено в очередь отправки в Telegram.")
         except Exception as e:
             app_logger.error(f"Ошибка отправки уведомления: {e}")
             report_error(e)
@@ -528,28 +579,30 @@ class MainWindow(QMainWindow):
         return page
 
     def load_fuel_balance(self):
-        try:
-            card_id = self.fuel_card_input.text()
-            if card_id:
-                balance = get_fuel_balance(card_id)
-                self.fuel_balance_label.setText(f"Баланс: {balance} руб.")
-        except Exception as e:
-            app_logger.error(f"Ошибка загрузки баланса: {e}")
-            report_error(e)
+        card_id = self.fuel_card_input.text()
+        if card_id:
+            # Новый запрос отменяет незавершенный запрос по предыдущей карте
+            self.background.submit(
+                'fuel_balance', get_fuel_balance, card_id,
+                on_result=lambda balance: self.fuel_balance_label.setText(f"Баланс: {balance} руб."),
+                on_error=self.background_error_handler("Ошибка загрузки баланса"),
+            )
 
     def load_fuel_transactions(self):
-        try:
-            card_id = self.fuel_card_input.text()
-            if card_id:
-                transactions = get_fuel_transactions(card_id)
-                self.fuel_transactions_table.setRowCount(len(transactions))
-                for i, t in enumerate(transactions):
-                    self.fuel_transactions_table.setItem(i, 0, QTableWidgetItem(t.get('date', '')))
-                    self.fuel_transactions_table.setItem(i, 1, QTableWidgetItem(str(t.get('amount', 0))))
-                    self.fuel_transactions_table.setItem(i, 2, QTableWidgetItem(t.get('location', '')))
-        except Exception as e:
-            app_logger.error(f"Ошибка загрузки транзакций: {e}")
-            report_error(e)
+        card_id = self.fuel_card_input.text()
+        if card_id:
+            self.background.submit(
+                'fuel_transactions', get_fuel_transactions, card_id,
+                on_result=self.show_fuel_transactions,
+                on_error=self.background_error_handler("Ошибка загрузки транзакций"),
+            )
+
+    def show_fuel_transactions(self, transactions):
+        self.fuel_transactions_table.setRowCount(len(transactions))
+        for i, t in enumerate(transactions):
+            self.fuel_transactions_table.setItem(i, 0, QTableWidgetItem(t.get('date', '')))
+            self.fuel_transactions_table.setItem(i, 1, QTableWidgetItem(str(t.get('amount', 0))))
+            self.fuel_transactions_table.setItem(i, 2, QTableWidgetItem(t.get('location', '')))
 
     # === СТРАНИЦА: Калькулятор ===
     def create_calculator_page(self):
@@ -633,15 +686,26 @@ class MainWindow(QMainWindow):
         filter_layout = QHBoxLayout()
         self.doc_filter_input = QLineEdit()
         self.doc_filter_input.setPlaceholderText("Фильтр по типу...")
+        self.doc_filter_debounce = Debouncer(self.load_documents_to_table, parent=self)
         self.doc_filter_input.textChanged.connect(self.filter_documents)
+        self.doc_filter_input.returnPressed.connect(self.doc_filter_debounce.flush)
         filter_layout.addWidget(QLabel("Фильтр:"))
         filter_layout.addWidget(self.doc_filter_input)
 
         layout.addLayout(filter_layout)
 
         # Таблица
-        self.documents_table = QTableWidget(0, 5)
-        self.documents_table.setHorizontalHeaderLabels(["ID", "Объект", "Тип", "Дата", "Действия"])
+        self.documents_model = LazyQueryTableModel(SessionLocal, [
+            TableColumn("ID", 'id'),
+            TableColumn("Объект", 'object_id'),
+            TableColumn("Тип", 'type'),
+            TableColumn("Дата", 'created_at'),
+            TableColumn("Действия"),
+        ], runner=self.background)
+        self.documents_table = self.create_lazy_table(self.documents_model, {
+            'edit': self.edit_document,
+            'delete': self.delete_document,
+        })
         header = self.documents_table.horizontalHeader()
         header.setSectionResizeMode(1, QHeaderView.Stretch)
         self.load_documents_to_table()
@@ -658,40 +722,22 @@ class MainWindow(QMainWindow):
 
     def load_documents_to_table(self):
         try:
-            session = SessionLocal()
-            documents = session.query(Document).all()
-            self.documents_table.setRowCount(len(documents))
-            for i, doc in enumerate(documents):
-                self.documents_table.setItem(i, 0, QTableWidgetItem(str(doc.id)))
-                self.documents_table.setItem(i, 1, QTableWidgetItem(str(doc.object_id)))
-                self.documents_table.setItem(i, 2, QTableWidgetItem(doc.type))
-                self.documents_table.setItem(i, 3, QTableWidgetItem(str(doc.created_at)))
-
-                # Кнопки "Редактировать", "Удалить"
-                btn_layout = QHBoxLayout()
-                btn_edit = QPushButton("Редактировать")
-                btn_edit.clicked.connect(lambda _, id=doc.id: self.edit_document(id))
-                btn_delete = QPushButton("Удалить")
-                btn_delete.clicked.connect(lambda _, id=doc.id: self.delete_document(id))
-
-                btn_widget = QWidget()
-                btn_widget.setLayout(btn_layout)
-                btn_layout.addWidget(btn_edit)
-                btn_layout.addWidget(btn_delete)
-                btn_layout.setContentsMargins(4, 2, 4, 2)
-                self.documents_table.setCellWidget(i, 4, btn_widget)
+            type_filter = self.doc_filter_input.text().strip()
 
-            session.close()
+            def query(session):
+                q = session.query(Document.id, Document.object_id, Document.type, Document.created_at)
+                q = apply_text_search(q, session, Document.type, type_filter)
+                return q.order_by(Document.id)
+
+            self.documents_model.set_query(query)
         except Exception as e:
             app_logger.error(f"Ошибка загрузки документов: {e}")
             report_error(e)
 
     def filter_documents(self):
-        text = self.doc_filter_input.text().lower()
-        for row in range(self.documents_table.rowCount()):
-            item = self.documents_table.item(row, 2)  # Тип
-            visible = text in item.text().lower() if item else False
-            self.documents_table.setRowHidden(row, not visible)
+        # Фильтр применяется в запросе, а не скрытием загруженных строк;
+        # запрос выполняется, когда пользователь перестал печатать
+        self.doc_filter_debounce.trigger()
 
     def upload_document(self):
         try:
@@ -744,18 +790,20 @@ class MainWindow(QMainWindow):
         return page
 
     def load_gpr_data(self):
-        try:
-            data = get_gpr_data()
-            self.gpr_table.setRowCount(len(data))
-            for i, item in enumerate(data):
-                self.gpr_table.setItem(i, 0, QTableWidgetItem(item['object']))
-                self.gpr_table.setItem(i, 1, QTableWidgetItem(str(item['plan'])))
-                self.gpr_table.setItem(i, 2, QTableWidgetItem(str(item['fact'])))
-                completion = round((item['fact'] / item['plan']) * 100, 2) if item['plan'] != 0 else 0
-                self.gpr_table.setItem(i, 3, QTableWidgetItem(f"{completion}%"))
-        except Exception as e:
-            app_logger.error(f"Ошибка загрузки ГПР: {e}")
-            report_error(e)
+        self.background.submit(
+            'gpr', get_gpr_data,
+            on_result=self.show_gpr_data,
+            on_error=self.background_error_handler("Ошибка загрузки ГПР"),
+        )
+
+    def show_gpr_data(self, data):
+        self.gpr_table.setRowCount(len(data))
+        for i, item in enumerate(data):
+            self.gpr_table.setItem(i, 0, QTableWidgetItem(item['object']))
+            self.gpr_table.setItem(i, 1, QTableWidgetItem(str(item['plan'])))
+            self.gpr_table.setItem(i, 2, QTableWidgetItem(str(item['fact'])))
+            completion = round((item['fact'] / item['plan']) * 100, 2) if item['plan'] != 0 else 0
+            self.gpr_table.setItem(i, 3, QTableWidgetItem(f"{completion}%"))
 
     # === СТРАНИЦА: Графики ===
     def create_charts_page(self):
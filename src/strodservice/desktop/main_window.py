@@ -12,7 +12,7 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QPixmap
 import os
-from strodservice.utils.image_handler import ImageHandler
+from strodservice.utils.image_handler import ImageHandler, ThumbnailLoader
 from strodservice.desktop.objects_window import ObjectsWindow
 from strodservice.desktop.materials_window import MaterialsWindow
 from strodservice.desktop.reports_window import ReportsWindow
@@ -30,6 +30,13 @@ class MainWindow(QMainWindow):
         # Инициализация обработчика изображений
         self.image_handler = ImageHandler()
         
+        # Миниатюры фото создаются в фоне и приходят сигналом
+        self.photo_size = (600, 400)
+        self.photo_path = None
+        self.thumbnail_loader = ThumbnailLoader(parent=self)
+        self.thumbnail_loader.thumbnail_ready.connect(self.show_photo)
+        self.thumbnail_loader.thumbnail_failed.connect(self.show_photo_error)
+        
         # Центральный виджет
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -147,27 +154,45 @@ class MainWindow(QMainWindow):
         
         if file_path:
             try:
-                # Используем наш обработчик изображений
-                pixmap = self.image_handler.load_image(file_path, max_size=(600, 400))
-                
+                # Миниатюра из кэша показывается сразу, иначе создается в
+                # фоне и приходит в show_photo, не блокируя интерфейс
+                self.photo_path = file_path
+                pixmap = self.thumbnail_loader.request(file_path, self.photo_size)
                 if pixmap is None:
-                    QMessageBox.warning(self, "Ошибка", "Невозможно загрузить изображение")
-                    return
-                
-                # Отображаем изображение
-                self.photo_label.setPixmap(pixmap)
-                
-                # Обновляем стиль для рамки фото
-                self.photo_label.setStyleSheet("border: 1px solid gray;")
-                
-                print(f"Фото загружено: {file_path}")
+                    self.photo_label.setText("Загрузка фото...")
+                else:
+                    self.show_photo(file_path, pixmap)
             except Exception as e:
                 QMessageBox.warning(self, "Ошибка", f"Ошибка при загрузке фото: {str(e)}")
     
+    def show_photo(self, file_path, pixmap):
+        """
+        Отображение готовой миниатюры выбранного фото.
+        """
+        if file_path != self.photo_path:
+            # Пока миниатюра создавалась, выбрано другое фото
+            return
+        
+        # Отображаем изображение
+        self.photo_label.setPixmap(pixmap)
+        
+        # Обновляем стиль для рамки фото
+        self.photo_label.setStyleSheet("border: 1px solid gray;")
+
+    def show_photo_error(self, file_path):
+        """
+        Сообщение о фото, которое не удалось открыть.
+        """
+        if file_path != self.photo_path:
+            return
+        self.clear_photo()
+        QMessageBox.warning(self, "Ошибка", "Невозможно загрузить изображение")
+    
     def clear_photo(self):
         """
         Очистка отображаемого фото.
         """
+        self.photo_path = None
         self.photo_label.clear()
         self.photo_label.setText("Фото не загружено")
         self.photo_label.setStyleSheet("border: 1px solid gray; padding: 20px;")
@@ -10,7 +10,7 @@ from PyQt5.QtWidgets import (
     QHeaderView, QDoubleSpinBox
 )
 from PyQt5.QtCore import Qt
-from strodservice.database.init_db import SessionLocal, engine
+from strodservice.database.init_db import SessionLocal
 from strodservice.models.models import Material
 
 
@@ -23,10 +23,7 @@ class MaterialsWindow(QWidget):
         self.setWindowTitle("Управление материалами")
         self.setGeometry(200, 200, 900, 600)
         
-        # Создаем сессию базы данных
-        from strodservice.database.init_db import engine
-        from sqlalchemy.orm import sessionmaker
-        SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+        # Сессия общего движка базы данных (database/session.py)
         self.session = SessionLocal()
         
         self.init_ui()
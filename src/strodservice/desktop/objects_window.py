@@ -5,13 +5,14 @@
 """
 
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
+    QWidget, QVBoxLayout, QHBoxLayout, QTableView,
     QPushButton, QLineEdit, QLabel, QGroupBox, QFormLayout, QMessageBox,
     QHeaderView
 )
 from PyQt5.QtCore import Qt
-from strodservice.database.init_db import SessionLocal, engine
+from strodservice.database.init_db import SessionLocal
 from strodservice.models.models import Object
+from strodservice.desktop.components import BackgroundRunner, LazyQueryTableModel, TableColumn
 
 
 class ObjectsWindow(QWidget):
@@ -23,11 +24,12 @@ class ObjectsWindow(QWidget):
         self.setWindowTitle("Управление объектами")
         self.setGeometry(200, 200, 900, 600)
         
-        # Создаем сессию базы данных
-        from strodservice.database.init_db import engine
-        from sqlalchemy.orm import sessionmaker
-        SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
-        self.session = SessionLocal()
+        # Сессии общего движка базы данных (database/session.py)
+        self.session_factory = SessionLocal
+        self.session = self.session_factory()
+        
+        # Страницы таблицы загружаются вне потока интерфейса
+        self.background = BackgroundRunner(self)
         
         self.init_ui()
         self.load_objects()
@@ -55,9 +57,18 @@ class ObjectsWindow(QWidget):
         add_group.setLayout(add_layout)
         
         # Таблица для отображения объектов
-        self.table = QTableWidget()
-        self.table.setColumnCount(3)
-        self.table.setHorizontalHeaderLabels(["ID", "Название", "Местоположение"])
+        # Строки загружаются страницами по мере прокрутки
+        self.model = LazyQueryTableModel(self.session_factory, [
+            TableColumn("ID", 'id'),
+            TableColumn("Название", 'name', editable=True),
+            TableColumn("Местоположение", 'location', editable=True),
+        ], runner=self.background)
+        self.model.load_failed.connect(
+            lambda message: QMessageBox.critical(self, "Ошибка", f"Ошибка при загрузке объектов: {message}")
+        )
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
         
         # Настройка ширины столбцов
         header = self.table.horizontalHeader()
@@ -94,22 +105,9 @@ class ObjectsWindow(QWidget):
         Загрузка и отображение объектов из базы данных.
         """
         try:
-            # Очищаем таблицу
-            self.table.setRowCount(0)
-            
-            # Получаем объекты из базы данных
-            objects = self.session.query(Object).all()
-            
-            for row, obj in enumerate(objects):
-                self.table.insertRow(row)
-                
-                # Заполняем ячейки
-                self.table.setItem(row, 0, QTableWidgetItem(str(obj.id)))
-                self.table.setItem(row, 1, QTableWidgetItem(obj.name))
-                self.table.setItem(row, 2, QTableWidgetItem(obj.location))
-                
-                # Делаем ID не редактируемым
-                self.table.item(row, 0).setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
+            self.model.set_query(
+                lambda session: session.query(Object.id, Object.name, Object.location).order_by(Object.id)
+            )
         
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Ошибка при загрузке объектов: {str(e)}")
@@ -148,20 +146,20 @@ class ObjectsWindow(QWidget):
         """
         Редактирование выбранного объекта.
         """
-        current_row = self.table.currentRow()
+        current_row = self.table.currentIndex().row()
         if current_row < 0:
             QMessageBox.warning(self, "Предупреждение", "Выберите объект для редактирования")
             return
         
         try:
             # Получаем ID выбранного объекта
-            obj_id = int(self.table.item(current_row, 0).text())
+            obj_id = self.model.row_key(current_row)
             obj = self.session.query(Object).filter(Object.id == obj_id).first()
             
             if obj:
-                # Обновляем данные объекта
-                obj.name = self.table.item(current_row, 1).text()
-                obj.location = self.table.item(current_row, 2).text()
+                # Обновляем данные объекта значениями, измененными в таблице
+                obj.name = self.model.value(current_row, 1)
+                obj.location = self.model.value(current_row, 2)
                 
                 self.session.commit()
                 QMessageBox.information(self, "Успех", "Объект успешно обновлен")
@@ -176,7 +174,7 @@ class ObjectsWindow(QWidget):
         """
         Удаление выбранного объекта.
         """
-        current_row = self.table.currentRow()
+        current_row = self.table.currentIndex().row()
         if current_row < 0:
             QMessageBox.warning(self, "Предупреждение", "Выберите объект для удаления")
             return
@@ -190,7 +188,7 @@ class ObjectsWindow(QWidget):
         if reply == QMessageBox.Yes:
             try:
                 # Получаем ID выбранного объекта
-                obj_id = int(self.table.item(current_row, 0).text())
+                obj_id = self.model.row_key(current_row)
                 obj = self.session.query(Object).filter(Object.id == obj_id).first()
                 
                 if obj:
@@ -209,5 +207,6 @@ class ObjectsWindow(QWidget):
         """
         Обработчик события закрытия окна.
         """
+        self.background.cancel_all()
         self.session.close()
         event.accept()
\ No newline at end of file
@@ -8,12 +8,66 @@ from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QTextEdit, QPushButton, 
     QLabel, QGroupBox, QFormLayout, QMessageBox, QTabWidget,
     QTableWidget, QTableWidgetItem, QHeaderView, QDateEdit,
-    QComboBox
+    QComboBox, QTableView, QFileDialog, QProgressDialog
 )
 from PyQt5.QtCore import Qt, QDate
-from strodservice.database.init_db import SessionLocal, engine
+from strodservice.database.init_db import SessionLocal
 from strodservice.models.models import Object, Material, FieldData
+from strodservice.services.report_queries import (
+    field_data_query, field_data_rows, summarize_field_data, aggregate_field_data,
+    GROUPINGS, UNKNOWN_OBJECT, UNKNOWN_LINE_TYPE
+)
+from strodservice.services.report_export import (
+    export_query, export_rows, FIELD_DATA_COLUMNS
+)
+from strodservice.desktop.components import BackgroundRunner, LazyQueryTableModel, TableColumn
 from datetime import datetime
+from operator import attrgetter
+
+# Сколько строк отчета выводится в текст на экране; полный отчет - через экспорт
+PREVIEW_ROWS = 100
+
+OBJECT_EXPORT_COLUMNS = [
+    ("ID", attrgetter('id')),
+    ("Название", attrgetter('name')),
+    ("Местоположение", attrgetter('location')),
+]
+
+MATERIAL_EXPORT_COLUMNS = [
+    ("ID", attrgetter('id')),
+    ("Название", attrgetter('name')),
+    ("Единица измерения", attrgetter('unit')),
+    ("Норма расхода", attrgetter('norm')),
+]
+
+SUMMARY_EXPORT_COLUMNS = [
+    ("Записей", attrgetter('records')),
+    ("Общая длина", attrgetter('total_length')),
+    ("Общая площадь", attrgetter('total_area')),
+    ("Использовано", attrgetter('total_material_used')),
+    ("Среднее на запись", attrgetter('avg_material_used')),
+]
+
+
+def _format_number(value):
+    """Форматирует число для отчета, пустое значение выводится как прочерк"""
+    return f"{value:.2f}" if value is not None else "-"
+
+
+def _format_norm(value):
+    """Норма расхода с 3 знаками после запятой"""
+    return f"{value:.3f}" if value is not None else "-"
+
+
+def _preview_note(shown, total):
+    """Строка отчета о том, сколько записей выведено на экран"""
+    if shown < total:
+        return f"Показаны первые {shown} из {total}; полный отчет - кнопка \"Экспортировать отчет\""
+    return f"Показаны все записи: {total}"
+
+
+def _join_lines(lines):
+    return "\n".join(lines) + "\n"
 
 
 class ReportsWindow(QWidget):
@@ -25,11 +79,12 @@ class ReportsWindow(QWidget):
         self.setWindowTitle("Формирование отчетов")
         self.setGeometry(200, 200, 1000, 700)
         
-        # Создаем сессию базы данных
-        from strodservice.database.init_db import engine
-        from sqlalchemy.orm import sessionmaker
-        SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
-        self.session = SessionLocal()
+        # Сессии общего движка базы данных (database/session.py)
+        self.session_factory = SessionLocal
+        self.session = self.session_factory()
+        
+        # Запросы отчетов выполняются вне потока интерфейса
+        self.background = BackgroundRunner(self)
         
         self.init_ui()
     
@@ -202,13 +257,21 @@ class ReportsWindow(QWidget):
         
         filter_group.setLayout(filter_layout)
         
-        # Таблица результатов
-        self.field_table = QTableWidget()
-        self.field_table.setColumnCount(7)
-        self.field_table.setHorizontalHeaderLabels([
-            "ID", "Объект", "Тип линии", "Длина", "Ширина", 
-            "Использовано", "Дата"
-        ])
+        # Таблица результатов: строки загружаются страницами по мере прокрутки
+        self.field_model = LazyQueryTableModel(self.session_factory, [
+            TableColumn("ID", 'id'),
+            TableColumn("Объект", lambda data: data.object_name or UNKNOWN_OBJECT),
+            TableColumn("Тип линии", lambda data: data.line_type_name or UNKNOWN_LINE_TYPE),
+            TableColumn("Длина", 'length', format=_format_number),
+            TableColumn("Ширина", 'width', format=_format_number),
+            TableColumn("Использовано", 'material_used', format=_format_number),
+            TableColumn("Дата", 'date', format=lambda value: value.strftime("%Y-%m-%d")),
+        ], runner=self.background)
+        self.field_model.load_failed.connect(
+            lambda message: QMessageBox.critical(self, "Ошибка", f"Ошибка при загрузке полевых данных: {message}")
+        )
+        self.field_table = QTableView()
+        self.field_table.setModel(self.field_model)
         
         # Настройка ширины столбцов
         header = self.field_table.horizontalHeader()
@@ -258,9 +321,14 @@ class ReportsWindow(QWidget):
         self.summary_end_date.setDate(QDate.currentDate())
         self.summary_end_date.setCalendarPopup(True)
         
+        self.summary_group_combo = QComboBox()
+        for group_by, title in GROUPINGS.items():
+            self.summary_group_combo.addItem(title, group_by)
+        
         filter_layout.addRow("Объект:", self.summary_objects_combo)
         filter_layout.addRow("Дата начала:", self.summary_start_date)
         filter_layout.addRow("Дата окончания:", self.summary_end_date)
+        filter_layout.addRow("Группировка:", self.summary_group_combo)
         
         filter_group.setLayout(filter_layout)
         
@@ -289,22 +357,25 @@ class ReportsWindow(QWidget):
         elif current_tab_index == 3:  # Сводный отчет
             self.generate_summary_report()
     
+    def objects_report_query(self, session, selected_obj_id):
+        """Запрос отчета по объектам; selected_obj_id - None или выбранный ID"""
+        query = session.query(Object.id, Object.name, Object.location)
+        if selected_obj_id is not None:
+            query = query.filter(Object.id == selected_obj_id)
+        return query.order_by(Object.id)
+    
     def generate_objects_report(self):
         """
-        Генерация отчета по объектам.
+        Генерация отчета по объектам. На экран выводятся первые
+        PREVIEW_ROWS объектов.
         """
         try:
             # Очищаем таблицу
             self.objects_table.setRowCount(0)
             
-            # Получаем ID выбранного объекта
-            selected_obj_id = self.objects_combo.currentData()
-            
-            # Формируем запрос
-            if selected_obj_id is None:
-                objects = self.session.query(Object).all()
-            else:
-                objects = self.session.query(Object).filter(Object.id == selected_obj_id).all()
+            query = self.objects_report_query(self.session, self.objects_combo.currentData())
+            total = query.order_by(None).count()
+            objects = query.limit(PREVIEW_ROWS).all()
             
             # Заполняем таблицу
             for row, obj in enumerate(objects):
@@ -317,33 +388,34 @@ class ReportsWindow(QWidget):
                 self.objects_table.item(row, 0).setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
             
             # Формируем текст отчета
-            report_text = f"Отчет по объектам: Найдено {len(objects)} объектов\n"
-            report_text += "=" * 50 + "\n"
-            
+            lines = [f"Отчет по объектам: Найдено {total} объектов", _preview_note(len(objects), total), "=" * 50]
             for obj in objects:
-                report_text += f"ID: {obj.id}, Название: {obj.name}, Местоположение: {obj.location}\n"
+                lines.append(f"ID: {obj.id}, Название: {obj.name}, Местоположение: {obj.location}")
             
-            self.objects_report_text.setPlainText(report_text)
+            self.objects_report_text.setPlainText(_join_lines(lines))
             
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Ошибка при генерации отчета по объектам: {str(e)}")
     
+    def materials_report_query(self, session, selected_mat_id):
+        """Запрос отчета по материалам; selected_mat_id - None или выбранный ID"""
+        query = session.query(Material.id, Material.name, Material.unit, Material.norm)
+        if selected_mat_id is not None:
+            query = query.filter(Material.id == selected_mat_id)
+        return query.order_by(Material.id)
+    
     def generate_materials_report(self):
         """
-        Генерация отчета по материалам.
+        Генерация отчета по материалам. На экран выводятся первые
+        PREVIEW_ROWS материалов.
         """
         try:
             # Очищаем таблицу
             self.materials_table.setRowCount(0)
             
-            # Получаем ID выбранного материала
-            selected_mat_id = self.materials_combo.currentData()
-            
-            # Формируем запрос
-            if selected_mat_id is None:
-                materials = self.session.query(Material).all()
-            else:
-                materials = self.session.query(Material).filter(Material.id == selected_mat_id).all()
+            query = self.materials_report_query(self.session, self.materials_combo.currentData())
+            total = query.order_by(None).count()
+            materials = query.limit(PREVIEW_ROWS).all()
             
             # Заполняем таблицу
             for row, mat in enumerate(materials):
@@ -353,7 +425,7 @@ class ReportsWindow(QWidget):
                 self.materials_table.setItem(row, 2, QTableWidgetItem(mat.unit))
                 
                 # Форматируем норму расхода с 3 знаками после запятой
-                norm_item = QTableWidgetItem(f"{mat.norm:.3f}")
+                norm_item = QTableWidgetItem(_format_norm(mat.norm))
                 norm_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
                 self.materials_table.setItem(row, 3, norm_item)
                 
@@ -361,13 +433,11 @@ class ReportsWindow(QWidget):
                 self.materials_table.item(row, 0).setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
             
             # Формируем текст отчета
-            report_text = f"Отчет по материалам: Найдено {len(materials)} материалов\n"
-            report_text += "=" * 50 + "\n"
-            
+            lines = [f"Отчет по материалам: Найдено {total} материалов", _preview_note(len(materials), total), "=" * 50]
             for mat in materials:
-                report_text += f"ID: {mat.id}, Название: {mat.name}, Ед.изм: {mat.unit}, Норма: {mat.norm:.3f}\n"
+                lines.append(f"ID: {mat.id}, Название: {mat.name}, Ед.изм: {mat.unit}, Норма: {_format_norm(mat.norm)}")
             
-            self.materials_report_text.setPlainText(report_text)
+            self.materials_report_text.setPlainText(_join_lines(lines))
             
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Ошибка при генерации отчета по материалам: {str(e)}")
@@ -377,66 +447,59 @@ class ReportsWindow(QWidget):
         Генерация отчета по полевым данным.
         """
         try:
-            # Очищаем таблицу
-            self.field_table.setRowCount(0)
-            
             # Получаем параметры фильтрации
             selected_obj_id = self.field_objects_combo.currentData()
             start_date = self.start_date.date().toPyDate()
             end_date = self.end_date.date().toPyDate()
             
-            # Формируем запрос
-            query = self.session.query(FieldData).filter(
-                FieldData.date >= start_date,
-                FieldData.date <= end_date
+            # Таблица загрузит первую страницу сама, когда станет видна
+            self.field_model.set_query(
+                lambda session: field_data_query(session, start_date, end_date, selected_obj_id)
             )
             
-            if selected_obj_id is not None:
-                query = query.filter(FieldData.object_id == selected_obj_id)
-            
-            field_data = query.all()
-            
-            # Заполняем таблицу
-            for row, data in enumerate(field_data):
-                self.field_table.insertRow(row)
-                
-                # Получаем название объекта
-                obj = self.session.query(Object).filter(Object.id == data.object_id).first()
-                obj_name = obj.name if obj else "Неизвестный объект"
-                
-                # Получаем тип линии
-                # Для упрощения, в реальном приложении нужно получить название типа линии
-                line_type_name = f"Тип {data.line_type_id}" if data.line_type_id else "Неизвестный тип"
-                
-                self.field_table.setItem(row, 0, QTableWidgetItem(str(data.id)))
-                self.field_table.setItem(row, 1, QTableWidgetItem(obj_name))
-                self.field_table.setItem(row, 2, QTableWidgetItem(line_type_name))
-                self.field_table.setItem(row, 3, QTableWidgetItem(f"{data.length:.2f}"))
-                self.field_table.setItem(row, 4, QTableWidgetItem(f"{data.width:.2f}"))
-                self.field_table.setItem(row, 5, QTableWidgetItem(f"{data.material_used:.2f}"))
-                self.field_table.setItem(row, 6, QTableWidgetItem(data.date.strftime("%Y-%m-%d")))
-                
-                # Делаем ID не редактируемым
-                self.field_table.item(row, 0).setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
-            
-            # Формируем текст отчета
-            report_text = f"Отчет по полевым данным: Найдено {len(field_data)} записей\n"
-            report_text += f"Период: {start_date} - {end_date}\n"
-            report_text += "=" * 50 + "\n"
-            
-            for data in field_data:
-                obj = self.session.query(Object).filter(Object.id == data.object_id).first()
-                obj_name = obj.name if obj else "Неизвестный объект"
-                
-                report_text += f"ID: {data.id}, Объект: {obj_name}, Длина: {data.length:.2f}, "
-                report_text += f"Ширина: {data.width:.2f}, Использовано: {data.material_used:.2f}, "
-                report_text += f"Дата: {data.date.strftime('%Y-%m-%d')}\n"
-            
-            self.field_report_text.setPlainText(report_text)
+            # Текст отчета формируется в фоне; повторный запуск с другими
+            # фильтрами отменяет предыдущий
+            self.background.submit(
+                'field_report', self.build_field_report, start_date, end_date, selected_obj_id,
+                on_result=self.field_report_text.setPlainText,
+                on_error=lambda e: QMessageBox.critical(
+                    self, "Ошибка", f"Ошибка при генерации отчета по полевым данным: {str(e)}"
+                ),
+            )
             
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Ошибка при генерации отчета по полевым данным: {str(e)}")
     
+    def build_field_report(self, start_date, end_date, object_id):
+        """
+        Текст отчета по полевым данным с первыми PREVIEW_ROWS записями.
+        Выполняется в фоновом потоке, поэтому использует собственную
+        сессию и не обращается к виджетам.
+        """
+        session = self.session_factory()
+        try:
+            total = summarize_field_data(session, start_date, end_date, object_id).records
+            # Названия объектов и типов линий приходят в том же запросе
+            field_data = field_data_query(session, start_date, end_date, object_id).limit(PREVIEW_ROWS).all()
+        finally:
+            session.close()
+        
+        lines = [
+            f"Отчет по полевым данным: Найдено {total} записей",
+            f"Период: {start_date} - {end_date}",
+            _preview_note(len(field_data), total),
+            "=" * 50,
+        ]
+        for data in field_data:
+            lines.append(
+                f"ID: {data.id}, Объект: {data.object_name or UNKNOWN_OBJECT}, "
+                f"Длина: {_format_number(data.length)}, "
+                f"Ширина: {_format_number(data.width)}, "
+                f"Использовано: {_format_number(data.material_used)}, "
+                f"Дата: {data.date.strftime('%Y-%m-%d')}"
+            )
+        return _join_lines(lines)
+    
     def generate_summary_report(self):
         """
         Генерация сводного отчета.
@@ -447,85 +510,160 @@ class ReportsWindow(QWidget):
             start_date = self.summary_start_date.date().toPyDate()
             end_date = self.summary_end_date.date().toPyDate()
             
-            # Формируем запросы
-            query = self.session.query(FieldData).filter(
-                FieldData.date >= start_date,
-                FieldData.date <= end_date
-            )
-            
-            if selected_obj_id is not None:
-                query = query.filter(FieldData.object_id == selected_obj_id)
-            
-            field_data = query.all()
-            
-            # Вычисляем итоговые значения
-            total_length = sum(data.length for data in field_data)
-            total_material_used = sum(data.material_used for data in field_data)
-            total_records = len(field_data)
-            
-            # Формируем текст отчета
-            report_text = "Сводный отчет по проекту\n"
-            report_text += "=" * 50 + "\n"
-            report_text += f"Период: {start_date} - {end_date}\n"
-            report_text += f"Всего записей: {total_records}\n"
-            report_text += f"Общая длина: {total_length:.2f} м\n"
-            report_text += f"Всего использовано материалов: {total_material_used:.2f} ед\n"
-            
-            if field_data:
-                avg_material_per_record = total_material_used / total_records
-                report_text += f"Среднее использование материалов на запись: {avg_material_per_record:.2f} ед\n"
-            
-            report_text += "\nДетализация:\n"
-            report_text += "-" * 30 + "\n"
-            
-            for data in field_data:
-                obj = self.session.query(Object).filter(Object.id == data.object_id).first()
-                obj_name = obj.name if obj else "Неизвестный объект"
-                
-                report_text += f"• {data.date.strftime('%Y-%m-%d')}: {obj_name}, "
-                report_text += f"длина {data.length:.2f} м, использовано {data.material_used:.2f} ед\n"
+            group_by = self.summary_group_combo.currentData()
             
-            self.summary_report_text.setPlainText(report_text)
+            self.background.submit(
+                'summary_report', self.build_summary_report, start_date, end_date, group_by, selected_obj_id,
+                on_result=self.summary_report_text.setPlainText,
+                on_error=lambda e: QMessageBox.critical(
+                    self, "Ошибка", f"Ошибка при генерации сводного отчета: {str(e)}"
+                ),
+            )
             
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Ошибка при генерации сводного отчета: {str(e)}")
     
+    def build_summary_report(self, start_date, end_date, group_by, object_id):
+        """
+        Текст сводного отчета. Выполняется в фоновом потоке.
+        """
+        session = self.session_factory()
+        try:
+            # Итоги и группировка вычисляются базой данных
+            totals = summarize_field_data(session, start_date, end_date, object_id)
+            groups = aggregate_field_data(session, start_date, end_date, group_by, object_id)
+        finally:
+            session.close()
+        
+        lines = [
+            "Сводный отчет по проекту",
+            "=" * 50,
+            f"Период: {start_date} - {end_date}",
+            f"Всего записей: {totals.records}",
+            f"Общая длина: {totals.total_length:.2f} м",
+            f"Общая площадь: {totals.total_area:.2f} м²",
+            f"Всего использовано материалов: {totals.total_material_used:.2f} ед",
+        ]
+        
+        if totals.avg_material_used is not None:
+            lines.append(f"Среднее использование материалов на запись: {totals.avg_material_used:.2f} ед")
+        
+        lines.append("")
+        lines.append(f"Детализация ({GROUPINGS[group_by].lower()}):")
+        lines.append("-" * 30)
+        
+        for group in groups:
+            lines.append(
+                f"• {group.key}: записей {group.records}, "
+                f"длина {group.total_length:.2f} м, "
+                f"площадь {group.total_area:.2f} м², "
+                f"использовано {group.total_material_used:.2f} ед, "
+                f"в среднем {_format_number(group.avg_material_used)} ед"
+            )
+        
+        return _join_lines(lines)
+    
     def export_report(self):
         """
-        Экспорт отчета в файл.
+        Экспорт отчета текущей вкладки в CSV или XLSX.
+        
+        Строки выгружаются из базы в фоне пачками, а не из текста на
+        экране, поэтому в файл попадает полный отчет любого размера.
         """
         try:
-            # Получаем текст отчета с текущей вкладки
             current_tab_index = self.findChild(QTabWidget).currentIndex()
-            
-            if current_tab_index == 0:
-                report_text = self.objects_report_text.toPlainText()
-            elif current_tab_index == 1:
-                report_text = self.materials_report_text.toPlainText()
-            elif current_tab_index == 2:
-                report_text = self.field_report_text.toPlainText()
-            elif current_tab_index == 3:
-                report_text = self.summary_report_text.toPlainText()
-            else:
-                report_text = ""
-            
-            if not report_text:
+            export_task = self.export_task(current_tab_index)
+            if export_task is None:
                 QMessageBox.warning(self, "Предупреждение", "Нет данных для экспорта")
                 return
             
-            # Генерируем имя файла
-            from datetime import datetime
-            filename = f"report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-            
-            # Сохраняем в файл
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write(report_text)
-            
-            QMessageBox.information(self, "Успех", f"Отчет экспортирован в файл: {filename}")
+            default_name = f"report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+            filepath, selected_filter = QFileDialog.getSaveFileName(
+                self, "Экспорт отчета", default_name, "Excel (*.xlsx);;CSV (*.csv)"
+            )
+            if not filepath:
+                return
+            if not filepath.lower().endswith(('.xlsx', '.csv')):
+                filepath += '.csv' if selected_filter.startswith("CSV") else '.xlsx'
+            
+            progress_dialog = QProgressDialog("Экспорт отчета...", "Отмена", 0, 0, self)
+            progress_dialog.setWindowModality(Qt.WindowModal)
+            progress_dialog.setMinimumDuration(500)
+            progress_dialog.canceled.connect(lambda: self.background.cancel('export'))
+            
+            def on_progress(written, total):
+                if total:
+                    progress_dialog.setMaximum(total)
+                    progress_dialog.setValue(min(written, total))
+                progress_dialog.setLabelText(f"Экспорт отчета: записано строк {written}")
+            
+            def on_result(written):
+                progress_dialog.reset()
+                QMessageBox.information(
+                    self, "Успех", f"Отчет экспортирован в файл: {filepath}\nСтрок: {written}"
+                )
+            
+            def on_error(e):
+                progress_dialog.reset()
+                QMessageBox.critical(self, "Ошибка", f"Ошибка при экспорте отчета: {str(e)}")
+            
+            function, args = export_task
+            self.background.submit(
+                'export', function, filepath, *args,
+                on_result=on_result, on_error=on_error, on_progress=on_progress, pass_token=True,
+            )
         
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Ошибка при экспорте отчета: {str(e)}")
     
+    def export_task(self, tab_index):
+        """
+        Функция выгрузки отчета вкладки и ее аргументы после пути к файлу.
+        Параметры фильтров считываются здесь, в потоке интерфейса.
+        """
+        if tab_index == 0:
+            selected_obj_id = self.objects_combo.currentData()
+            return export_query, (
+                OBJECT_EXPORT_COLUMNS, self.session_factory,
+                lambda session: self.objects_report_query(session, selected_obj_id),
+            )
+        if tab_index == 1:
+            selected_mat_id = self.materials_combo.currentData()
+            return export_query, (
+                MATERIAL_EXPORT_COLUMNS, self.session_factory,
+                lambda session: self.materials_report_query(session, selected_mat_id),
+            )
+        if tab_index == 2:
+            selected_obj_id = self.field_objects_combo.currentData()
+            start_date = self.start_date.date().toPyDate()
+            end_date = self.end_date.date().toPyDate()
+            return export_query, (
+                FIELD_DATA_COLUMNS, self.session_factory,
+                lambda session: field_data_query(session, start_date, end_date, selected_obj_id),
+            )
+        if tab_index == 3:
+            return self.export_summary_report, (
+                self.summary_start_date.date().toPyDate(),
+                self.summary_end_date.date().toPyDate(),
+                self.summary_group_combo.currentData(),
+                self.summary_objects_combo.currentData(),
+            )
+        return None
+    
+    def export_summary_report(self, filepath, start_date, end_date, group_by, object_id,
+                              progress=None, cancel_token=None):
+        """
+        Выгрузка детализации сводного отчета. Выполняется в фоновом потоке.
+        """
+        session = self.session_factory()
+        try:
+            groups = aggregate_field_data(session, start_date, end_date, group_by, object_id)
+        finally:
+            session.close()
+        columns = [(GROUPINGS[group_by], attrgetter('key'))] + SUMMARY_EXPORT_COLUMNS
+        return export_rows(filepath, columns, groups, total=len(groups),
+                           progress=progress, cancel_token=cancel_token)
+    
     def clear_report(self):
         """
         Очистка текста отчета.
@@ -545,5 +683,6 @@ class ReportsWindow(QWidget):
         """
         Обработчик события закрытия окна.
         """
+        self.background.cancel_all()
         self.session.close()
         event.accept()
\ No newline at end of file
@@ -58,4 +58,18 @@ class APIError(BaseStrodServiceException):
 
 class IntegrationError(BaseStrodServiceException):
     """Raised when external integrations fail."""
-    pass
\ No newline at end of file
+    pass
+
+
+class TaskCancelledError(BaseStrodServiceException):
+    """Raised inside a background task when its result is no longer needed."""
+    pass
+
+
+class DeliveryError(IntegrationError):
+    """Raised when a notification transport cannot deliver a message."""
+
+    def __init__(self, message: str, error_code: Optional[str] = None, permanent: bool = False):
+        super().__init__(message, error_code)
+        # Permanent errors (e.g. a rejected recipient) are not retried
+        self.permanent = permanent
@@ -1,12 +1,59 @@
 import os
-import json
 import shutil
+import hashlib
+import mmap
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Dict, Optional, Union
-from datetime import datetime
+from typing import Callable, List, Dict, Iterable, Iterator, Optional, Tuple, Union
+from datetime import datetime, timedelta
 import mimetypes
 from ..config.settings import settings
-from ..exceptions import FileValidationError, FileStorageError
+from ..exceptions import FileValidationError, FileStorageError, ConfigurationError
+from .index import BaseIndex, JsonIndex, JournaledIndex
+from .locking import InterProcessLock
+from .sqlite_index import SqliteIndex
+from . import tiering
+
+# Content-addressed blobs live under this subdirectory in dedup mode
+BLOB_DIR = "blobs"
+COPY_CHUNK_SIZE = 1024 * 1024
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def iter_file_chunks(path: Union[str, Path], chunk_size: int = STREAM_CHUNK_SIZE,
+                     start: int = 0, end: int = None, compression: str = None) -> Iterator[bytes]:
+    """
+    Read a file in chunks of at most ``chunk_size`` bytes
+    
+    Args:
+        path: Path to the file
+        chunk_size: Maximum size of every chunk in bytes
+        start: Offset of the first byte to read
+        end: Offset of the last byte to read, inclusive (end of file if None)
+        compression: Compression of a cold tier file, offsets refer to the
+            decompressed content
+    """
+    with tiering.open_tiered(path, compression) as f:
+        f.seek(start)
+        remaining = None if end is None else end - start + 1
+        while remaining is None or remaining > 0:
+            chunk = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+
+@dataclass
+class IngestResult:
+    """Outcome of a bulk ingest: index entries of stored files and per-file errors"""
+    stored: List[Dict] = field(default_factory=list)
+    errors: Dict[str, str] = field(default_factory=dict)
 
 
 class FileStorage:
@@ -14,39 +61,84 @@ class FileStorage:
     A file storage system that allows searching and loading files
     """
     
-    def __init__(self, storage_path: str = None, index_file: str = "file_index.json"):
+    def __init__(self, storage_path: str = None, index_file: str = "file_index.json",
+                 index_mode: str = None, dedup: bool = None):
         """
         Initialize the file storage system
         
         Args:
             storage_path: Path where files will be stored (uses config default if None)
             index_file: Name of the file that stores the index of all files
+            index_mode: How the index is persisted: "json" rewrites the whole index
+                on every change, "journal" appends changes to a write-ahead journal
+                that is periodically compacted, "sqlite" keeps it in an indexed
+                SQLite database (uses config default if None)
+            dedup: Store file contents once under their SHA-256 digest in
+                ``blobs/`` and share them between index entries (uses config
+                default if None)
         """
         # Use configured storage path if not provided
         if storage_path is None:
             storage_path = settings.STORAGE_PATH
+        if index_mode is None:
+            index_mode = settings.STORAGE_INDEX_MODE
+        if dedup is None:
+            dedup = settings.STORAGE_DEDUP
         
         self.storage_path = Path(storage_path)
         self.index_file = self.storage_path / index_file
+        self.index_mode = index_mode
+        self.dedup = dedup
         self.storage_path.mkdir(parents=True, exist_ok=True)
+        self._storage_root = self.storage_path.resolve()
+        self._name_counters: Dict[str, int] = {}
+        self._reserved_names = set()
+        self._name_lock = threading.Lock()
+        
+        # Serializes index access between processes sharing the storage
+        self._lock = InterProcessLock(self.storage_path / f"{index_file}.lock")
         
         # Load existing index or create new one
-        self.file_index = self._load_index()
+        with self._lock:
+            self.file_index = self._load_index()
     
-    def _load_index(self) -> Dict:
-        """Load the file index from disk"""
-        if self.index_file.exists():
-            try:
-                with open(self.index_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, FileNotFoundError):
-                return {}
-        return {}
+    def _load_index(self) -> BaseIndex:
+        """Load the file index from disk, replaying the journal if there is one"""
+        if self.index_mode == "json":
+            return JsonIndex(self.index_file)
+        if self.index_mode == "journal":
+            return JournaledIndex(
+                self.index_file,
+                compact_every=settings.STORAGE_JOURNAL_COMPACT_EVERY
+            )
+        if self.index_mode == "sqlite":
+            return SqliteIndex(self.index_file.with_suffix(".db"), legacy_index_file=self.index_file)
+        raise ConfigurationError(f"Unknown file index mode: {self.index_mode}")
+    
+    @contextmanager
+    def _locked_index(self) -> Iterator[BaseIndex]:
+        """
+        Hold the storage lock with the index brought up to date
+        
+        Only changes made by other processes since the last call are loaded.
+        """
+        with self._lock:
+            self.file_index.refresh()
+            yield self.file_index
     
     def _save_index(self):
-        """Save the file index to disk"""
-        with open(self.index_file, 'w', encoding='utf-8') as f:
-            json.dump(self.file_index, f, ensure_ascii=False, indent=2)
+        """Save the whole file index to disk"""
+        with self._lock:
+            self.file_index.flush()
+    
+    def compact_index(self):
+        """Fold pending journal records into the index snapshot"""
+        with self._locked_index():
+            self.file_index.flush()
+    
+    def close(self):
+        """Release the index files held open by the storage"""
+        self.file_index.close()
     
     def _validate_file(self, source_path: Path) -> None:
         """Validate file before storing it."""
@@ -81,20 +173,122 @@ class FileStorage:
         filename = "".join(c for c in filename if c.isalnum() or c in "._- ")
         return filename.strip()
     
-    def store_file(self, source_path: str, filename: str = None, tags: List[str] = None) -> str:
+    def _name_taken(self, name: str) -> bool:
+        """Check whether a stored name is already in use"""
+        if name in self._reserved_names or name in self.file_index:
+            return True
+        # Outside dedup mode the file itself may exist before it is indexed
+        return not self.dedup and (self.storage_path / name).exists()
+    
+    def _allocate_name(self, filename: str) -> str:
         """
-        Store a file in the storage system with validation
+        Pick a free stored name for ``filename``
         
-        Args:
-            source_path: Path to the source file
-            filename: Desired filename in storage (optional, uses original name if not provided)
-            tags: List of tags to associate with the file (optional)
+        Duplicates get a ``stem_N`` suffix. The last suffix handed out for
+        every name is remembered, so repeated uploads of the same name do not
+        probe ``stem_1``, ``stem_2``... from the start each time.
+        """
+        stem, suffix = Path(filename).stem, Path(filename).suffix
+        counter = self._name_counters.get(filename, 0)
+        candidate = filename if counter == 0 else f"{stem}_{counter}{suffix}"
+        while self._name_taken(candidate):
+            counter += 1
+            candidate = f"{stem}_{counter}{suffix}"
+        self._name_counters[filename] = counter
+        return candidate
+    
+    def _reserve_name(self, filename: str) -> str:
+        """
+        Allocate a stored name and hold it until the file is indexed
+        
+        Outside dedup mode the name is claimed by creating an empty file with
+        ``O_EXCL``, which also keeps other processes from picking it.
+        """
+        with self._name_lock:
+            while True:
+                stored_name = self._allocate_name(filename)
+                if not self.dedup:
+                    try:
+                        open(self.storage_path / stored_name, 'x').close()
+                    except FileExistsError:
+                        continue
+                self._reserved_names.add(stored_name)
+                return stored_name
+    
+    def _release_names(self, names: Iterable[str]) -> None:
+        with self._name_lock:
+            self._reserved_names.difference_update(names)
+    
+    def _blob_path(self, digest: str) -> Path:
+        """Path of the content blob with the given SHA-256 digest"""
+        return self.storage_path / BLOB_DIR / digest[:2] / digest[2:4] / digest
+    
+    def _store_blob(self, source_path: Path) -> str:
+        """
+        Copy a file into the content-addressed blob store
+        
+        The file is hashed while it is copied to a temporary file, which is
+        then renamed to its digest path or discarded if that blob exists.
         
         Returns:
-            Path to the stored file
+            SHA-256 digest of the content
+        """
+        tmp_dir = self.storage_path / BLOB_DIR / "tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = tmp_dir / f"{uuid.uuid4().hex}.part"
+        try:
+            digest = hashlib.sha256()
+            with open(source_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+                for chunk in iter(lambda: src.read(COPY_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    dst.write(chunk)
+            digest = digest.hexdigest()
+            
+            blob_path = self._blob_path(digest)
+            if blob_path.exists():
+                tmp_path.unlink()
+            else:
+                shutil.copystat(source_path, tmp_path)
+                blob_path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp_path, blob_path)
+            return digest
+        except OSError as e:
+            tmp_path.unlink(missing_ok=True)
+            raise FileStorageError(f"Failed to copy file: {str(e)}")
+    
+    def _build_file_info(self, source_path: Path, stored_name: str, physical_path: Path,
+                         tags: List[str] = None, blob: str = None) -> Dict:
+        """Collect the index entry for a stored file"""
+        stat = physical_path.stat()
+        now = datetime.now().isoformat()
+        file_info = {
+            "original_name": source_path.name,
+            "stored_name": stored_name,
+            "size": stat.st_size,
+            "created": datetime.fromtimestamp(stat.st_ctime).isoformat(),
+            "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+            "path": str(physical_path),
+            "mimetype": mimetypes.guess_type(stored_name)[0] or "application/octet-stream",
+            "tags": tags or [],
+            "tier": tiering.HOT_TIER,
+            "last_access": now
+        }
+        if blob:
+            file_info["blob"] = blob
+        return file_info
+    
+    def _copy_into_storage(self, source_path: Path, filename: str = None,
+                           tags: List[str] = None) -> Tuple[Path, str, Dict]:
         """
-        source_path = Path(source_path)
+        Validate a file and copy it into the storage without indexing it
+        
+        Outside dedup mode the stored name is reserved here, so concurrent
+        copies never write to the same file. In dedup mode names only exist
+        in the index and are assigned by ``_commit_entries``.
         
+        Returns:
+            Source path, requested name and index entry of the file
+        """
         # Validate the file before storing
         self._validate_file(source_path)
         
@@ -104,42 +298,147 @@ class FileStorage:
             # Sanitize the filename
             filename = self._sanitize_filename(filename)
         
-        # Create destination path
-        destination_path = self.storage_path / filename
-        
-        # Handle duplicate filenames
-        counter = 1
-        original_destination = destination_path
-        while destination_path.exists():
-            stem = original_destination.stem
-            suffix = original_destination.suffix
-            destination_path = self.storage_path / f"{stem}_{counter}{suffix}"
-            counter += 1
+        if self.dedup:
+            digest = self._store_blob(source_path)
+            stored_name = filename
+            destination_path = self._blob_path(digest)
+        else:
+            digest = None
+            stored_name = self._reserve_name(filename)
+            destination_path = self.storage_path / stored_name
+            
+            # Copy file to storage
+            try:
+                shutil.copy2(source_path, destination_path)
+            except Exception as e:
+                destination_path.unlink(missing_ok=True)
+                self._release_names([stored_name])
+                raise FileStorageError(f"Failed to copy file: {str(e)}")
         
-        # Copy file to storage
+        file_info = self._build_file_info(source_path, stored_name, destination_path, tags, digest)
+        return source_path, filename, file_info
+    
+    def _commit_entries(self, entries: List[Tuple[Path, str, Dict]]) -> None:
+        """Add copied files to the index in one write under the storage lock"""
+        names = [file_info['stored_name'] for _, _, file_info in entries]
         try:
-            shutil.copy2(source_path, destination_path)
-        except Exception as e:
-            raise FileStorageError(f"Failed to copy file: {str(e)}")
+            with self._locked_index():
+                if self.dedup:
+                    for position, (source_path, filename, file_info) in enumerate(entries):
+                        names[position] = file_info['stored_name'] = self._reserve_name(filename)
+                        # Another process may have deleted the last reference
+                        # to this blob after it was hashed
+                        if not self._blob_path(file_info['blob']).exists():
+                            self._store_blob(source_path)
+                else:
+                    for source_path, filename, file_info in entries:
+                        if file_info['stored_name'] not in self.file_index:
+                            continue
+                        # Another process moved a file with this name to the
+                        # cold tier, freeing the name on disk
+                        stored_name = self._reserve_name(filename)
+                        names.append(stored_name)
+                        destination_path = self.storage_path / stored_name
+                        os.replace(file_info['path'], destination_path)
+                        file_info.update(stored_name=stored_name, path=str(destination_path))
+                self.file_index.put_many((file_info['stored_name'], file_info) for _, _, file_info in entries)
+        finally:
+            self._release_names(names)
+    
+    def store_file(self, source_path: str, filename: str = None, tags: List[str] = None) -> str:
+        """
+        Store a file in the storage system with validation
+        
+        Args:
+            source_path: Path to the source file
+            filename: Desired filename in storage (optional, uses original name if not provided)
+            tags: List of tags to associate with the file (optional)
+        
+        Returns:
+            Path to the stored file (the shared content blob in dedup mode)
+        """
+        entry = self._copy_into_storage(Path(source_path), filename, tags)
         
         # Add to index
-        file_info = {
-            "original_name": source_path.name,
-            "stored_name": destination_path.name,
-            "size": destination_path.stat().st_size,
-            "created": datetime.fromtimestamp(destination_path.stat().st_ctime).isoformat(),
-            "modified": datetime.fromtimestamp(destination_path.stat().st_mtime).isoformat(),
-            "path": str(destination_path),
-            "mimetype": mimetypes.guess_type(str(destination_path))[0] or "application/octet-stream",
-            "tags": tags or []
-        }
+        self._commit_entries([entry])
+        
+        return entry[2]['path']
+    
+    def store_many(self, source_paths: Iterable[str], tags: List[str] = None, workers: int = None,
+                   progress: Callable[[int, int], None] = None) -> IngestResult:
+        """
+        Store several files at once
+        
+        Files are validated and copied on a thread pool and added to the
+        index in a single commit at the end. A file that fails validation or
+        copying is reported in ``errors`` and does not stop the batch.
+        
+        Args:
+            source_paths: Paths to the source files
+            tags: List of tags to associate with every file (optional)
+            workers: Number of copy threads (uses config default if None)
+            progress: Called as ``progress(done, total)`` after every file
+        
+        Returns:
+            IngestResult with the index entries of the stored files, in input
+            order, and error messages keyed by source path
+        """
+        source_paths = [str(path) for path in source_paths]
+        total = len(source_paths)
+        if workers is None:
+            workers = settings.STORAGE_INGEST_WORKERS
+        
+        entries: List[Optional[Tuple[Path, str, Dict]]] = [None] * total
+        result = IngestResult()
         
-        self.file_index[destination_path.name] = file_info
-        self._save_index()
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = {
+                executor.submit(self._copy_into_storage, Path(path), None, tags): position
+                for position, path in enumerate(source_paths)
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                position = futures[future]
+                try:
+                    entries[position] = future.result()
+                except (FileValidationError, FileStorageError, OSError) as e:
+                    result.errors[source_paths[position]] = str(e)
+                if progress is not None:
+                    progress(done, total)
         
-        return str(destination_path)
+        stored = [entry for entry in entries if entry is not None]
+        self._commit_entries(stored)
+        
+        result.stored = [file_info for _, _, file_info in stored]
+        return result
     
-    def search_files(self, query: str = None, tags: List[str] = None, extension: str = None) -> List[Dict]:
+    def store_directory(self, directory: str, tags: List[str] = None, recursive: bool = True,
+                        workers: int = None, progress: Callable[[int, int], None] = None) -> IngestResult:
+        """
+        Store every file with an allowed extension found in a directory
+        
+        Args:
+            directory: Directory to import (relative, like other source paths)
+            tags: List of tags to associate with every file (optional)
+            recursive: Also import files from subdirectories
+            workers: Number of copy threads (uses config default if None)
+            progress: Called as ``progress(done, total)`` after every file
+        
+        Returns:
+            IngestResult of the import
+        """
+        directory = Path(directory)
+        if not directory.is_dir():
+            raise FileNotFoundError(f"Source directory does not exist: {directory}")
+        
+        pattern = "**/*" if recursive else "*"
+        source_paths = sorted(
+            path for path in directory.glob(pattern)
+            if path.is_file() and path.suffix.lower().lstrip('.') in settings.ALLOWED_FILE_EXTENSIONS
+        )
+        return self.store_many(source_paths, tags=tags, workers=workers, progress=progress)
+    
+    def search_files(self, query: str = None, tags: List[str] = None, extension: str = None,
+                     search_original: bool = False) -> List[Dict]:
         """
         Search for files in the storage system
         
@@ -147,58 +446,84 @@ class FileStorage:
             query: Text query to search in filenames
             tags: List of tags to filter by
             extension: File extension to filter by
+            search_original: Also match the query against the original file names
         
         Returns:
             List of matching file information
         """
-        results = []
+        with self._locked_index() as index:
+            return index.search(
+                query=query, tags=tags, extension=extension, search_original=search_original
+            )
+    
+    def _resolve_stored_entry(self, filename: str) -> Tuple[Path, Dict]:
+        """
+        Find a stored file and check that it lies inside the storage directory
         
-        for filename, file_info in self.file_index.items():
-            match = True
-            
-            # Check query match in filename
-            if query and query.lower() not in filename.lower():
-                match = False
-            
-            # Check tags
-            if tags and not any(tag in file_info.get('tags', []) for tag in tags):
-                match = False
-            
-            # Check extension
-            if extension and not filename.lower().endswith(extension.lower()):
-                match = False
-            
-            if match:
-                results.append(file_info)
+        The read is recorded in ``last_access``, at most once per
+        ``STORAGE_ACCESS_UPDATE_INTERVAL`` so that reads rarely write the index.
+        
+        Returns:
+            Path and index entry of the file
         
-        return results
+        Raises:
+            FileNotFoundError: If the file is not in the index
+            FileStorageError: If the indexed path points outside the storage
+        """
+        # Sanitize filename to prevent directory traversal
+        safe_filename = self._sanitize_filename(filename)
+        with self._locked_index() as index:
+            file_info = index.get(safe_filename)
+        if not file_info:
+            raise FileNotFoundError(f"File not found in storage: {filename}")
+        
+        file_path = Path(file_info['path'])
+        try:
+            resolved_path = file_path.resolve()
+            inside = os.path.commonpath([str(resolved_path), str(self._storage_root)]) == str(self._storage_root)
+        except (OSError, RuntimeError, ValueError):
+            raise FileStorageError("Invalid file path")
+        if not inside:
+            raise FileStorageError("File path is outside of storage directory")
+        
+        self._record_access(safe_filename, file_info)
+        return file_path, file_info
+    
+    def _record_access(self, safe_filename: str, file_info: Dict) -> None:
+        last_access = file_info.get('last_access') or file_info.get('modified')
+        now = datetime.now()
+        interval = timedelta(seconds=settings.STORAGE_ACCESS_UPDATE_INTERVAL)
+        if last_access and datetime.fromisoformat(last_access) + interval > now:
+            return
+        with self._locked_index() as index:
+            current = index.get(safe_filename)
+            if current is not None and current.get('path') == file_info['path']:
+                index.put(safe_filename, dict(current, last_access=now.isoformat()))
+    
+    def _resolve_stored_path(self, filename: str) -> Path:
+        """Find a stored file, moving it back to the hot tier if it is cold"""
+        file_path, file_info = self._resolve_stored_entry(filename)
+        if file_info.get('tier') == tiering.COLD_TIER:
+            file_path = self._thaw(file_info['stored_name'])
+        return file_path
     
     def get_file_path(self, filename: str) -> Optional[str]:
         """
         Get the path to a stored file by its name
         
+        Cold files are decompressed back into the hot tier first, since the
+        caller needs a real file.
+        
         Args:
             filename: Name of the file to retrieve
             
         Returns:
             Path to the file or None if not found
         """
-        # Sanitize filename to prevent directory traversal
-        safe_filename = self._sanitize_filename(filename)
-        file_info = self.file_index.get(safe_filename)
-        if file_info:
-            # Additional security check to ensure the file is within our storage path
-            file_path = Path(file_info['path'])
-            try:
-                # Resolve the path and ensure it's within the storage directory
-                resolved_path = file_path.resolve()
-                storage_path = self.storage_path.resolve()
-                if not str(resolved_path).startswith(str(storage_path)):
-                    raise FileStorageError("File path is outside of storage directory")
-                return file_info['path']
-            except Exception:
-                return None
-        return None
+        try:
+            return str(self._resolve_stored_path(filename))
+        except (FileNotFoundError, FileStorageError):
+            return None
     
     def load_file_content(self, filename: str) -> bytes:
         """
@@ -210,29 +535,154 @@ class FileStorage:
         Returns:
             File content as bytes
         """
-        # Sanitize filename to prevent directory traversal
-        safe_filename = self._sanitize_filename(filename)
-        file_path = self.get_file_path(safe_filename)
-        if not file_path:
-            raise FileNotFoundError(f"File not found in storage: {filename}")
+        file_path, file_info = self._resolve_stored_entry(filename)
+        with tiering.open_tiered(file_path, file_info.get('compression')) as f:
+            return f.read()
+    
+    def iter_file_content(self, filename: str, chunk_size: int = STREAM_CHUNK_SIZE,
+                          start: int = 0, end: int = None) -> Iterator[bytes]:
+        """
+        Stream the content of a stored file in fixed-size chunks
         
-        file_path_obj = Path(file_path)
+        Args:
+            filename: Name of the file to read
+            chunk_size: Maximum size of every chunk in bytes
+            start: Offset of the first byte to read
+            end: Offset of the last byte to read, inclusive (end of file if None)
+            
+        Returns:
+            Iterator over the chunks
+        """
+        file_path, file_info = self._resolve_stored_entry(filename)
+        return iter_file_chunks(file_path, chunk_size, start, end, file_info.get('compression'))
+    
+    def read_range(self, filename: str, start: int, length: int) -> bytes:
+        """
+        Read ``length`` bytes of a stored file starting at ``start``
         
-        # Additional security check to ensure the file is within our storage path
-        try:
-            resolved_path = file_path_obj.resolve()
-            storage_path = self.storage_path.resolve()
-            if not str(resolved_path).startswith(str(storage_path)):
-                raise FileStorageError("File path is outside of storage directory")
-        except Exception:
-            raise FileStorageError("Invalid file path")
+        Returns:
+            The bytes read, shorter than ``length`` at the end of the file
+        """
+        if length <= 0:
+            return b""
+        return b"".join(self.iter_file_content(filename, start=start, end=start + length - 1))
+    
+    @contextmanager
+    def open_memoryview(self, filename: str) -> Iterator[memoryview]:
+        """
+        Map a stored file into memory for zero-copy local reads
         
-        with open(file_path_obj, 'rb') as f:
-            return f.read()
+        Usage:
+            with storage.open_memoryview("scan.pdf") as view:
+                header = bytes(view[:4])
+        
+        The view is read-only and must not be used after the block ends.
+        Compressed cold files are decompressed into memory instead.
+        """
+        file_path, file_info = self._resolve_stored_entry(filename)
+        if file_info.get('compression'):
+            with tiering.open_tiered(file_path, file_info['compression']) as f:
+                yield memoryview(f.read())
+            return
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield memoryview(b"")
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    yield view
+                finally:
+                    view.release()
+    
+    def apply_tiering(self, cold_after_days: int = None, compression: str = None) -> List[str]:
+        """
+        Move files that have not been read recently to the cold tier
+        
+        Cold files are compressed (except formats that are already
+        compressed) and stay readable through ``load_file_content``,
+        ``iter_file_content`` and ``get_file_path``. Shared blobs in dedup
+        mode are left where they are.
+        
+        Args:
+            cold_after_days: Days since the last read (uses config default if None)
+            compression: ``gzip`` or ``zstd`` (uses config default if None)
+        
+        Returns:
+            Stored names of the files moved to the cold tier
+        """
+        if cold_after_days is None:
+            cold_after_days = settings.STORAGE_COLD_AFTER_DAYS
+        if compression is None:
+            compression = settings.STORAGE_COLD_COMPRESSION
+        tiering.check_compression(compression)
+        
+        cutoff = datetime.now() - timedelta(days=cold_after_days)
+        with self._locked_index() as index:
+            candidates = [
+                file_info for file_info in index.values()
+                if file_info.get('tier', tiering.HOT_TIER) == tiering.HOT_TIER and not file_info.get('blob')
+                and datetime.fromisoformat(file_info.get('last_access') or file_info['modified']) < cutoff
+            ]
+        
+        moved = []
+        for file_info in candidates:
+            try:
+                if self._freeze(file_info, compression):
+                    moved.append(file_info['stored_name'])
+            except FileStorageError:
+                # Leave the file in the hot tier and try again on the next run
+                continue
+        return moved
+    
+    def _freeze(self, file_info: Dict, compression: str) -> bool:
+        """Compress a hot file into the cold tier; False if it changed meanwhile"""
+        stored_name = file_info['stored_name']
+        hot_path = Path(file_info['path'])
+        file_compression = tiering.choose_compression(stored_name, compression)
+        cold_path = tiering.cold_path(self.storage_path, stored_name, file_compression)
+        
+        # Compress outside the lock so that other processes are not blocked
+        tiering.transcode_file(hot_path, None, cold_path, file_compression)
+        with self._locked_index() as index:
+            if index.get(stored_name) != file_info:
+                cold_path.unlink(missing_ok=True)
+                return False
+            index.put(stored_name, dict(
+                file_info,
+                tier=tiering.COLD_TIER,
+                path=str(cold_path),
+                compression=file_compression,
+                stored_size=cold_path.stat().st_size
+            ))
+        hot_path.unlink(missing_ok=True)
+        return True
+    
+    def _thaw(self, stored_name: str) -> Path:
+        """Decompress a cold file back into the hot tier"""
+        with self._locked_index() as index:
+            file_info = index.get(stored_name)
+            if file_info is None:
+                raise FileNotFoundError(f"File not found in storage: {stored_name}")
+            if file_info.get('tier') != tiering.COLD_TIER:
+                return Path(file_info['path'])
+            
+            cold_path = Path(file_info['path'])
+            hot_path = self.storage_path / stored_name
+            tiering.transcode_file(cold_path, file_info.get('compression'), hot_path, None)
+            hot_info = {
+                key: value for key, value in file_info.items()
+                if key not in ('compression', 'stored_size')
+            }
+            hot_info.update(tier=tiering.HOT_TIER, path=str(hot_path))
+            index.put(stored_name, hot_info)
+        cold_path.unlink(missing_ok=True)
+        return hot_path
     
     def list_all_files(self) -> List[Dict]:
         """List all files in the storage"""
-        return list(self.file_index.values())
+        with self._locked_index() as index:
+            return list(index.values())
     
     def delete_file(self, filename: str) -> bool:
         """
@@ -246,6 +696,11 @@ class FileStorage:
         """
         # Sanitize filename to prevent directory traversal
         safe_filename = self._sanitize_filename(filename)
+        with self._locked_index():
+            return self._delete_entry(safe_filename)
+    
+    def _delete_entry(self, safe_filename: str) -> bool:
+        """Remove an index entry and its file; the caller holds the lock"""
         file_info = self.file_index.get(safe_filename)
         if not file_info:
             return False
@@ -260,12 +715,13 @@ class FileStorage:
             if not str(resolved_path).startswith(str(storage_path)):
                 return False
                 
-            if file_path.exists():
-                file_path.unlink()
-            
             # Remove from index
-            del self.file_index[safe_filename]
-            self._save_index()
+            self.file_index.remove(safe_filename)
+            
+            # A shared blob is removed together with its last reference
+            blob = file_info.get('blob')
+            if (not blob or self.file_index.blob_refcount(blob) == 0) and file_path.exists():
+                file_path.unlink()
             return True
         except Exception:
             return False
@@ -283,21 +739,19 @@ class FileStorage:
         """
         # Sanitize filename to prevent directory traversal
         safe_filename = self._sanitize_filename(filename)
-        if safe_filename in self.file_index:
-            current_tags = set(self.file_index[safe_filename].get('tags', []))
-            current_tags.update(tags)
-            self.file_index[safe_filename]['tags'] = list(current_tags)
-            self._save_index()
-            return True
+        with self._locked_index() as index:
+            file_info = index.get(safe_filename)
+            if file_info:
+                current_tags = set(file_info.get('tags', []))
+                current_tags.update(tags)
+                index.put(safe_filename, dict(file_info, tags=list(current_tags)))
+                return True
         return False
     
     def get_all_tags(self) -> List[str]:
         """Get all unique tags in the storage"""
-        all_tags = set()
-        for file_info in self.file_index.values():
-            tags = file_info.get('tags', [])
-            all_tags.update(tags)
-        return sorted(list(all_tags))
+        with self._locked_index() as index:
+            return index.all_tags()
 
 
 # Example usage
@@ -0,0 +1,345 @@
+"""
+Index backends for the file storage system.
+
+An index maps the stored name of every file to its metadata dictionary.
+All backends behave like a read-only ``Mapping`` and are changed only
+through ``put()`` and ``remove()``, so the storage never has to know how
+the entries are persisted.
+"""
+import json
+import os
+import zlib
+from collections import Counter
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..exceptions import FileStorageError
+
+
+def normalize_extension(extension: str) -> str:
+    """
+    Extension as matched by ``search()``: lower-cased, with the leading dot
+
+    Every backend compares it with the last suffix of the stored name, so
+    ``"jpg"``, ``".JPG"`` and ``".jpg"`` are the same filter.
+    """
+    extension = extension.lower()
+    return extension if extension.startswith('.') else f".{extension}"
+
+
+def write_json_atomic(path: Path, data: Dict, indent: Optional[int] = 2) -> None:
+    """Write ``data`` to ``path`` so that readers see either the old or the new file."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def file_stamp(path: Path) -> Optional[tuple]:
+    """Identify the current version of a file, None if it does not exist"""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+class BaseIndex(Mapping):
+    """
+    Common interface of the index backends.
+
+    Lookups that backends do not override are answered by scanning all
+    entries.
+    """
+
+    def put(self, name: str, info: Dict) -> None:
+        """Add or replace the entry for ``name``"""
+        raise NotImplementedError
+
+    def remove(self, name: str) -> None:
+        """Remove the entry for ``name`` if it exists"""
+        raise NotImplementedError
+
+    def put_many(self, entries: Iterable[Tuple[str, Dict]]) -> None:
+        """Add or replace several entries, committing them together"""
+        for name, info in entries:
+            self.put(name, info)
+
+    def flush(self) -> None:
+        """Persist the whole index"""
+
+    def refresh(self) -> None:
+        """Pick up changes written by other processes"""
+
+    def close(self) -> None:
+        """Release resources held by the index"""
+
+    def search(self, query: str = None, tags: List[str] = None, extension: str = None,
+               search_original: bool = False) -> List[Dict]:
+        """Return entries matching all of the given criteria"""
+        results = []
+        query = query.lower() if query else None
+        extension = normalize_extension(extension) if extension else None
+
+        for filename, file_info in self.items():
+            match = True
+
+            # Check query match in filename
+            if query and query not in filename.lower():
+                if not (search_original and query in file_info.get('original_name', '').lower()):
+                    match = False
+
+            # Check tags
+            if tags and not any(tag in file_info.get('tags', []) for tag in tags):
+                match = False
+
+            # Check extension
+            if extension and Path(filename).suffix.lower() != extension:
+                match = False
+
+            if match:
+                results.append(file_info)
+
+        return results
+
+    def all_tags(self) -> List[str]:
+        """Return all unique tags in sorted order"""
+        all_tags = set()
+        for file_info in self.values():
+            all_tags.update(file_info.get('tags', []))
+        return sorted(all_tags)
+
+    def blob_refcount(self, digest: str) -> int:
+        """Return how many entries share the content blob ``digest``"""
+        return sum(1 for file_info in self.values() if file_info.get('blob') == digest)
+
+
+class JsonIndex(BaseIndex):
+    """
+    Index kept in memory and persisted as a single JSON document.
+
+    Every mutation rewrites the whole document, so this backend is only
+    suitable for small storages.
+    """
+
+    def __init__(self, index_file: Path):
+        self.index_file = Path(index_file)
+        self._load_snapshot()
+
+    def _load_snapshot(self) -> None:
+        self._snapshot_stamp = file_stamp(self.index_file)
+        self.entries: Dict[str, Dict] = self._read_snapshot()
+        self.blob_refs = Counter(
+            info['blob'] for info in self.entries.values() if info.get('blob')
+        )
+
+    def __getitem__(self, name: str) -> Dict:
+        return self.entries[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _read_snapshot(self) -> Dict[str, Dict]:
+        """Read the JSON snapshot, treating a missing or broken file as empty"""
+        if self.index_file.exists():
+            try:
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, FileNotFoundError):
+                return {}
+        return {}
+
+    def _set_entry(self, name: str, info: Dict) -> None:
+        self._drop_entry(name)
+        self.entries[name] = info
+        if info.get('blob'):
+            self.blob_refs[info['blob']] += 1
+
+    def _drop_entry(self, name: str) -> Optional[Dict]:
+        info = self.entries.pop(name, None)
+        if info is not None and info.get('blob'):
+            self.blob_refs[info['blob']] -= 1
+            if self.blob_refs[info['blob']] <= 0:
+                del self.blob_refs[info['blob']]
+        return info
+
+    def put(self, name: str, info: Dict) -> None:
+        """Add or replace the entry for ``name``"""
+        self._set_entry(name, info)
+        self.flush()
+
+    def put_many(self, entries: Iterable[Tuple[str, Dict]]) -> None:
+        """Add or replace several entries, committing them together"""
+        for name, info in entries:
+            self._set_entry(name, info)
+        self.flush()
+
+    def remove(self, name: str) -> None:
+        """Remove the entry for ``name`` if it exists"""
+        if self._drop_entry(name) is not None:
+            self.flush()
+
+    def flush(self) -> None:
+        """Persist the whole index"""
+        write_json_atomic(self.index_file, self.entries)
+        self._snapshot_stamp = file_stamp(self.index_file)
+
+    def refresh(self) -> None:
+        """Re-read the snapshot if another process has replaced it"""
+        if file_stamp(self.index_file) != self._snapshot_stamp:
+            self._load_snapshot()
+
+    def blob_refcount(self, digest: str) -> int:
+        """Return how many entries share the content blob ``digest``"""
+        return self.blob_refs.get(digest, 0)
+
+
+class JournaledIndex(JsonIndex):
+    """
+    Index persisted as a JSON snapshot plus an append-only journal.
+
+    Mutations are appended to ``<index_file>.journal`` as one checksummed
+    JSON record per line. Once the journal holds ``compact_every`` records
+    it is folded into a new snapshot, which is written to a temporary file
+    and atomically renamed over the old one before the journal is
+    truncated. Records carry the full entry state, so replaying a journal
+    over a snapshot that already contains it is harmless, and a record torn
+    by a crash is detected by its checksum and dropped on the next load.
+    """
+
+    def __init__(self, index_file: Path, compact_every: int = 1000, durable: bool = True):
+        self.journal_file = Path(str(index_file) + ".journal")
+        self.compact_every = compact_every
+        self.durable = durable
+        self.journal_records = 0
+        self._journal_offset = 0
+        self._journal = None
+        super().__init__(index_file)
+        self._replay_journal()
+        self._journal = open(self.journal_file, 'ab')
+
+    @staticmethod
+    def _encode_record(record: Dict) -> bytes:
+        payload = json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        return b"%08x %s\n" % (zlib.crc32(payload), payload)
+
+    @staticmethod
+    def _decode_record(line: bytes) -> Optional[Dict]:
+        """Decode one journal line, returning None if it is torn or corrupted"""
+        if not line.endswith(b"\n") or len(line) < 10 or line[8:9] != b" ":
+            return None
+        payload = line[9:-1]
+        try:
+            if int(line[:8], 16) != zlib.crc32(payload):
+                return None
+            return json.loads(payload.decode('utf-8'))
+        except (ValueError, UnicodeDecodeError):
+            return None
+
+    def _apply_record(self, record: Dict) -> None:
+        if record.get('op') == 'put':
+            self._set_entry(record['name'], record['info'])
+        elif record.get('op') == 'del':
+            self._drop_entry(record['name'])
+
+    def _replay_journal(self) -> None:
+        """
+        Apply journal records written after ``_journal_offset``
+
+        A torn tail is cut off, so callers must hold the storage lock.
+        """
+        if not self.journal_file.exists():
+            return
+
+        valid_length = self._journal_offset
+        with open(self.journal_file, 'rb') as f:
+            f.seek(valid_length)
+            for line in f:
+                record = self._decode_record(line)
+                if record is None:
+                    break
+                self._apply_record(record)
+                self.journal_records += 1
+                valid_length += len(line)
+
+        if valid_length != self.journal_file.stat().st_size:
+            with open(self.journal_file, 'r+b') as f:
+                f.truncate(valid_length)
+        self._journal_offset = valid_length
+
+    def refresh(self) -> None:
+        """
+        Catch up with changes written by other processes
+
+        Only journal records appended since the last call are replayed. A
+        replaced snapshot means another process compacted the journal, and
+        the index is reloaded from scratch.
+        """
+        if file_stamp(self.index_file) != self._snapshot_stamp:
+            self._load_snapshot()
+            self.journal_records = 0
+            self._journal_offset = 0
+        elif self.journal_file.stat().st_size < self._journal_offset:
+            # Truncated without a new snapshot: nothing we know can be trusted
+            self._load_snapshot()
+            self.journal_records = 0
+            self._journal_offset = 0
+        self._replay_journal()
+
+    def _append(self, *records: Dict) -> None:
+        """Write records to the journal with a single flush and fsync"""
+        try:
+            self._journal.write(b"".join(self._encode_record(record) for record in records))
+            self._journal.flush()
+            if self.durable:
+                os.fsync(self._journal.fileno())
+            self._journal_offset = os.fstat(self._journal.fileno()).st_size
+        except OSError as e:
+            raise FileStorageError(f"Failed to append to index journal: {str(e)}")
+
+        for record in records:
+            self._apply_record(record)
+        self.journal_records += len(records)
+        if self.journal_records >= self.compact_every:
+            self.compact()
+
+    def put(self, name: str, info: Dict) -> None:
+        """Add or replace the entry for ``name``"""
+        self._append({'op': 'put', 'name': name, 'info': info})
+
+    def put_many(self, entries: Iterable[Tuple[str, Dict]]) -> None:
+        """Add or replace several entries, committing them together"""
+        records = [{'op': 'put', 'name': name, 'info': info} for name, info in entries]
+        if records:
+            self._append(*records)
+
+    def remove(self, name: str) -> None:
+        """Remove the entry for ``name`` if it exists"""
+        if name in self.entries:
+            self._append({'op': 'del', 'name': name})
+
+    def compact(self) -> None:
+        """Fold the journal into a fresh snapshot and truncate it"""
+        write_json_atomic(self.index_file, self.entries, indent=None)
+        self._snapshot_stamp = file_stamp(self.index_file)
+        self._journal.truncate(0)
+        self._journal.seek(0)
+        if self.durable:
+            os.fsync(self._journal.fileno())
+        self.journal_records = 0
+        self._journal_offset = 0
+
+    def flush(self) -> None:
+        """Persist the whole index"""
+        self.compact()
+
+    def close(self) -> None:
+        """Release resources held by the index"""
+        if self._journal is not None and not self._journal.closed:
+            self._journal.close()
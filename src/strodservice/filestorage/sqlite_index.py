@@ -0,0 +1,252 @@
+"""
+SQLite index backend for the file storage system.
+
+Entries live in an embedded SQLite database instead of memory, with
+B-tree indexes on tags, extension and mimetype and an FTS5 trigram table
+over the lower-cased stored and original names, so that tag, extension
+and substring lookups do not have to scan every entry.
+"""
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .index import BaseIndex, JsonIndex, JournaledIndex, normalize_extension
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    extension TEXT NOT NULL,
+    mimetype TEXT,
+    blob TEXT,
+    info TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_files_extension ON files (extension);
+CREATE INDEX IF NOT EXISTS idx_files_mimetype ON files (mimetype);
+CREATE TABLE IF NOT EXISTS file_tags (
+    tag TEXT NOT NULL,
+    file_id INTEGER NOT NULL REFERENCES files (id) ON DELETE CASCADE,
+    PRIMARY KEY (tag, file_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_file_tags_file_id ON file_tags (file_id);
+"""
+
+# The trigram tokenizer (SQLite 3.34+) lets LIKE '%text%' use the full-text
+# index. Older libraries get a plain table with the same columns, which
+# keeps the queries valid at the cost of a scan.
+FTS_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS files_fts USING fts5(name, original_name, tokenize='trigram')"
+FTS_FALLBACK_SCHEMA = "CREATE TABLE IF NOT EXISTS files_fts (name TEXT, original_name TEXT)"
+
+ALL_TAGS_QUERY = """
+WITH RECURSIVE distinct_tags (tag) AS (
+    SELECT MIN(tag) FROM file_tags
+    UNION ALL
+    SELECT (SELECT MIN(tag) FROM file_tags WHERE tag > distinct_tags.tag)
+    FROM distinct_tags WHERE distinct_tags.tag IS NOT NULL
+)
+SELECT tag FROM distinct_tags WHERE tag IS NOT NULL
+"""
+
+
+class SqliteIndex(BaseIndex):
+    """
+    Index stored in an SQLite database file.
+
+    If the database is created next to an existing JSON index (and its
+    journal), the entries are imported on first open.
+    """
+
+    def __init__(self, db_file: Path, legacy_index_file: Optional[Path] = None):
+        self.db_file = Path(db_file)
+        is_new = not self.db_file.exists()
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_file), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._create_schema()
+
+        if is_new and legacy_index_file is not None:
+            self._import_legacy(Path(legacy_index_file))
+
+    def _create_schema(self) -> None:
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(files)")]
+            if 'blob' not in columns:
+                self._conn.execute("ALTER TABLE files ADD COLUMN blob TEXT")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_files_blob ON files (blob)")
+            try:
+                self._conn.execute(FTS_SCHEMA)
+            except sqlite3.OperationalError:
+                self._conn.execute(FTS_FALLBACK_SCHEMA)
+
+    def _import_legacy(self, index_file: Path) -> None:
+        """Copy entries from a JSON (and journaled) index into the database"""
+        journal_file = Path(str(index_file) + ".journal")
+        if journal_file.exists():
+            legacy = JournaledIndex(index_file)
+        elif index_file.exists():
+            legacy = JsonIndex(index_file)
+        else:
+            return
+        try:
+            with self._lock, self._conn:
+                for name, info in legacy.items():
+                    self._put(name, info)
+        finally:
+            legacy.close()
+
+    def __getitem__(self, name: str) -> Dict:
+        with self._lock:
+            row = self._conn.execute("SELECT info FROM files WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return json.loads(row[0])
+
+    def __contains__(self, name: object) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM files WHERE name = ?", (name,)).fetchone() is not None
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            names = [row[0] for row in self._conn.execute("SELECT name FROM files ORDER BY id")]
+        return iter(names)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def values(self) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute("SELECT info FROM files ORDER BY id").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def items(self) -> List:
+        with self._lock:
+            rows = self._conn.execute("SELECT name, info FROM files ORDER BY id").fetchall()
+        return [(name, json.loads(info)) for name, info in rows]
+
+    def _put(self, name: str, info: Dict) -> None:
+        """Write one entry; the caller holds the lock and the transaction"""
+        row = self._conn.execute("SELECT id FROM files WHERE name = ?", (name,)).fetchone()
+        values = (
+            Path(name).suffix.lower(),
+            info.get('mimetype'),
+            info.get('blob'),
+            json.dumps(info, ensure_ascii=False),
+        )
+        if row is None:
+            file_id = self._conn.execute(
+                "INSERT INTO files (name, extension, mimetype, blob, info) VALUES (?, ?, ?, ?, ?)",
+                (name,) + values
+            ).lastrowid
+        else:
+            file_id = row[0]
+            self._conn.execute(
+                "UPDATE files SET extension = ?, mimetype = ?, blob = ?, info = ? WHERE id = ?",
+                values + (file_id,)
+            )
+            self._conn.execute("DELETE FROM file_tags WHERE file_id = ?", (file_id,))
+            self._conn.execute("DELETE FROM files_fts WHERE rowid = ?", (file_id,))
+
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO file_tags (tag, file_id) VALUES (?, ?)",
+            [(tag, file_id) for tag in info.get('tags', [])]
+        )
+        self._conn.execute(
+            "INSERT INTO files_fts (rowid, name, original_name) VALUES (?, ?, ?)",
+            (file_id, name.lower(), info.get('original_name', '').lower())
+        )
+
+    def put(self, name: str, info: Dict) -> None:
+        """Add or replace the entry for ``name``"""
+        with self._lock, self._conn:
+            self._put(name, info)
+
+    def put_many(self, entries: Iterable[Tuple[str, Dict]]) -> None:
+        """Add or replace several entries in one transaction"""
+        with self._lock, self._conn:
+            for name, info in entries:
+                self._put(name, info)
+
+    def remove(self, name: str) -> None:
+        """Remove the entry for ``name`` if it exists"""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT id FROM files WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                return
+            self._conn.execute("DELETE FROM files_fts WHERE rowid = ?", (row[0],))
+            self._conn.execute("DELETE FROM files WHERE id = ?", (row[0],))
+
+    def close(self) -> None:
+        """Release resources held by the index"""
+        with self._lock:
+            self._conn.close()
+
+    def blob_refcount(self, digest: str) -> int:
+        """Return how many entries share the content blob ``digest``"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM files WHERE blob = ?", (digest,)).fetchone()[0]
+
+    def search(self, query: str = None, tags: List[str] = None, extension: str = None,
+               search_original: bool = False) -> List[Dict]:
+        """Return entries matching all of the given criteria"""
+        conditions = []
+        params = []
+        recheck = None
+
+        if query:
+            # The trigram index serves LIKE patterns of three or more characters
+            # without an ESCAPE clause. A bare "_" (common in stored names) is
+            # left as a wildcard and the few false positives are dropped
+            # afterwards; shorter or "%"-containing queries fall back to a scan.
+            query = query.lower()
+            if len(query) < 3 or '%' in query or '\\' in query:
+                match, pattern = "instr({column}, ?) > 0", query
+            else:
+                match, pattern = "{column} LIKE ?", f"%{query}%"
+                if '_' in query:
+                    recheck = query
+            fts_query = "SELECT rowid FROM files_fts WHERE " + match.format(column="name")
+            params.append(pattern)
+            if search_original:
+                fts_query += " UNION SELECT rowid FROM files_fts WHERE " + match.format(column="original_name")
+                params.append(pattern)
+            conditions.append(f"f.id IN ({fts_query})")
+
+        if tags:
+            placeholders = ", ".join("?" * len(tags))
+            conditions.append(f"f.id IN (SELECT file_id FROM file_tags WHERE tag IN ({placeholders}))")
+            params.extend(tags)
+
+        if extension:
+            conditions.append("f.extension = ?")
+            params.append(normalize_extension(extension))
+
+        sql = "SELECT f.name, f.info FROM files f"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY f.id"
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        results = []
+        for name, info in rows:
+            file_info = json.loads(info)
+            if recheck and recheck not in name.lower():
+                if not (search_original and recheck in file_info.get('original_name', '').lower()):
+                    continue
+            results.append(file_info)
+        return results
+
+    def all_tags(self) -> List[str]:
+        """Return all unique tags in sorted order"""
+        # Jump from one distinct tag to the next through the (tag, file_id)
+        # primary key instead of reading every tag row
+        with self._lock:
+            return [row[0] for row in self._conn.execute(ALL_TAGS_QUERY)]
@@ -0,0 +1,90 @@
+"""
+Cold tier of the file storage system.
+
+Files that have not been read for a while are moved from the storage root
+into ``cold/`` and compressed with gzip, or with zstd if the optional
+``zstandard`` package is installed. Formats that are already compressed
+(photos, Office documents) are moved without recompression.
+"""
+import gzip
+import os
+import shutil
+from pathlib import Path
+from typing import BinaryIO, Optional, Union
+
+from ..exceptions import ConfigurationError, FileStorageError
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COLD_DIR = "cold"
+HOT_TIER = "hot"
+COLD_TIER = "cold"
+
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+# Compressing these again saves almost nothing and costs CPU on every read
+INCOMPRESSIBLE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".docx", ".xlsx", ".gz", ".zip"}
+
+
+def check_compression(compression: str) -> None:
+    """Raise ConfigurationError if ``compression`` cannot be used here"""
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ConfigurationError(f"Unknown cold tier compression: {compression}")
+    if compression == "zstd" and zstandard is None:
+        raise ConfigurationError("zstd compression requires the 'zstandard' package")
+
+
+def choose_compression(filename: str, compression: str) -> Optional[str]:
+    """Compression to use for ``filename`` in the cold tier, None to store it as is"""
+    if Path(filename).suffix.lower() in INCOMPRESSIBLE_EXTENSIONS:
+        return None
+    return compression
+
+
+def cold_path(storage_path: Path, stored_name: str, compression: Optional[str]) -> Path:
+    """Location of a stored file in the cold tier"""
+    return storage_path / COLD_DIR / (stored_name + COMPRESSION_SUFFIXES.get(compression, ""))
+
+
+def open_tiered(path: Union[str, Path], compression: Optional[str] = None) -> BinaryIO:
+    """Open a stored file for reading, decompressing it on the fly"""
+    if compression is None:
+        return open(path, 'rb')
+    if compression == "gzip":
+        return gzip.open(path, 'rb')
+    if compression == "zstd":
+        if zstandard is None:
+            raise FileStorageError("Reading zstd-compressed files requires the 'zstandard' package")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    raise FileStorageError(f"Unknown compression of stored file: {compression}")
+
+
+def _open_for_write(path: Path, compression: Optional[str]) -> BinaryIO:
+    if compression is None:
+        return open(path, 'wb')
+    if compression == "gzip":
+        return gzip.open(path, 'wb', compresslevel=6)
+    return zstandard.ZstdCompressor(level=10).stream_writer(open(path, 'wb'), closefd=True)
+
+
+def transcode_file(source: Path, source_compression: Optional[str],
+                   destination: Path, destination_compression: Optional[str]) -> None:
+    """
+    Copy a stored file between tiers, (de)compressing it on the way
+
+    The destination is written to a temporary file and renamed into place,
+    so it never exists half-written.
+    """
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = destination.with_name(destination.name + ".part")
+    try:
+        with open_tiered(source, source_compression) as src, _open_for_write(tmp_path, destination_compression) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        shutil.copystat(source, tmp_path)
+        os.replace(tmp_path, destination)
+    except OSError as e:
+        tmp_path.unlink(missing_ok=True)
+        raise FileStorageError(f"Failed to move file between storage tiers: {str(e)}")
@@ -31,10 +31,6 @@ LOGS_DIR = BASE_DIR / "logs"
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 LOGS_DIR.mkdir(parents=True, exist_ok=True)
 
-# --- Импорты внешних библиотек ---
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-
 # --- Импорт собственных модулей ---
 from .utils.logger import setup_logger
 from .database.init_db import init_db
@@ -43,10 +39,6 @@ from PyQt5.QtWidgets import QApplication
 from .config.settings import settings
 from .exceptions import BaseStrodServiceException
 
-# --- Engine базы данных ---
-DB_FILE = DATA_DIR / "ksk.db"
-from .database.init_db import engine, SessionLocal
-
 def main():
     """Main entry point for the application."""
     try:
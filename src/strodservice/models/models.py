@@ -1,6 +1,6 @@
 from sqlalchemy import (
     Column, Integer, String, Float,
-    ForeignKey, DateTime, Text
+    ForeignKey, Date, DateTime, Text, Index
 )
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -41,6 +41,10 @@ class Organization(Base, AuditMixin):
 
 class Material(Base, AuditMixin):
     __tablename__ = "materials"
+    # В существующих базах индекс создает миграция m0005_sync_changes
+    __table_args__ = (
+        Index('ix_materials_updated_at_id', 'updated_at', 'id'),
+    )
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
     unit = Column(String(50), nullable=False)
@@ -100,6 +104,10 @@ class LineType(Base, AuditMixin):
 
 class Object(Base, AuditMixin):
     __tablename__ = "objects"
+    # В существующих базах индекс создает миграция m0005_sync_changes
+    __table_args__ = (
+        Index('ix_objects_updated_at_id', 'updated_at', 'id'),
+    )
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
     location = Column(String(500), nullable=True)
@@ -126,6 +134,10 @@ class Object(Base, AuditMixin):
 
 class Document(Base, AuditMixin):
     __tablename__ = 'documents'
+    # В существующих базах эти индексы создает миграция m0001_report_indexes
+    __table_args__ = (
+        Index('ix_documents_object_id_type', 'object_id', 'type'),
+    )
     id = Column(Integer, primary_key=True, index=True)
     object_id = Column(Integer, ForeignKey('objects.id'), nullable=False)
     type = Column(String(100), nullable=False)  # ИД, Акт, Протокол
@@ -189,7 +201,16 @@ class Contractor(Base, AuditMixin):
 
 class FieldData(Base, AuditMixin):
     __tablename__ = 'field_data'
-    id = Column(Integer, primary_key=True, index=True)
+    # В существующих базах эти индексы создает миграция m0001_report_indexes
+    __table_args__ = (
+        Index('ix_field_data_object_id_date', 'object_id', 'date'),
+        Index('ix_field_data_date', 'date'),
+        Index('ix_field_data_line_type_id_date', 'line_type_id', 'date'),
+        Index('ix_field_data_updated_at_id', 'updated_at', 'id'),
+    )
+    # Без index=True: отдельный индекс дублирует первичный ключ и замедляет
+    # вставку (в существующих базах его удаляет миграция m0004)
+    id = Column(Integer, primary_key=True)
     object_id = Column(Integer, ForeignKey('objects.id'), nullable=False)
     line_type_id = Column(Integer, ForeignKey('line_types.id'), nullable=False)
     length = Column(Float)  # в метрах
@@ -226,6 +247,48 @@ class FieldData(Base, AuditMixin):
             raise ModelValidationError("Photo path cannot exceed 500 characters")
 
 
+class FieldDataDaily(Base):
+    """
+    Суточные итоги полевых данных по объекту и типу линии.
+
+    Строки пересчитываются при сохранении FieldData через ORM (см.
+    services/field_rollup.py); материал определяется через тип линии при
+    чтении, поэтому смена материала типа линии не требует пересчета.
+    """
+    __tablename__ = 'field_data_daily'
+    # В существующих базах таблицу создает и заполняет миграция m0003_field_data_daily
+    __table_args__ = (
+        Index('ix_field_data_daily_day', 'day'),
+    )
+    object_id = Column(Integer, primary_key=True)
+    line_type_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    records = Column(Integer, nullable=False, default=0)
+    total_length = Column(Float, nullable=False, default=0.0)
+    total_area = Column(Float, nullable=False, default=0.0)  # сумма длина × ширина
+    total_material_used = Column(Float, nullable=False, default=0.0)
+    material_records = Column(Integer, nullable=False, default=0)  # записей с указанным расходом
+
+
+class DeletedRecord(Base):
+    """
+    Отметка об удалении записи для инкрементальной синхронизации клиентов.
+
+    Строки добавляются при удалении объектов, материалов и полевых данных
+    через ORM (см. services/sync_changes.py) и удаляются по истечении
+    settings.SYNC_TOMBSTONE_RETENTION_DAYS.
+    """
+    __tablename__ = 'deleted_records'
+    # В существующих базах таблицу создает миграция m0005_sync_changes
+    __table_args__ = (
+        Index('ix_deleted_records_table_name_deleted_at_id', 'table_name', 'deleted_at', 'id'),
+    )
+    id = Column(Integer, primary_key=True)
+    table_name = Column(String(64), nullable=False)
+    record_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
 # Update the relationships after all classes are defined
 Material.line_types = relationship("LineType", back_populates="material")
 Object.documents = relationship("Document", back_populates="object", cascade="all, delete-orphan")
@@ -5,8 +5,7 @@ import sys
 BASE_DIR = Path(__file__).resolve().parents[2]   # два уровня вверх → корень проекта
 sys.path.insert(0, str(BASE_DIR))
 from PyQt5.QtWidgets import QMessageBox
-import smtplib
-from email.mime.text import MimeText
+from strodservice.services.notification_outbox import get_outbox
 
 def notify_manager_low_material(material_name, required_amount):
     msg = f"Уведомление: Необходимо заказать {material_name}, недостаёт {required_amount} ед."
@@ -14,16 +13,5 @@ def notify_manager_low_material(material_name, required_amount):
     QMessageBox.warning(None, "Нехватка материалов", msg)
 
 def send_email_notification(to_email, subject, body):
-    # Пример отправки email
-    msg = MimeText(body)
-    msg['Subject'] = subject
-    msg['From'] = 'admin@company.com'
-    msg['To'] = to_email
-
-    try:
-        with smtplib.SMTP('smtp.gmail.com', 587) as server:
-            server.starttls()
-            server.login('your_email@gmail.com', 'password')
-            server.send_message(msg)
-    except Exception as e:
-        print(f"Ошибка отправки email: {e}")
\ No newline at end of file
+    # Письмо ставится в очередь и отправляется в фоне (services/notification_outbox.py)
+    return get_outbox().enqueue('email', to_email, body, subject=subject)
\ No newline at end of file
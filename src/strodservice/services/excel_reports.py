@@ -7,6 +7,9 @@ sys.path.insert(0, str(BASE_DIR))
 import pandas as pd
 from strodservice.models.models import FieldData, Object
 from strodservice.database.init_db import SessionLocal
+from strodservice.services.report_queries import (
+    summarize_field_data, aggregate_field_data, GROUPINGS
+)
 from datetime import datetime
 
 def generate_excel_report(filepath):
@@ -29,4 +32,34 @@ def generate_excel_report(filepath):
         for d in data
     ])
 
-    df.to_excel(filepath, index=False, engine='openpyxl')
\ No newline at end of file
+    df.to_excel(filepath, index=False, engine='openpyxl')
+
+
+def generate_summary_excel_report(filepath, start_date, end_date, group_by='month', object_id=None):
+    """Сводный отчет в Excel: итоги за период и группировка, вычисленные в базе данных"""
+    session = SessionLocal()
+    try:
+        totals = summarize_field_data(session, start_date, end_date, object_id)
+        groups = aggregate_field_data(session, start_date, end_date, group_by, object_id)
+    finally:
+        session.close()
+
+    summary = pd.DataFrame([{
+        'Начало периода': start_date,
+        'Конец периода': end_date,
+        'Записей': totals.records,
+        'Общая длина': totals.total_length,
+        'Общая площадь': totals.total_area,
+        'Использовано': totals.total_material_used,
+        'Среднее на запись': totals.avg_material_used,
+    }])
+    details = pd.DataFrame(
+        [(g.key, g.records, g.total_length, g.total_area, g.total_material_used, g.avg_material_used)
+         for g in groups],
+        columns=[GROUPINGS[group_by], 'Записей', 'Общая длина', 'Общая площадь', 'Использовано',
+                 'Среднее на запись'],
+    )
+
+    with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
+        summary.to_excel(writer, sheet_name='Итоги', index=False)
+        details.to_excel(writer, sheet_name='Детализация', index=False)
@@ -0,0 +1,234 @@
+"""
+Модуль массовой загрузки полевых данных.
+
+Используется для синхронизации накопленных бригадой офлайн-данных,
+импорта из ERP и заполнения тестовых баз. В отличие от создания объектов
+FieldData (проверка _validate в конструкторе и flush через unit of work
+для каждой записи), пакет проверяется одним проходом по строкам без
+создания объектов ORM и записывается запросами INSERT с executemany
+частями по settings.FIELD_DATA_BULK_CHUNK строк.
+
+Ошибочные строки не прерывают загрузку: они пропускаются и
+возвращаются в BulkInsertResult.errors с индексом строки во входном
+пакете. Итоги загруженных строк прибавляются к суточным итогам
+field_data_daily в той же транзакции.
+"""
+
+import math
+from operator import itemgetter
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timezone
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..config.settings import settings
+from ..models.models import FieldData, LineType, Object
+from .field_rollup import add_to_daily_rollup
+
+_TABLE = FieldData.__table__
+
+_COLUMNS = ('object_id', 'line_type_id', 'length', 'width', 'material_used',
+            'photo_path', 'date', 'notes', 'created_at', 'updated_at')
+
+# Для SQLite строки передаются драйверу напрямую (executemany): обработка
+# параметров SQLAlchemy для каждой строки занимает больше времени, чем
+# сама вставка. Даты записываются в формате типа DateTime SQLAlchemy.
+_SQLITE_INSERT = (
+    f"INSERT INTO field_data ({', '.join(_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(_COLUMNS))})"
+)
+
+# Максимальная длина photo_path (как в FieldData._validate)
+PHOTO_PATH_MAX_LENGTH = 500
+
+
+@dataclass
+class BulkInsertResult:
+    """Итог массовой загрузки: число записанных строк и ошибки по индексам строк"""
+    inserted: int = 0
+    errors: Dict[int, str] = field(default_factory=dict)
+
+
+def _number(value, name: str) -> Optional[float]:
+    if value is None:
+        return None
+    if type(value) is float:
+        number = value
+    elif isinstance(value, bool):
+        raise ValueError(f"Field data {name} must be a number")
+    else:
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Field data {name} must be a number") from None
+    if not math.isfinite(number):
+        raise ValueError(f"Field data {name} must be a finite number")
+    return number
+
+
+def _identifier(value, name: str) -> int:
+    if value is None:
+        raise ValueError(f"Field data {name} is required")
+    if type(value) is not int:
+        try:
+            value = int(str(value))
+        except ValueError:
+            raise ValueError(f"Field data {name} must be an integer") from None
+    return value
+
+
+def _moment(value, now: datetime) -> datetime:
+    if value is None:
+        return now
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError("Field data date must be a datetime or an ISO 8601 string") from None
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            # Даты хранятся в UTC без часового пояса (см. FieldData.date)
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, time.min)
+    raise ValueError("Field data date must be a datetime or an ISO 8601 string")
+
+
+def _clean_row(row: Mapping, now: datetime) -> dict:
+    """Проверенная строка для INSERT; ValueError с текстом ошибки, если строка неверна"""
+    length = _number(row.get('length'), 'length')
+    width = _number(row.get('width'), 'width')
+    material_used = _number(row.get('material_used'), 'material used')
+    if length is not None and length <= 0:
+        raise ValueError("Field data length must be positive")
+    if width is not None and width <= 0:
+        raise ValueError("Field data width must be positive")
+    if material_used is not None and material_used < 0:
+        raise ValueError("Field data material used cannot be negative")
+    photo_path = row.get('photo_path')
+    if photo_path and len(photo_path) > PHOTO_PATH_MAX_LENGTH:
+        raise ValueError("Photo path cannot exceed 500 characters")
+    return {
+        'object_id': _identifier(row.get('object_id'), 'object_id'),
+        'line_type_id': _identifier(row.get('line_type_id'), 'line_type_id'),
+        'length': length,
+        'width': width,
+        'material_used': material_used,
+        'photo_path': photo_path or None,
+        'date': _moment(row.get('date'), now),
+        'notes': row.get('notes'),
+        'created_at': now,
+        'updated_at': now,
+    }
+
+
+def validate_field_rows(rows: Iterable[Mapping]) -> Tuple[List[Tuple[int, dict]], Dict[int, str]]:
+    """
+    Проверяет пакет строк полевых данных без создания объектов ORM.
+
+    Проверки совпадают с FieldData._validate: длина и ширина
+    положительны, расход материала не отрицателен. Дата принимается как
+    datetime, date или строка ISO 8601; без даты - текущее время UTC.
+
+    Args:
+        rows: Строки (словари с полями FieldData)
+
+    Returns:
+        Tuple: Список (индекс, проверенная строка) и ошибки по индексам строк
+    """
+    now = datetime.utcnow()
+    valid = []
+    errors = {}
+    for index, row in enumerate(rows):
+        try:
+            valid.append((index, _clean_row(row, now)))
+        except ValueError as e:
+            errors[index] = str(e)
+        except (AttributeError, TypeError):
+            errors[index] = "Field data row must be a mapping"
+    return valid, errors
+
+
+def _existing_ids(connection, column, ids: Set[int]) -> Set[int]:
+    found = set()
+    ids = list(ids)
+    for offset in range(0, len(ids), 500):
+        found.update(connection.execute(select(column).where(column.in_(ids[offset:offset + 500]))).scalars())
+    return found
+
+
+def _check_references(connection, valid: List[Tuple[int, dict]], errors: Dict[int, str]):
+    """Убирает из valid строки со ссылками на несуществующие объекты и типы линий"""
+    objects = _existing_ids(connection, Object.id, {row['object_id'] for _, row in valid})
+    line_types = _existing_ids(connection, LineType.id, {row['line_type_id'] for _, row in valid})
+    checked = []
+    for index, row in valid:
+        if row['object_id'] not in objects:
+            errors[index] = f"Object {row['object_id']} not found"
+        elif row['line_type_id'] not in line_types:
+            errors[index] = f"Line type {row['line_type_id']} not found"
+        else:
+            checked.append((index, row))
+    return checked
+
+
+def _sqlite_rows(rows: List[dict]) -> List[tuple]:
+    # created_at и updated_at у всех строк пакета одинаковые (см. validate_field_rows)
+    stamps = {}
+    result = []
+    for row in rows:
+        stamp = row['created_at']
+        text = stamps.get(stamp)
+        if text is None:
+            text = stamps[stamp] = stamp.isoformat(' ', 'microseconds')
+        result.append((row['object_id'], row['line_type_id'], row['length'], row['width'],
+                       row['material_used'], row['photo_path'], row['date'].isoformat(' ', 'microseconds'),
+                       row['notes'], text, text))
+    return result
+
+
+def _insert_chunks(connection, rows: List[dict], chunk_size: int):
+    sqlite = connection.dialect.name == 'sqlite'
+    statement = _TABLE.insert()
+    for offset in range(0, len(rows), chunk_size):
+        chunk = rows[offset:offset + chunk_size]
+        if sqlite:
+            connection.exec_driver_sql(_SQLITE_INSERT, _sqlite_rows(chunk))
+        else:
+            connection.execute(statement, chunk)
+
+
+def bulk_insert_field_data(connection, rows: Iterable[Mapping], chunk_size: Optional[int] = None,
+                           check_references: bool = True) -> BulkInsertResult:
+    """
+    Проверяет и записывает пакет полевых данных в обход unit of work.
+
+    Транзакцией управляет вызывающий код: при передаче сессии строки
+    записываются в ее текущую транзакцию и фиксируются ее commit.
+
+    Args:
+        connection: Соединение или сессия базы данных
+        rows: Строки (словари с полями FieldData)
+        chunk_size: Строк в одном INSERT (по умолчанию settings.FIELD_DATA_BULK_CHUNK)
+        check_references: Проверять существование объектов и типов линий
+
+    Returns:
+        BulkInsertResult: Число записанных строк и ошибки по индексам строк
+    """
+    if isinstance(connection, Session):
+        connection = connection.connection()
+    chunk_size = chunk_size or settings.FIELD_DATA_BULK_CHUNK
+
+    valid, errors = validate_field_rows(rows)
+    if valid and check_references:
+        valid = _check_references(connection, valid, errors)
+    # По возрастанию даты записи попадают в индексы по дате почти
+    # последовательно: вставка быстрее, чем в случайном порядке
+    clean = sorted((row for _, row in valid), key=itemgetter('date'))
+
+    _insert_chunks(connection, clean, chunk_size)
+    add_to_daily_rollup(connection, clean)
+    return BulkInsertResult(inserted=len(clean), errors=errors)
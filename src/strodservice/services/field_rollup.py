@@ -0,0 +1,242 @@
+"""
+Модуль поддержки суточных итогов полевых данных (таблица field_data_daily).
+
+После каждого flush сессии SQLAlchemy, изменившего записи FieldData,
+затронутые группы (объект, тип линии, день) пересчитываются по исходным
+записям в той же транзакции: итоги не расходятся с данными даже при
+откате. Пересчет группы, а не прибавление разницы, делает обработку
+повторяемой и не требует старых значений сумм.
+
+Записи, добавленные в обход ORM (INSERT через connection.execute,
+импорт в другую базу), в итоги не попадают - после таких операций
+вызывается refresh_daily_rollup для затронутых групп или
+rebuild_daily_rollup за период. Массовая загрузка
+(services/field_import.py) прибавляет итоги своих строк через
+add_to_daily_rollup.
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from sqlalchemy import delete, event, func, insert, inspect, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from ..models.models import FieldData, FieldDataDaily
+
+# Группа итогов: (object_id, line_type_id, день)
+RollupKey = Tuple[int, int, date]
+
+# Атрибуты FieldData, от которых зависят итоги
+ROLLUP_ATTRIBUTES = ('object_id', 'line_type_id', 'date', 'length', 'width', 'material_used')
+
+_DAILY = FieldDataDaily.__table__
+
+# Ключ session.info с группами, собранными до flush
+_PENDING = 'field_rollup_pending'
+
+# Число id в одном условии IN
+_ID_CHUNK = 500
+
+
+def _day(value) -> Optional[date]:
+    if value is None:
+        return None
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _grouped_select():
+    """Итоги исходных записей по группам в порядке столбцов field_data_daily"""
+    day = func.date(FieldData.date)
+    return (
+        select(
+            FieldData.object_id,
+            FieldData.line_type_id,
+            day,
+            func.count(FieldData.id),
+            func.coalesce(func.sum(FieldData.length), 0.0),
+            func.coalesce(func.sum(FieldData.length * FieldData.width), 0.0),
+            func.coalesce(func.sum(FieldData.material_used), 0.0),
+            func.count(FieldData.material_used),
+        )
+        .where(FieldData.date.isnot(None))
+        .group_by(FieldData.object_id, FieldData.line_type_id, day)
+    )
+
+
+_COLUMNS = ['object_id', 'line_type_id', 'day', 'records', 'total_length',
+            'total_area', 'total_material_used', 'material_records']
+
+
+def refresh_daily_rollup(connection, keys: Iterable[RollupKey]) -> int:
+    """
+    Пересчитывает итоги указанных групп по исходным записям.
+
+    Args:
+        connection: Соединение или сессия базы данных
+        keys: Группы (object_id, line_type_id, день)
+
+    Returns:
+        int: Число пересчитанных групп
+    """
+    keys = set(keys)
+    for object_id, line_type_id, day in keys:
+        start = datetime.combine(day, time.min)
+        connection.execute(delete(_DAILY).where(
+            _DAILY.c.object_id == object_id,
+            _DAILY.c.line_type_id == line_type_id,
+            _DAILY.c.day == day,
+        ))
+        connection.execute(insert(_DAILY).from_select(_COLUMNS, _grouped_select().where(
+            FieldData.object_id == object_id,
+            FieldData.line_type_id == line_type_id,
+            FieldData.date >= start,
+            FieldData.date < start + timedelta(days=1),
+        )))
+    return len(keys)
+
+
+_SUMMED = ('records', 'total_length', 'total_area', 'total_material_used', 'material_records')
+
+# Для SQLite запрос передается драйверу напрямую: обработка параметров
+# SQLAlchemy (преобразование дат для каждой строки) заметна при десятках
+# тысяч групп. День хранится в формате типа Date SQLAlchemy (YYYY-MM-DD).
+_SQLITE_UPSERT = (
+    f"INSERT INTO field_data_daily ({', '.join(_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(_COLUMNS))}) "
+    "ON CONFLICT (object_id, line_type_id, day) DO UPDATE SET "
+    + ", ".join(f"{name} = {name} + excluded.{name}" for name in _SUMMED)
+)
+
+
+def _summarize_rows(rows: Iterable[Mapping]) -> Dict[RollupKey, List[float]]:
+    """Итоги строк по группам: те же правила, что у _grouped_select (NULL не суммируется)"""
+    groups = {}
+    for row in rows:
+        key = (row['object_id'], row['line_type_id'], _day(row['date']))
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = [0, 0.0, 0.0, 0.0, 0]
+        length, width, material_used = row['length'], row['width'], row['material_used']
+        group[0] += 1
+        if length is not None:
+            group[1] += length
+            if width is not None:
+                group[2] += length * width
+        if material_used is not None:
+            group[3] += material_used
+            group[4] += 1
+    return groups
+
+
+def add_to_daily_rollup(connection, rows: Iterable[Mapping]) -> int:
+    """
+    Прибавляет к итогам новые записи, вставленные в обход ORM.
+
+    Итоги считаются по самим строкам, а не по таблице field_data, поэтому
+    стоимость зависит от размера пакета, а не от числа записей в базе.
+    Подходит только для новых записей; измененные и удаленные записи
+    пересчитываются через refresh_daily_rollup. В SQLite и PostgreSQL
+    итоги прибавляются через INSERT ... ON CONFLICT, в остальных базах
+    затронутые группы пересчитываются refresh_daily_rollup.
+
+    Args:
+        connection: Соединение базы данных
+        rows: Вставленные строки (словари с object_id, line_type_id, date,
+              length, width, material_used)
+
+    Returns:
+        int: Число затронутых групп
+    """
+    groups = _summarize_rows(rows)
+    if not groups:
+        return 0
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        connection.exec_driver_sql(_SQLITE_UPSERT, [
+            (object_id, line_type_id, day.isoformat(), *totals)
+            for (object_id, line_type_id, day), totals in groups.items()
+        ])
+        return len(groups)
+    if dialect != 'postgresql':
+        return refresh_daily_rollup(connection, groups)
+    statement = postgresql.insert(_DAILY)
+    statement = statement.on_conflict_do_update(
+        index_elements=[_DAILY.c.object_id, _DAILY.c.line_type_id, _DAILY.c.day],
+        set_={name: _DAILY.c[name] + statement.excluded[name] for name in _SUMMED},
+    )
+    connection.execute(statement, [
+        dict(zip(_COLUMNS, key + tuple(totals))) for key, totals in groups.items()
+    ])
+    return len(groups)
+
+
+def rebuild_daily_rollup(connection, start_date: Optional[date] = None,
+                         end_date: Optional[date] = None) -> None:
+    """
+    Полностью пересчитывает итоги за период (по умолчанию за все время).
+
+    Args:
+        connection: Соединение или сессия базы данных
+        start_date: Первый день периода или None
+        end_date: Последний день периода или None
+    """
+    remove = delete(_DAILY)
+    source = _grouped_select()
+    if start_date is not None:
+        remove = remove.where(_DAILY.c.day >= start_date)
+        source = source.where(FieldData.date >= datetime.combine(start_date, time.min))
+    if end_date is not None:
+        remove = remove.where(_DAILY.c.day <= end_date)
+        source = source.where(FieldData.date < datetime.combine(end_date, time.min) + timedelta(days=1))
+    connection.execute(remove)
+    connection.execute(insert(_DAILY).from_select(_COLUMNS, source))
+
+
+def _stored_keys(connection, ids) -> Set[RollupKey]:
+    """Группы, к которым записи с указанными id относятся в базе"""
+    keys = set()
+    ids = list(ids)
+    for offset in range(0, len(ids), _ID_CHUNK):
+        rows = connection.execute(
+            select(FieldData.object_id, FieldData.line_type_id, FieldData.date)
+            .where(FieldData.id.in_(ids[offset:offset + _ID_CHUNK]))
+        )
+        for object_id, line_type_id, moment in rows:
+            if moment is not None:
+                keys.add((object_id, line_type_id, _day(moment)))
+    return keys
+
+
+def _rollup_changed(record: FieldData) -> bool:
+    state = inspect(record)
+    return any(state.attrs[name].history.has_changes() for name in ROLLUP_ATTRIBUTES)
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_before_flush(session, flush_context, instances):
+    # Прежние группы измененных и удаляемых записей читаются из базы до
+    # flush: у объекта, загруженного в другой транзакции, старых значений
+    # в истории атрибутов нет
+    changed = [record.id for record in session.dirty
+               if isinstance(record, FieldData) and record.id is not None and _rollup_changed(record)]
+    deleted = [record.id for record in session.deleted
+               if isinstance(record, FieldData) and record.id is not None]
+    if not changed and not deleted:
+        return
+    pending = session.info.setdefault(_PENDING, {'keys': set(), 'changed': set()})
+    pending['keys'] |= _stored_keys(session.connection(), changed + deleted)
+    pending['changed'].update(changed)
+
+
+@event.listens_for(Session, 'after_flush')
+def _refresh_after_flush(session, flush_context):
+    pending = session.info.pop(_PENDING, None)
+    keys = set(pending['keys']) if pending else set()
+    for record in session.new:
+        if isinstance(record, FieldData) and record.date is not None:
+            keys.add((record.object_id, record.line_type_id, _day(record.date)))
+    if pending and pending['changed']:
+        keys |= _stored_keys(session.connection(), pending['changed'])
+    if keys:
+        refresh_daily_rollup(session.connection(), keys)
@@ -0,0 +1,87 @@
+"""
+Модуль поиска по текстовым столбцам списков (объекты, материалы, документы).
+
+Условие поиска строится так, чтобы использовать индексы миграции
+m0002_search_indexes. В SQLite при наличии таблицы FTS5 каждое слово
+запроса ищется как начало слова в столбце (запрос "ул твер" найдет
+"улица Тверская"), регистр не учитывается и для кириллицы. Без FTS5 и в
+PostgreSQL (где ILIKE '%...%' обслуживает триграммный индекс) каждое
+слово запроса ищется как подстрока.
+"""
+
+import re
+import weakref
+from typing import Optional
+
+from sqlalchemy import and_, column, inspect, literal_column, select, table
+from sqlalchemy.orm import Session
+
+from ..database.migrations.m0002_search_indexes import SEARCH_INDEXES
+
+# Таблица FTS для каждого индексированного столбца: (таблица, столбец) -> FTS
+_FTS_TABLES = {(source, name): fts for fts, source, name in SEARCH_INDEXES}
+
+# Найденные в базе таблицы FTS для каждого движка
+_available = weakref.WeakKeyDictionary()
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def _fts_table(session: Session, searched_column) -> Optional[str]:
+    fts = _FTS_TABLES.get((searched_column.table.name, searched_column.name))
+    if fts is None:
+        return None
+    engine = session.get_bind()
+    if engine.dialect.name != "sqlite":
+        return None
+    tables = _available.get(engine)
+    if tables is None:
+        tables = set(inspect(engine).get_table_names()) & set(_FTS_TABLES.values())
+        _available[engine] = tables
+    return fts if fts in tables else None
+
+
+def fts_match_expression(search_text: str) -> Optional[str]:
+    """
+    Выражение MATCH для FTS5: каждое слово как префикс, все слова обязательны.
+
+    Returns:
+        str: Например '"ул"* "твер"*', или None, если в тексте нет слов
+    """
+    words = _WORD.findall(search_text)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def text_search(session: Session, searched_column, search_text: str):
+    """
+    Условие поиска текста в столбце модели.
+
+    Args:
+        session: Сессия базы данных
+        searched_column: Столбец модели, например Object.name
+        search_text: Введенный пользователем текст
+
+    Returns:
+        Условие для Query.filter или None, если текст пустой
+    """
+    search_text = search_text.strip()
+    if not search_text:
+        return None
+    fts = _fts_table(session, searched_column)
+    match = fts_match_expression(search_text) if fts else None
+    if match is None:
+        # Как и в FTS, каждое слово должно встретиться в тексте столбца
+        return and_(*(searched_column.icontains(word, autoescape=True)
+                      for word in search_text.split()))
+    fts_table = table(fts, column("rowid"))
+    matched_ids = select(fts_table.c.rowid).where(literal_column(fts).op("MATCH")(match))
+    primary_key = searched_column.table.c.id
+    return primary_key.in_(matched_ids)
+
+
+def apply_text_search(query, session: Session, searched_column, search_text: str):
+    """Добавляет к запросу условие text_search, если текст не пустой"""
+    condition = text_search(session, searched_column, search_text)
+    return query if condition is None else query.filter(condition)
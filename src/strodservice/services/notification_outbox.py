@@ -0,0 +1,535 @@
+"""
+Модуль исходящей очереди уведомлений (email, SMS, Telegram).
+
+Обработчики запросов API и окна приложения не отправляют уведомления
+сами: сообщение записывается в локальную базу SQLite
+(settings.NOTIFY_OUTBOX_PATH), и вызов сразу возвращает управление, поэтому
+время ответа не зависит от почтового сервера, Twilio или Telegram.
+Пул фоновых потоков забирает готовые к отправке сообщения и доставляет их
+через транспорты каналов:
+
+- SMTP-соединение открывается один раз (STARTTLS и вход) и используется
+  для следующих писем, пока простаивает не дольше settings.SMTP_IDLE_SECONDS;
+- сообщения с одинаковым ключом сводки (digest) для одного получателя,
+  поставленные в течение settings.NOTIFY_DIGEST_SECONDS, отправляются
+  одним сводным сообщением;
+- при ошибке отправка повторяется с экспоненциально растущей паузой;
+  после settings.NOTIFY_MAX_ATTEMPTS попыток или при постоянной ошибке
+  (например, получатель отклонен сервером) сообщение переносится в
+  таблицу dead_letters, откуда его можно вернуть в очередь.
+
+Поток забирает сообщение «в аренду»: available_at сдвигается на
+settings.NOTIFY_LEASE_SECONDS, и после падения процесса недоставленные
+сообщения будут отправлены повторно. Гарантия доставки - «как минимум
+один раз».
+"""
+
+import atexit
+import logging
+import smtplib
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from email.mime.text import MIMEText
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from ..config.settings import settings
+from ..exceptions import DeliveryError, ValidationError
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel TEXT NOT NULL,
+    recipient TEXT NOT NULL,
+    subject TEXT,
+    body TEXT NOT NULL,
+    digest TEXT,
+    created_at REAL NOT NULL,
+    available_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_outbox_available_at ON outbox (available_at, id);
+CREATE TABLE IF NOT EXISTS dead_letters (
+    id INTEGER PRIMARY KEY,
+    channel TEXT NOT NULL,
+    recipient TEXT NOT NULL,
+    subject TEXT,
+    body TEXT NOT NULL,
+    digest TEXT,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL,
+    last_error TEXT,
+    failed_at REAL NOT NULL
+);
+"""
+
+_COLUMNS = ('id', 'channel', 'recipient', 'subject', 'body', 'digest', 'created_at', 'attempts', 'last_error')
+
+
+@dataclass
+class Message:
+    """Сообщение для транспорта; сводное сообщение объединяет несколько записей очереди"""
+    channel: str
+    recipient: str
+    subject: Optional[str]
+    body: str
+    ids: List[int]
+
+
+class SmtpTransport:
+    """Отправка писем через одно переиспользуемое SMTP-соединение"""
+
+    def __init__(self, host=None, port=None, username=None, password=None, sender=None,
+                 starttls=None, timeout=None, idle_seconds=None, clock: Callable[[], float] = time.monotonic):
+        self.host = host or settings.SMTP_HOST
+        self.port = port or settings.SMTP_PORT
+        self.username = settings.SMTP_USERNAME if username is None else username
+        self.password = settings.SMTP_PASSWORD if password is None else password
+        self.sender = sender or settings.SMTP_FROM
+        self.starttls = settings.SMTP_STARTTLS if starttls is None else starttls
+        self.timeout = timeout or settings.SMTP_TIMEOUT
+        self.idle_seconds = settings.SMTP_IDLE_SECONDS if idle_seconds is None else idle_seconds
+        self._clock = clock
+        self._server = None
+        self._last_used = 0.0
+
+    def _connection(self) -> smtplib.SMTP:
+        if self._server is not None and self._clock() - self._last_used > self.idle_seconds:
+            # Сервер, скорее всего, уже закрыл соединение со своей стороны
+            self.close()
+        if self._server is None:
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            try:
+                if self.starttls:
+                    server.starttls()
+                if self.username:
+                    server.login(self.username, self.password)
+            except Exception:
+                server.close()
+                raise
+            self._server = server
+        return self._server
+
+    def send(self, message: Message):
+        msg = MIMEText(message.body)
+        msg['Subject'] = message.subject or ''
+        msg['From'] = self.sender
+        msg['To'] = message.recipient
+        try:
+            try:
+                self._connection().send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                # Соединение закрыто сервером - одна попытка через новое
+                self.close()
+                self._connection().send_message(msg)
+        except smtplib.SMTPRecipientsRefused as e:
+            raise DeliveryError(f"Получатель отклонен: {e.recipients}", "rejected", permanent=True) from None
+        self._last_used = self._clock()
+
+    def close(self):
+        server, self._server = self._server, None
+        if server is not None:
+            try:
+                server.quit()
+            except (smtplib.SMTPException, OSError):
+                server.close()
+
+
+class TwilioSmsTransport:
+    """Отправка SMS через Twilio (клиент создается один раз на поток)"""
+
+    def __init__(self, account_sid=None, auth_token=None, sender=None):
+        self.account_sid = account_sid or settings.TWILIO_ACCOUNT_SID
+        self.auth_token = auth_token or settings.TWILIO_AUTH_TOKEN
+        self.sender = sender or settings.TWILIO_FROM_NUMBER
+        self._client = None
+
+    def send(self, message: Message):
+        if self._client is None:
+            from twilio.rest import Client
+            self._client = Client(self.account_sid, self.auth_token)
+        self._client.messages.create(body=message.body, from_=self.sender, to=message.recipient)
+
+    def close(self):
+        self._client = None
+
+
+class TelegramTransport:
+    """Отправка сообщений ботом Telegram через сессию requests с keep-alive"""
+
+    def __init__(self, token=None, timeout=None):
+        self.token = token or settings.TELEGRAM_BOT_TOKEN
+        self.timeout = timeout or settings.API_TIMEOUT
+        self._session = None
+
+    def send(self, message: Message):
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        response = self._session.post(f"https://api.telegram.org/bot{self.token}/sendMessage",
+                                      data={'chat_id': message.recipient, 'text': message.body},
+                                      timeout=self.timeout)
+        if response.status_code in (400, 403):
+            # Неверный chat_id или бот удален из чата - повтор не поможет
+            raise DeliveryError(f"Telegram отклонил сообщение: {response.text}", "rejected", permanent=True)
+        response.raise_for_status()
+
+    def close(self):
+        session, self._session = self._session, None
+        if session is not None:
+            session.close()
+
+
+class FakeSink:
+    """
+    Транспорт для тестов и разработки: сохраняет сообщения в памяти.
+
+    Args:
+        fail_times: Сколько первых отправок завершить ошибкой
+        permanent: Считать ли эти ошибки постоянными
+        delay: Пауза перед каждой отправкой в секундах (медленный сервер)
+    """
+
+    def __init__(self, fail_times=0, permanent=False, delay=0.0, logger=None):
+        self.sent: List[Message] = []
+        self.fail_times = fail_times
+        self.permanent = permanent
+        self.delay = delay
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+    def send(self, message: Message):
+        if self.delay:
+            time.sleep(self.delay)
+        with self._lock:
+            if self.fail_times:
+                self.fail_times -= 1
+                raise DeliveryError("Тестовый получатель отклонил сообщение", "fake", permanent=self.permanent)
+            self.sent.append(message)
+        self.logger.info(f"[{message.channel}] {message.recipient}: {message.subject or ''} {message.body}")
+
+    def close(self):
+        pass
+
+
+def default_transports() -> Dict[str, Callable[[], object]]:
+    """Фабрики транспортов каналов по настройкам (по одному экземпляру на рабочий поток)"""
+    if settings.NOTIFY_FAKE_SINK:
+        sink = FakeSink()
+        return {channel: (lambda: sink) for channel in ('email', 'sms', 'telegram')}
+    return {'email': SmtpTransport, 'sms': TwilioSmsTransport, 'telegram': TelegramTransport}
+
+
+class NotificationOutbox:
+    """
+    Постоянная очередь уведомлений с пулом рабочих потоков.
+
+    Args:
+        path: Файл базы очереди (по умолчанию NOTIFY_OUTBOX_PATH)
+        transports: Фабрики транспортов по каналам (по умолчанию default_transports())
+        workers: Число рабочих потоков (по умолчанию NOTIFY_WORKERS)
+        clock: Источник времени для меток очереди, секунды Unix
+        logger: Объект логгера (опционально)
+    """
+
+    def __init__(self, path=None, transports: Optional[Dict[str, Callable[[], object]]] = None,
+                 workers=None, clock: Callable[[], float] = time.time, logger=None):
+        self.path = Path(path or settings.NOTIFY_OUTBOX_PATH)
+        self.transport_factories = transports or default_transports()
+        self.workers = workers or settings.NOTIFY_WORKERS
+        self.logger = logger or logging.getLogger(__name__)
+        self._clock = clock
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._shared: Optional[sqlite3.Connection] = None
+        self._shared_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._signals = 0
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as connection:
+            connection.executescript(_SCHEMA)
+
+    def _open(self) -> sqlite3.Connection:
+        """Новое соединение с базой очереди (режим autocommit, транзакции явные)"""
+        connection = sqlite3.connect(self.path, timeout=settings.SQLITE_BUSY_TIMEOUT_MS / 1000,
+                                     isolation_level=None, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        with self._lock:
+            self._connections.append(connection)
+        return connection
+
+    @contextmanager
+    def _connection(self):
+        """
+        Соединение для текущего потока.
+
+        Рабочие потоки держат собственные соединения. Остальные потоки
+        (обработчики запросов, окна приложения) живут недолго, поэтому
+        используют одно общее соединение по очереди и не оставляют после
+        себя открытых соединений.
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            yield connection
+            return
+        with self._shared_lock:
+            if self._shared is None:
+                self._shared = self._open()
+            yield self._shared
+
+    @contextmanager
+    def _transaction(self):
+        with self._connection() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    def enqueue(self, channel: str, recipient: str, body: str, subject: Optional[str] = None,
+                digest: Optional[str] = None) -> int:
+        """
+        Ставит сообщение в очередь и возвращает его id.
+
+        Сообщение с ключом digest ждет settings.NOTIFY_DIGEST_SECONDS и
+        отправляется вместе с другими сообщениями этого получателя с тем
+        же ключом, поставленными за это время.
+
+        Raises:
+            ValidationError: Если для канала нет транспорта
+        """
+        if channel not in self.transport_factories:
+            raise ValidationError(f"Неизвестный канал уведомлений: {channel}", "unknown_channel")
+        now = self._clock()
+        available_at = now
+        with self._transaction() as connection:
+            if digest is not None:
+                # Присоединяемся к ожидающей сводке или открываем новую
+                waiting = connection.execute(
+                    "SELECT MIN(available_at) FROM outbox WHERE channel = ? AND recipient = ? "
+                    "AND digest = ? AND attempts = 0 AND available_at > ?",
+                    (channel, recipient, digest, now)).fetchone()[0]
+                available_at = waiting if waiting is not None else now + settings.NOTIFY_DIGEST_SECONDS
+            message_id = connection.execute(
+                "INSERT INTO outbox (channel, recipient, subject, body, digest, created_at, available_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (channel, recipient, subject, body, digest, now, available_at)).lastrowid
+        with self._wakeup:
+            self._signals += 1
+            self._wakeup.notify()
+        return message_id
+
+    def _claim(self, limit: int) -> List[tuple]:
+        """Забирает в аренду готовые к отправке сообщения"""
+        now = self._clock()
+        with self._connection() as connection:
+            rows = connection.execute(
+                "UPDATE outbox SET available_at = ?, attempts = attempts + 1 "
+                "WHERE id IN (SELECT id FROM outbox WHERE available_at <= ? ORDER BY available_at, id LIMIT ?) "
+                "RETURNING id, channel, recipient, subject, body, digest, attempts",
+                (now + settings.NOTIFY_LEASE_SECONDS, now, limit)).fetchall()
+        return sorted(rows)
+
+    @staticmethod
+    def _group(rows) -> List[tuple]:
+        """Объединяет сообщения одной сводки; возвращает пары (Message, число попыток)"""
+        groups: Dict[tuple, list] = {}
+        for row in rows:
+            message_id, channel, recipient, subject, body, digest, attempts = row
+            key = (channel, recipient, digest) if digest is not None else (message_id,)
+            groups.setdefault(key, []).append(row)
+        messages = []
+        for group in groups.values():
+            _, channel, recipient, subject, body, _, _ = group[0]
+            if len(group) > 1:
+                subject = f"{subject} (сообщений: {len(group)})" if subject else None
+                body = "\n".join(row[4] for row in group)
+            messages.append((Message(channel, recipient, subject, body, [row[0] for row in group]),
+                             max(row[6] for row in group)))
+        return messages
+
+    def _transports(self) -> Dict[str, object]:
+        """Экземпляры транспортов текущего потока"""
+        transports = getattr(self._local, 'transports', None)
+        if transports is None:
+            transports = {channel: factory() for channel, factory in self.transport_factories.items()}
+            self._local.transports = transports
+        return transports
+
+    def process_due(self, limit: Optional[int] = None) -> int:
+        """
+        Один проход рабочего потока: отправляет готовые сообщения.
+
+        Returns:
+            int: Число обработанных записей очереди (отправленных и неудачных)
+        """
+        rows = self._claim(limit or settings.NOTIFY_BATCH_SIZE)
+        transports = self._transports()
+        for message, attempts in self._group(rows):
+            try:
+                transport = transports.get(message.channel)
+                if transport is None:
+                    raise DeliveryError(f"Нет транспорта для канала {message.channel}", "unknown_channel",
+                                        permanent=True)
+                transport.send(message)
+            except Exception as e:
+                self._fail(message, attempts, e)
+            else:
+                self._delete(message.ids)
+        return len(rows)
+
+    def _delete(self, ids: List[int]):
+        marks = ", ".join("?" * len(ids))
+        with self._connection() as connection:
+            connection.execute(f"DELETE FROM outbox WHERE id IN ({marks})", ids)
+
+    def _fail(self, message: Message, attempts: int, error: Exception):
+        """Планирует повтор или переносит сообщения в dead_letters"""
+        now = self._clock()
+        marks = ", ".join("?" * len(message.ids))
+        text = f"{type(error).__name__}: {error}"
+        if getattr(error, 'permanent', False) or attempts >= settings.NOTIFY_MAX_ATTEMPTS:
+            with self._transaction() as connection:
+                connection.execute(
+                    f"INSERT INTO dead_letters ({', '.join(_COLUMNS)}, failed_at) "
+                    f"SELECT {', '.join(_COLUMNS[:-1])}, ?, ? FROM outbox WHERE id IN ({marks})",
+                    (text, now, *message.ids))
+                connection.execute(f"DELETE FROM outbox WHERE id IN ({marks})", message.ids)
+            self.logger.error(f"Уведомление {message.channel} для {message.recipient} не доставлено "
+                              f"после {attempts} попыток: {text}")
+            return
+        delay = min(settings.NOTIFY_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.NOTIFY_RETRY_MAX_SECONDS)
+        with self._connection() as connection:
+            connection.execute(
+                f"UPDATE outbox SET available_at = ?, last_error = ? WHERE id IN ({marks})",
+                (now + delay, text, *message.ids))
+        self.logger.warning(f"Ошибка отправки {message.channel} для {message.recipient} "
+                            f"(попытка {attempts}), повтор через {delay:.0f} с: {text}")
+
+    def pending_count(self) -> int:
+        """Число сообщений в очереди, включая ожидающие повтора"""
+        with self._connection() as connection:
+            return connection.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def dead_letters(self, limit: int = 100) -> List[Dict]:
+        """Недоставленные сообщения, начиная с последних"""
+        with self._connection() as connection:
+            cursor = connection.execute(
+                f"SELECT {', '.join(_COLUMNS)}, failed_at FROM dead_letters ORDER BY failed_at DESC, id DESC LIMIT ?",
+                (limit,))
+            names = [column[0] for column in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def retry_dead(self, ids: Optional[List[int]] = None) -> int:
+        """
+        Возвращает недоставленные сообщения в очередь (все, если ids не заданы).
+
+        Returns:
+            int: Число возвращенных сообщений
+        """
+        where, params = "", []
+        if ids is not None:
+            if not ids:
+                return 0
+            where, params = f" WHERE id IN ({', '.join('?' * len(ids))})", list(ids)
+        with self._transaction() as connection:
+            moved = connection.execute(
+                "INSERT INTO outbox (id, channel, recipient, subject, body, digest, created_at, available_at) "
+                f"SELECT id, channel, recipient, subject, body, digest, created_at, ? FROM dead_letters{where}",
+                (self._clock(), *params)).rowcount
+            connection.execute(f"DELETE FROM dead_letters{where}", params)
+        with self._wakeup:
+            self._signals += 1
+            self._wakeup.notify()
+        return moved
+
+    def start(self):
+        """Запускает пул рабочих потоков (повторный вызов ничего не делает)"""
+        with self._lock:
+            if self._threads:
+                return
+            self._stopping.clear()
+            self._threads = [threading.Thread(target=self._run, name=f"outbox-{index}", daemon=True)
+                             for index in range(self.workers)]
+            for thread in self._threads:
+                thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Останавливает рабочие потоки; неотправленные сообщения остаются в очереди"""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        self._stopping.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for thread in threads:
+            thread.join(timeout)
+
+    def close(self):
+        """Останавливает потоки и закрывает соединения с базой очереди"""
+        self.stop()
+        with self._shared_lock:
+            self._shared = None
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
+
+    def _next_wait(self) -> float:
+        """Пауза до ближайшего сообщения, не дольше NOTIFY_POLL_SECONDS"""
+        with self._connection() as connection:
+            available_at = connection.execute("SELECT MIN(available_at) FROM outbox").fetchone()[0]
+        if available_at is None:
+            return settings.NOTIFY_POLL_SECONDS
+        return min(max(available_at - self._clock(), 0.0), settings.NOTIFY_POLL_SECONDS)
+
+    def _run(self):
+        self._local.connection = self._open()
+        try:
+            while not self._stopping.is_set():
+                try:
+                    if self.process_due():
+                        continue
+                    timeout = self._next_wait()
+                except Exception as e:
+                    self.logger.error(f"Ошибка обработки очереди уведомлений: {str(e)}")
+                    timeout = settings.NOTIFY_POLL_SECONDS
+                with self._wakeup:
+                    self._wakeup.wait_for(lambda: self._signals or self._stopping.is_set(), timeout)
+                    self._signals = 0
+        finally:
+            for transport in self._transports().values():
+                transport.close()
+            connection = self._local.connection
+            with self._lock:
+                if connection in self._connections:
+                    self._connections.remove(connection)
+            connection.close()
+
+
+_default_outbox = None
+_default_outbox_lock = threading.Lock()
+
+
+def get_outbox() -> NotificationOutbox:
+    """Возвращает общую для процесса очередь уведомлений с запущенными рабочими потоками"""
+    global _default_outbox
+    with _default_outbox_lock:
+        if _default_outbox is None:
+            _default_outbox = NotificationOutbox()
+            _default_outbox.start()
+            # Даем отправляемым сейчас сообщениям завершиться; остальные
+            # будут отправлены после следующего запуска
+            atexit.register(_default_outbox.stop, 5.0)
+        return _default_outbox
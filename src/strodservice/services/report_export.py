@@ -0,0 +1,187 @@
+"""
+Модуль потоковой выгрузки отчетов в CSV и XLSX.
+
+Строки читаются из базы пачками (Query.yield_per, на PostgreSQL -
+серверный курсор) и сразу записываются в файл, поэтому расход памяти не
+зависит от числа строк. XLSX пишется в режиме write_only библиотеки
+openpyxl, который не хранит лист целиком. Файл сначала создается рядом
+с целевым под временным именем и переименовывается после записи
+последней строки: при ошибке или отмене неполный отчет не остается.
+"""
+
+import csv
+import os
+from datetime import date, datetime
+from operator import attrgetter
+from typing import Callable, Iterable, Optional, Sequence, Tuple
+
+from openpyxl import Workbook
+
+from ..exceptions import ValidationError
+from .report_queries import UNKNOWN_LINE_TYPE, UNKNOWN_OBJECT
+
+# Число строк, загружаемых из базы за один раз
+EXPORT_BATCH_SIZE = 1000
+
+# Как часто (в строках) сообщать о ходе выгрузки и проверять отмену
+PROGRESS_EVERY = 5000
+
+# Максимум строк на листе Excel, включая заголовок
+XLSX_MAX_ROWS = 1048576
+
+EXPORT_FORMATS = ('csv', 'xlsx')
+
+# Столбец выгрузки: заголовок и функция, получающая значение из строки запроса
+ExportColumn = Tuple[str, Callable]
+
+FIELD_DATA_COLUMNS = [
+    ("ID", attrgetter('id')),
+    ("Объект", lambda row: row.object_name or UNKNOWN_OBJECT),
+    ("Тип линии", lambda row: row.line_type_name or UNKNOWN_LINE_TYPE),
+    ("Длина", attrgetter('length')),
+    ("Ширина", attrgetter('width')),
+    ("Использовано", attrgetter('material_used')),
+    ("Дата", attrgetter('date')),
+]
+
+
+def export_format(filepath: str) -> str:
+    """
+    Формат выгрузки по расширению файла.
+
+    Raises:
+        ValidationError: Если расширение не .csv и не .xlsx
+    """
+    extension = os.path.splitext(filepath)[1].lower().lstrip('.')
+    if extension not in EXPORT_FORMATS:
+        raise ValidationError(f"Неподдерживаемый формат выгрузки: {extension or filepath}")
+    return extension
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ', timespec='seconds')
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+class _CsvWriter:
+    def __init__(self, path, headers):
+        # BOM нужен, чтобы Excel открыл файл в UTF-8, а не в cp1251
+        self._file = open(path, 'w', encoding='utf-8-sig', newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(headers)
+
+    def write(self, values):
+        self._writer.writerow([_csv_value(value) for value in values])
+
+    def close(self):
+        self._file.close()
+
+
+class _XlsxWriter:
+    def __init__(self, path, headers):
+        self._path = path
+        self._headers = list(headers)
+        self._workbook = Workbook(write_only=True)
+        self._sheets = 0
+        self._add_sheet()
+
+    def _add_sheet(self):
+        self._sheets += 1
+        title = "Отчет" if self._sheets == 1 else f"Отчет {self._sheets}"
+        self._sheet = self._workbook.create_sheet(title)
+        self._sheet.append(self._headers)
+        self._rows = 1
+
+    def write(self, values):
+        if self._rows >= XLSX_MAX_ROWS:
+            # Строки, не поместившиеся на лист, продолжаются на следующем
+            self._add_sheet()
+        self._sheet.append(list(values))
+        self._rows += 1
+
+    def close(self):
+        self._workbook.save(self._path)
+
+
+_WRITERS = {'csv': _CsvWriter, 'xlsx': _XlsxWriter}
+
+
+def export_rows(filepath: str, columns: Sequence[ExportColumn], rows: Iterable,
+                total: Optional[int] = None, progress: Optional[Callable] = None,
+                cancel_token=None) -> int:
+    """
+    Записывает строки в CSV или XLSX (формат по расширению файла).
+
+    Args:
+        filepath: Путь к файлу отчета
+        columns: Столбцы выгрузки
+        rows: Итерируемые строки; читаются по одной
+        total: Ожидаемое число строк (для progress)
+        progress: Функция progress(записано, total), вызывается каждые
+            PROGRESS_EVERY строк и по окончании выгрузки
+        cancel_token: Токен отмены (объект с методом raise_if_cancelled)
+
+    Returns:
+        int: Число записанных строк
+
+    Raises:
+        ValidationError: Если формат файла не поддерживается
+        TaskCancelledError: Если выгрузка отменена
+    """
+    writer_class = _WRITERS[export_format(filepath)]
+    temp_path = f"{filepath}.part"
+    writer = writer_class(temp_path, [header for header, _ in columns])
+    written = 0
+    try:
+        try:
+            for row in rows:
+                writer.write([value(row) for _, value in columns])
+                written += 1
+                if written % PROGRESS_EVERY == 0:
+                    if cancel_token is not None:
+                        cancel_token.raise_if_cancelled()
+                    if progress is not None:
+                        progress(written, total)
+        finally:
+            writer.close()
+        os.replace(temp_path, filepath)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    if progress is not None:
+        progress(written, total)
+    return written
+
+
+def export_query(filepath: str, columns: Sequence[ExportColumn], session_factory: Callable,
+                 query_factory: Callable, batch_size: int = EXPORT_BATCH_SIZE,
+                 progress: Optional[Callable] = None, cancel_token=None) -> int:
+    """
+    Выгружает результат запроса в файл, читая строки пачками.
+
+    Args:
+        filepath: Путь к файлу отчета (.csv или .xlsx)
+        columns: Столбцы выгрузки
+        session_factory: Фабрика сессий; для выгрузки открывается отдельная сессия
+        query_factory: Функция, строящая запрос по сессии
+        batch_size: Число строк, загружаемых из базы за раз
+        progress: См. export_rows; total - число строк запроса
+        cancel_token: Токен отмены
+
+    Returns:
+        int: Число записанных строк
+    """
+    session = session_factory()
+    try:
+        query = query_factory(session)
+        total = query.order_by(None).count() if progress is not None else None
+        return export_rows(filepath, columns, query.yield_per(batch_size),
+                           total=total, progress=progress, cancel_token=cancel_token)
+    finally:
+        session.close()
@@ -0,0 +1,224 @@
+"""
+Модуль запросов для формирования отчетов по полевым данным.
+
+Названия объектов и типов линий подтягиваются в том же запросе через
+JOIN, поэтому число запросов к базе не зависит от числа записей. Итоги
+(SUM/AVG/COUNT) и группировка по объектам, типам линий, материалам и
+периодам вычисляются на стороне базы данных: в Python приходит по одной
+строке на группу, а не все записи за период.
+
+Итоги за длинные периоды (от settings.REPORT_ROLLUP_MIN_DAYS дней)
+читаются из таблицы суточных итогов field_data_daily, а не из исходных
+записей: число читаемых строк определяется числом дней, объектов и
+типов линий, а не числом замеров.
+"""
+
+from datetime import date, timedelta
+from typing import List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..config.settings import settings
+from ..models.models import FieldData, FieldDataDaily, LineType, Material, Object
+# Регистрирует пересчет суточных итогов при сохранении FieldData
+from . import field_rollup  # noqa: F401
+
+UNKNOWN_OBJECT = "Неизвестный объект"
+UNKNOWN_LINE_TYPE = "Неизвестный тип"
+UNKNOWN_MATERIAL = "Неизвестный материал"
+
+# Варианты группировки для aggregate_field_data и их подписи в интерфейсе
+GROUPINGS = {
+    'object': "По объектам",
+    'line_type': "По типам линий",
+    'material': "По материалам",
+    'day': "По дням",
+    'week': "По неделям",
+    'month': "По месяцам",
+}
+
+PERIOD_GROUPINGS = ('day', 'week', 'month')
+
+
+def _filtered(query, start_date: date, end_date: date, object_id: Optional[int], rollup: bool = False):
+    if rollup:
+        query = query.filter(FieldDataDaily.day >= start_date, FieldDataDaily.day <= end_date)
+        if object_id is not None:
+            query = query.filter(FieldDataDaily.object_id == object_id)
+        return query
+    # День окончания периода входит в отчет целиком
+    query = query.filter(FieldData.date >= start_date, FieldData.date < end_date + timedelta(days=1))
+    if object_id is not None:
+        query = query.filter(FieldData.object_id == object_id)
+    return query
+
+
+def _use_rollup(start_date: date, end_date: date, use_rollup: Optional[bool]) -> bool:
+    if use_rollup is not None:
+        return use_rollup
+    return (end_date - start_date).days + 1 >= settings.REPORT_ROLLUP_MIN_DAYS
+
+
+def field_data_query(session: Session, start_date: date, end_date: date,
+                     object_id: Optional[int] = None):
+    """
+    Запрос полевых данных за период с названиями объектов и типов линий.
+
+    Args:
+        session: Сессия базы данных
+        start_date: Начало периода
+        end_date: Конец периода
+        object_id: ID объекта или None для всех объектов
+
+    Returns:
+        Query: Строки с полями id, object_name, line_type_name, length, width,
+        material_used, date в порядке даты и id. Если объект или тип линии
+        не найден, вместо названия стоит None.
+    """
+    query = (
+        session.query(
+            FieldData.id,
+            Object.name.label('object_name'),
+            LineType.name.label('line_type_name'),
+            FieldData.length,
+            FieldData.width,
+            FieldData.material_used,
+            FieldData.date,
+        )
+        .outerjoin(Object, FieldData.object_id == Object.id)
+        .outerjoin(LineType, FieldData.line_type_id == LineType.id)
+    )
+    query = _filtered(query, start_date, end_date, object_id)
+    return query.order_by(FieldData.date, FieldData.id)
+
+
+def field_data_rows(session: Session, start_date: date, end_date: date,
+                    object_id: Optional[int] = None) -> List:
+    """
+    Возвращает полевые данные за период одним запросом (см. field_data_query).
+    """
+    return field_data_query(session, start_date, end_date, object_id).all()
+
+
+def _totals_columns(rollup: bool = False):
+    if rollup:
+        return (
+            func.coalesce(func.sum(FieldDataDaily.records), 0).label('records'),
+            func.coalesce(func.sum(FieldDataDaily.total_length), 0.0).label('total_length'),
+            func.coalesce(func.sum(FieldDataDaily.total_area), 0.0).label('total_area'),
+            func.coalesce(func.sum(FieldDataDaily.total_material_used), 0.0).label('total_material_used'),
+            # Как и AVG, среднее считается по записям с указанным расходом
+            (func.sum(FieldDataDaily.total_material_used)
+             / func.nullif(func.sum(FieldDataDaily.material_records), 0)).label('avg_material_used'),
+        )
+    return (
+        func.count(FieldData.id).label('records'),
+        func.coalesce(func.sum(FieldData.length), 0.0).label('total_length'),
+        func.coalesce(func.sum(FieldData.length * FieldData.width), 0.0).label('total_area'),
+        func.coalesce(func.sum(FieldData.material_used), 0.0).label('total_material_used'),
+        func.avg(FieldData.material_used).label('avg_material_used'),
+    )
+
+
+def _period_expression(dialect: str, period: str, column=FieldData.date):
+    """
+    Выражение SQL, дающее подпись периода для даты column: ГГГГ-ММ-ДД для
+    дня и недели (неделя подписывается датой понедельника), ГГГГ-ММ для месяца.
+    """
+    if dialect == 'sqlite':
+        if period == 'day':
+            return func.strftime('%Y-%m-%d', column)
+        if period == 'week':
+            # 'weekday 0' переносит дату на ближайшее воскресенье, минус 6 дней - понедельник
+            return func.date(column, 'weekday 0', '-6 days')
+        return func.strftime('%Y-%m', column)
+    if dialect == 'postgresql':
+        if period == 'month':
+            return func.to_char(column, 'YYYY-MM')
+        return func.to_char(func.date_trunc(period, column), 'YYYY-MM-DD')
+    raise ValueError(f"Группировка по периодам не поддерживается для базы данных {dialect}")
+
+
+def summarize_field_data(session: Session, start_date: date, end_date: date,
+                         object_id: Optional[int] = None, use_rollup: Optional[bool] = None):
+    """
+    Итоги по полевым данным за период одним агрегирующим запросом.
+
+    Args:
+        use_rollup: Читать суточные итоги (True), исходные записи (False)
+            или выбрать по длине периода (None)
+
+    Returns:
+        Строка с полями records, total_length, total_area,
+        total_material_used, avg_material_used (None, если записей с
+        указанным расходом нет)
+    """
+    rollup = _use_rollup(start_date, end_date, use_rollup)
+    query = session.query(*_totals_columns(rollup))
+    return _filtered(query, start_date, end_date, object_id, rollup).one()
+
+
+def aggregate_field_data(session: Session, start_date: date, end_date: date, group_by: str,
+                         object_id: Optional[int] = None, use_rollup: Optional[bool] = None) -> List:
+    """
+    Итоги по полевым данным с группировкой на стороне базы данных.
+
+    Args:
+        session: Сессия базы данных
+        start_date: Начало периода
+        end_date: Конец периода
+        group_by: Один из ключей GROUPINGS
+        object_id: ID объекта или None для всех объектов
+        use_rollup: См. summarize_field_data
+
+    Returns:
+        list: Строки с полями key (название группы или подпись периода),
+        records, total_length, total_area, total_material_used,
+        avg_material_used. Группы по объектам, типам линий и материалам
+        упорядочены по названию (одноименные объекты - отдельные строки),
+        периоды - по времени.
+
+    Raises:
+        ValueError: Если группировка неизвестна
+    """
+    if group_by not in GROUPINGS:
+        raise ValueError(f"Неизвестная группировка: {group_by}")
+
+    rollup = _use_rollup(start_date, end_date, use_rollup)
+    source = FieldDataDaily if rollup else FieldData
+    totals = _totals_columns(rollup)
+
+    if group_by in PERIOD_GROUPINGS:
+        period_column = FieldDataDaily.day if rollup else FieldData.date
+        key = _period_expression(session.get_bind().dialect.name, group_by, period_column).label('key')
+        query = session.query(key, *totals).select_from(source)
+        group_id = None
+    elif group_by == 'object':
+        key = func.coalesce(Object.name, UNKNOWN_OBJECT).label('key')
+        group_id = source.object_id
+        query = (
+            session.query(key, *totals)
+            .select_from(source)
+            .outerjoin(Object, source.object_id == Object.id)
+        )
+    else:
+        name = LineType.name if group_by == 'line_type' else Material.name
+        unknown = UNKNOWN_LINE_TYPE if group_by == 'line_type' else UNKNOWN_MATERIAL
+        key = func.coalesce(name, unknown).label('key')
+        group_id = source.line_type_id if group_by == 'line_type' else LineType.material_id
+        query = (
+            session.query(key, *totals)
+            .select_from(source)
+            .outerjoin(LineType, source.line_type_id == LineType.id)
+        )
+        if group_by == 'material':
+            query = query.outerjoin(Material, LineType.material_id == Material.id)
+
+    query = _filtered(query, start_date, end_date, object_id, rollup)
+    if group_id is None:
+        return query.group_by(key).order_by(key).all()
+    # Группа - ссылка в записи, а не название: объекты (типы линий,
+    # материалы) с одинаковыми названиями и записи со ссылкой на
+    # удаленный объект не сливаются в одну строку
+    return query.group_by(group_id, key).order_by(key, group_id).all()
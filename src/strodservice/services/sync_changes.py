@@ -0,0 +1,248 @@
+"""
+Модуль инкрементальной синхронизации клиентов.
+
+Клиент передает водяной знак (watermark), полученный в прошлом ответе, и
+получает только записи, созданные или измененные после него
+(updated_at из AuditMixin), и id удаленных записей. Удаления через ORM
+сохраняются в таблице deleted_records (отметки об удалении) в той же
+транзакции, что и само удаление.
+
+Изменения и удаления выбираются по индексам (updated_at, id) и
+(table_name, deleted_at, id) и объединяются в один поток по времени,
+поэтому порядок событий сохраняется и при постраничной выдаче. Клиент
+применяет сначала deleted, затем changes.
+
+События моложе settings.SYNC_SETTLE_SECONDS откладываются до следующего
+запроса: транзакция, начатая раньше, может зафиксировать запись с более
+ранним updated_at уже после ответа. Если водяной знак старше срока
+хранения отметок об удалении, ответ содержит reset=True и клиент
+загружает таблицу заново (без водяного знака).
+
+Каждая база со своими моделями описывается объектом ChangeFeed: таблицы
+основной базы - main_feed, модели Flask-приложений создают свой ChangeFeed
+над собственной таблицей отметок, чтобы изменения выдавались из той же
+базы, что и полные списки /api/objects и /api/field_data.
+"""
+
+import base64
+import heapq
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import and_, delete, event, insert, inspect, or_, select, true
+from sqlalchemy.orm import Session
+
+from ..config.settings import settings
+from ..exceptions import ValidationError
+from ..models.models import DeletedRecord, FieldData, Material, Object
+
+# Таблицы основной базы, доступные для синхронизации
+SYNC_MODELS = {
+    'field_data': FieldData,
+    'objects': Object,
+    'materials': Material,
+}
+
+# Модель -> (имя таблицы синхронизации, таблица отметок об удалении)
+_TRACKED: Dict[type, tuple] = {}
+
+# Порядок событий с одинаковым временем: удаление раньше изменения
+_DELETED, _CHANGED = 0, 1
+
+
+@dataclass
+class SyncPage:
+    """Изменения таблицы после водяного знака"""
+    changes: List[Dict] = field(default_factory=list)
+    deleted: List[int] = field(default_factory=list)
+    watermark: Optional[str] = None
+    has_more: bool = False
+    reset: bool = False
+
+
+def _encode(payload: Dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+def _decode(token: str, table_name: str) -> Dict:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode((token + '=' * (-len(token) % 4)).encode()))
+        if payload['t'] != table_name:
+            raise ValueError(token)
+        positions = {}
+        for name in ('c', 'd'):
+            positions[name] = None if payload[name] is None else (
+                datetime.fromisoformat(payload[name][0]), int(payload[name][1]))
+        positions['h'] = datetime.fromisoformat(payload['h'])
+        return positions
+    except (ValueError, TypeError, KeyError, IndexError):
+        raise ValidationError("Invalid watermark", "invalid_watermark") from None
+
+
+def _position(key) -> Optional[List]:
+    return None if key is None else [key[0].isoformat(), key[1]]
+
+
+def _after(time_column, id_column, position):
+    if position is None:
+        return true()
+    moment, row_id = position
+    return or_(time_column > moment, and_(time_column == moment, id_column > row_id))
+
+
+def _json_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+class ChangeFeed:
+    """
+    Инкрементальная синхронизация таблиц одной базы.
+
+    Args:
+        models: Модели по именам таблиц синхронизации; у каждой модели
+            должны быть столбцы id и updated_at (обновляется при изменении)
+        tombstones: Таблица отметок об удалении этой базы (столбцы id,
+            table_name, record_id, deleted_at)
+        fields: Столбцы, которые получают клиенты, по именам таблиц
+            (по умолчанию все столбцы модели)
+    """
+
+    def __init__(self, models: Dict[str, type], tombstones, fields: Optional[Dict[str, Sequence[str]]] = None):
+        self.models = dict(models)
+        self.tombstones = tombstones
+        self.fields = dict(fields or {})
+        # Удаления этих моделей через ORM записываются в tombstones
+        for name, model in self.models.items():
+            _TRACKED[model] = (name, tombstones)
+
+    def _latest_tombstone(self, session, table_name: str, cutoff: datetime):
+        tombstones = self.tombstones
+        row = session.execute(
+            select(tombstones.c.deleted_at, tombstones.c.id)
+            .where(tombstones.c.table_name == table_name, tombstones.c.deleted_at <= cutoff)
+            .order_by(tombstones.c.deleted_at.desc(), tombstones.c.id.desc())
+            .limit(1)
+        ).first()
+        return None if row is None else (row.deleted_at, row.id)
+
+    def changes_since(self, session, table_name: str, watermark: Optional[str] = None,
+                      limit: Optional[int] = None, now: Optional[datetime] = None) -> SyncPage:
+        """
+        Записи таблицы, созданные, измененные или удаленные после водяного знака.
+
+        Args:
+            session: Сессия базы данных
+            table_name: Таблица из models
+            watermark: Водяной знак прошлого ответа (None - первая синхронизация)
+            limit: Событий в ответе (по умолчанию settings.SYNC_PAGE_SIZE)
+            now: Текущее время UTC (для тестов)
+
+        Returns:
+            SyncPage: Изменения, id удаленных записей и новый водяной знак
+
+        Raises:
+            ValidationError: Неизвестная таблица или неверный водяной знак
+        """
+        model = self.models.get(table_name)
+        if model is None:
+            raise ValidationError(f"Unknown table: {table_name}", "invalid_table")
+        if limit is not None and limit < 1:
+            raise ValidationError("limit must be positive", "invalid_limit")
+        limit = min(limit or settings.SYNC_PAGE_SIZE, settings.SYNC_MAX_PAGE_SIZE)
+        now = now or datetime.utcnow()
+        cutoff = now - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+
+        if watermark is None:
+            # При первой синхронизации удаленное раньше клиенту неинтересно
+            changed_after, deleted_after = None, self._latest_tombstone(session, table_name, cutoff)
+        else:
+            positions = _decode(watermark, table_name)
+            if positions['h'] < now - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS):
+                return SyncPage(reset=True)
+            changed_after, deleted_after = positions['c'], positions['d']
+
+        table = model.__table__
+        tombstones = self.tombstones
+        fields = list(self.fields.get(table_name, table.c.keys()))
+        # id и updated_at нужны для порядка событий, даже если клиент их не получает
+        selected = fields + [name for name in ('id', 'updated_at') if name not in fields]
+        changed = session.execute(
+            select(*[table.c[name] for name in selected])
+            .where(_after(table.c.updated_at, table.c.id, changed_after), table.c.updated_at <= cutoff)
+            .order_by(table.c.updated_at, table.c.id)
+            .limit(limit + 1)
+        ).all()
+        deleted = session.execute(
+            select(tombstones.c.deleted_at, tombstones.c.id, tombstones.c.record_id)
+            .where(tombstones.c.table_name == table_name,
+                   _after(tombstones.c.deleted_at, tombstones.c.id, deleted_after),
+                   tombstones.c.deleted_at <= cutoff)
+            .order_by(tombstones.c.deleted_at, tombstones.c.id)
+            .limit(limit + 1)
+        ).all()
+
+        events = list(heapq.merge(
+            ((row.deleted_at, _DELETED, row.id, row) for row in deleted),
+            ((row.updated_at, _CHANGED, row.id, row) for row in changed),
+            key=lambda item: item[:3],
+        ))
+        page = SyncPage(has_more=len(events) > limit)
+        horizon = cutoff
+        for moment, kind, row_id, row in events[:limit]:
+            if kind == _DELETED:
+                page.deleted.append(row.record_id)
+                deleted_after = (moment, row_id)
+            else:
+                page.changes.append({name: _json_value(row._mapping[name]) for name in fields})
+                changed_after = (moment, row_id)
+            horizon = moment
+        if not page.has_more:
+            horizon = cutoff
+        page.watermark = _encode({
+            't': table_name,
+            'c': _position(changed_after),
+            'd': _position(deleted_after),
+            'h': horizon.isoformat(),
+        })
+        return page
+
+    def purge_tombstones(self, connection, now: Optional[datetime] = None) -> int:
+        """
+        Удаляет отметки об удалении старше settings.SYNC_TOMBSTONE_RETENTION_DAYS.
+
+        Клиенты с более старым водяным знаком получают reset=True.
+
+        Returns:
+            int: Число удаленных отметок
+        """
+        threshold = (now or datetime.utcnow()) - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+        removed = 0
+        for table_name in self.models:
+            removed += connection.execute(delete(self.tombstones).where(
+                self.tombstones.c.table_name == table_name, self.tombstones.c.deleted_at < threshold
+            )).rowcount
+        return removed
+
+
+# Основная база (settings.DATABASE_URL)
+main_feed = ChangeFeed(SYNC_MODELS, DeletedRecord.__table__)
+changes_since = main_feed.changes_since
+purge_tombstones = main_feed.purge_tombstones
+
+
+@event.listens_for(Session, 'after_flush')
+def _record_deletions(session, flush_context):
+    # Каскадные удаления ORM тоже попадают в session.deleted
+    now = datetime.utcnow()
+    tombstones: Dict[object, List[Dict]] = {}
+    for record in session.deleted:
+        if type(record) in _TRACKED:
+            table_name, table = _TRACKED[type(record)]
+            tombstones.setdefault(table, []).append(
+                {'table_name': table_name, 'record_id': inspect(record).identity[0], 'deleted_at': now})
+    for table, rows in tombstones.items():
+        session.connection().execute(insert(table), rows)
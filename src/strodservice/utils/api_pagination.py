@@ -0,0 +1,190 @@
+"""
+Keyset pagination for the list endpoints of the Flask backends.
+
+A page is selected with ``WHERE (key columns) > (cursor values) ORDER BY
+key columns LIMIT n`` instead of OFFSET, so every page costs one index
+range scan no matter how deep the client has paged, and a request never
+holds more than ``settings.API_MAX_PAGE_SIZE`` rows. Only the requested
+columns (``fields=``) are selected.
+
+The body is a JSON array (or NDJSON, one object per line, with
+``format=ndjson`` or ``Accept: application/x-ndjson``) written row by row.
+The cursor of the next page is returned in the ``X-Next-Cursor`` header
+and as a ``Link: <...>; rel="next"`` header; it is absent on the last page.
+"""
+import base64
+import json
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence
+from urllib.parse import urlencode
+
+from flask import Response, request, stream_with_context
+from sqlalchemy import DateTime, and_, or_, select
+from sqlalchemy.sql.elements import ColumnElement
+
+from ..config.settings import settings
+from ..exceptions import ValidationError
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+
+def encode_cursor(order: str, values: Sequence) -> str:
+    """Opaque cursor for the row with the given key values"""
+    payload = [order, [value.isoformat() if isinstance(value, (date, datetime)) else value
+                       for value in values]]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, order: str, columns: Sequence) -> List:
+    """
+    Key values stored in a cursor
+
+    Raises:
+        ValidationError: If the cursor is malformed or was issued for another ordering
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        cursor_order, values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if cursor_order != order or len(values) != len(columns):
+            raise ValueError(token)
+        return [datetime.fromisoformat(value) if isinstance(column.type, DateTime) else value
+                for column, value in zip(columns, values)]
+    except (ValueError, TypeError):
+        raise ValidationError("Invalid cursor", "invalid_cursor") from None
+
+
+def parse_fields(value: Optional[str], allowed: Sequence[str]) -> List[str]:
+    """Requested ``fields=`` in the order given (all allowed fields by default)"""
+    if not value:
+        return list(allowed)
+    fields = list(dict.fromkeys(name.strip() for name in value.split(",") if name.strip()))
+    unknown = [name for name in fields if name not in allowed]
+    if unknown or not fields:
+        raise ValidationError(f"Unknown fields: {', '.join(unknown)}", "invalid_fields")
+    return fields
+
+
+def parse_limit(value: Optional[str]) -> int:
+    """Page size from ``limit=``, capped by settings.API_MAX_PAGE_SIZE"""
+    if value is None:
+        return settings.API_PAGE_SIZE
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValidationError("limit must be an integer", "invalid_limit") from None
+    if limit < 1:
+        raise ValidationError("limit must be positive", "invalid_limit")
+    return min(limit, settings.API_MAX_PAGE_SIZE)
+
+
+def parse_int(value: Optional[str], name: str) -> Optional[int]:
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError(f"{name} must be an integer", f"invalid_{name}") from None
+
+
+def parse_period(date_from: Optional[str], date_to: Optional[str], column) -> List[ColumnElement]:
+    """
+    Conditions for ``date_from``/``date_to`` (ISO 8601)
+
+    A date without time in ``date_to`` includes that whole day.
+    """
+    conditions = []
+    for value, name in ((date_from, "date_from"), (date_to, "date_to")):
+        if value is None:
+            continue
+        try:
+            moment = datetime.fromisoformat(value)
+        except ValueError:
+            raise ValidationError(f"{name} must be an ISO 8601 date", f"invalid_{name}") from None
+        if name == "date_from":
+            conditions.append(column >= moment)
+        elif len(value) == 10:
+            conditions.append(column < moment + timedelta(days=1))
+        else:
+            conditions.append(column <= moment)
+    return conditions
+
+
+def keyset_condition(columns: Sequence, values: Sequence) -> ColumnElement:
+    """``(c1, c2, ...) > (v1, v2, ...)`` spelled out so any database can use an index"""
+    column, value = columns[0], values[0]
+    if len(columns) == 1:
+        return column > value
+    return or_(column > value, and_(column == value, keyset_condition(columns[1:], values[1:])))
+
+
+def _json_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _iter_json(rows: Iterable[Dict]) -> Iterable[str]:
+    yield "["
+    separator = ""
+    for row in rows:
+        yield separator + json.dumps(row, ensure_ascii=False, default=_json_value)
+        separator = ","
+    yield "]"
+
+
+def _iter_ndjson(rows: Iterable[Dict]) -> Iterable[str]:
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False, default=_json_value) + "\n"
+
+
+def wants_ndjson() -> bool:
+    if request.args.get("format"):
+        return request.args["format"].lower() == "ndjson"
+    return request.accept_mimetypes.best == NDJSON_MIMETYPE
+
+
+def keyset_response(session, table, fields: Sequence[str], orders: Dict[str, Sequence[str]],
+                    conditions: Sequence[ColumnElement] = ()) -> Response:
+    """
+    One page of ``table`` as a streamed JSON array or NDJSON response
+
+    Reads ``fields``, ``limit``, ``cursor``, ``order`` and ``format`` from the
+    request. ``fields`` lists the public columns a client may request (and
+    gets by default); other columns of the table are never returned.
+    ``orders`` maps the accepted ``order=`` values to key columns; the first
+    entry is the default and every key must end with a unique column.
+
+    Raises:
+        ValidationError: If a query parameter is invalid
+    """
+    order = request.args.get("order", next(iter(orders)))
+    if order not in orders:
+        raise ValidationError(f"order must be one of: {', '.join(orders)}", "invalid_order")
+    key_columns = [table.c[name] for name in orders[order]]
+    fields = parse_fields(request.args.get("fields"), fields)
+    limit = parse_limit(request.args.get("limit"))
+
+    selected = fields + [name for name in orders[order] if name not in fields]
+    statement = select(*[table.c[name] for name in selected]).where(*conditions)
+    # Rows without a key value cannot be positioned by a cursor
+    statement = statement.where(*[column.isnot(None) for column in key_columns if column.nullable])
+    token = request.args.get("cursor")
+    if token:
+        statement = statement.where(keyset_condition(key_columns, decode_cursor(token, order, key_columns)))
+    statement = statement.order_by(*key_columns).limit(limit + 1)
+
+    rows = session.execute(statement).all()
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]._mapping
+        next_cursor = encode_cursor(order, [last[column] for column in key_columns])
+        args = request.args.to_dict()
+        args["cursor"] = next_cursor
+        headers["X-Next-Cursor"] = next_cursor
+        headers["Link"] = f'<{request.path}?{urlencode(args)}>; rel="next"'
+
+    items = ({name: row._mapping[name] for name in fields} for row in rows)
+    if wants_ndjson():
+        return Response(stream_with_context(_iter_ndjson(items)), mimetype=NDJSON_MIMETYPE, headers=headers)
+    return Response(stream_with_context(_iter_json(items)), mimetype="application/json", headers=headers)
@@ -0,0 +1,145 @@
+"""
+In-process cache of verified JWT claims and authenticated users for the
+Flask backends.
+
+Without it every API request decodes the token and loads the user row.
+Verified claims are cached per token and user snapshots per user id, each
+for a short TTL and in a bounded LRU, so a chatty client costs one
+dictionary lookup per request instead of a signature check and a query.
+
+Role changes are handled with a version stamp on the user row
+(``auth_version``). Tokens carry the version they were issued for (claim
+``ver``). Changing the role bumps the version, which has three effects:
+
+- Older tokens are rejected as soon as the cached snapshot is refreshed.
+- A token with a newer version than the cached snapshot forces a reload,
+  so a worker never trusts an older snapshot than the token it is shown.
+- Other worker processes see the change within ``ttl`` seconds at most,
+  because the cache is never shared between processes.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+import jwt
+
+from ..config.settings import settings
+from ..exceptions import AuthenticationError
+
+
+class CachedUser(NamedTuple):
+    """Read-only snapshot of the authenticated user passed to the views"""
+    id: int
+    username: str
+    role: str
+    auth_version: int
+
+
+class TTLCache:
+    """Thread-safe LRU mapping whose entries expire after a TTL"""
+
+    def __init__(self, max_size: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Any, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires <= self._clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: Optional[float] = None):
+        expires = self._clock() + (self.ttl if ttl is None else min(ttl, self.ttl))
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class AuthCache:
+    """
+    Verified JWT claims and user snapshots for ``token_required``
+
+    Args:
+        load_user: Returns a CachedUser for a user id, or None if there is no such user
+        ttl: Seconds an entry may be reused (settings.AUTH_CACHE_TTL by default)
+        max_size: Entries per cache (settings.AUTH_CACHE_MAX_SIZE by default)
+    """
+
+    def __init__(self, load_user: Callable[[int], Optional[CachedUser]], ttl: Optional[float] = None,
+                 max_size: Optional[int] = None, clock: Callable[[], float] = time.monotonic):
+        ttl = settings.AUTH_CACHE_TTL if ttl is None else ttl
+        max_size = max_size or settings.AUTH_CACHE_MAX_SIZE
+        self.load_user = load_user
+        self.claims = TTLCache(max_size, ttl, clock)
+        self.users = TTLCache(max_size, ttl, clock)
+
+    def decode(self, token: str, secret: str) -> Dict:
+        """
+        Verified claims of a token, reusing an earlier verification
+
+        Raises:
+            AuthenticationError: If the token is invalid or expired
+        """
+        claims = self.claims.get(token)
+        if claims is not None:
+            return claims
+        try:
+            claims = jwt.decode(token, secret, algorithms=["HS256"])
+        except jwt.PyJWTError as e:
+            raise AuthenticationError(str(e), "invalid_token") from None
+        lifetime = claims["exp"] - time.time() if "exp" in claims else None
+        self.claims.set(token, claims, lifetime)
+        return claims
+
+    def authenticate(self, token: str, secret: str) -> CachedUser:
+        """
+        User a token was issued to
+
+        Raises:
+            AuthenticationError: If the token is invalid, the user does not
+                exist or the token predates the user's last role change
+        """
+        claims = self.decode(token, secret)
+        try:
+            user_id = claims["user_id"]
+            version = claims.get("ver", 1)
+        except (KeyError, TypeError):
+            raise AuthenticationError("Token has no user", "invalid_token") from None
+
+        user = self.users.get(user_id)
+        if user is None or version > user.auth_version:
+            user = self.load_user(user_id)
+            if user is None:
+                self.users.pop(user_id)
+                raise AuthenticationError("User not found", "invalid_token")
+            self.users.set(user_id, user)
+        if version != user.auth_version:
+            raise AuthenticationError("Token was issued before the last role change", "stale_token")
+        return user
+
+    def invalidate_user(self, user_id: int):
+        """Drop a user's snapshot after a change made by this process"""
+        self.users.pop(user_id)
@@ -0,0 +1,247 @@
+"""
+Batch submission of field data records for the Flask backends.
+
+Crews coming back online send their backlog as one request: a JSON array
+(or ``{"items": [...]}``) or NDJSON with one record per line. Every item
+is validated, the valid ones are inserted with one executemany in one
+transaction, and the response lists a result per item in input order.
+
+An item may carry an ``idempotency_key`` (for example a UUID generated on
+the device when the record was captured). Keys are stored on the row
+under a unique index. An item whose key is already stored, or is repeated
+earlier in the same batch, is reported as ``duplicate`` with the id of
+the existing row instead of being inserted again, so retrying a batch
+after a lost response does not duplicate rows.
+
+If the insert fails on the key index because a concurrent request stored
+one of the keys first, the batch is looked up and inserted once more. If
+that fails too, or a row breaks another constraint, the rows are inserted
+one by one in savepoints and each failing row is reported as an ``error``.
+"""
+import json
+import math
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from ..config.settings import settings
+from ..exceptions import ValidationError
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+IDEMPOTENCY_KEY_MAX_LENGTH = 64
+
+# Keys per IN (...) lookup of already stored idempotency keys
+_KEY_CHUNK = 500
+
+CONSTRAINT_ERROR = "Record violates a database constraint"
+
+
+@dataclass
+class BatchResult:
+    """Per-item outcome of a batch: ``created``, ``duplicate`` or ``error``"""
+    created: int = 0
+    duplicates: int = 0
+    errors: int = 0
+    results: List[Dict] = field(default_factory=list)
+
+
+def read_batch(request) -> List:
+    """
+    Items of a batch request body
+
+    Raises:
+        ValidationError: If the body is not a JSON array, an ``items`` object
+            or NDJSON, or holds more than settings.API_BATCH_MAX_ITEMS items
+    """
+    if request.mimetype == NDJSON_MIMETYPE:
+        items = []
+        for line in request.get_data(as_text=True).splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                # Reported for this item only, like any other invalid item
+                items.append(None)
+    else:
+        body = request.get_json(silent=True)
+        items = body.get("items") if isinstance(body, dict) else body
+        if not isinstance(items, list):
+            raise ValidationError("Expected a JSON array of records or NDJSON", "invalid_batch")
+    if len(items) > settings.API_BATCH_MAX_ITEMS:
+        raise ValidationError(f"A batch may hold at most {settings.API_BATCH_MAX_ITEMS} records",
+                              "batch_too_large")
+    return items
+
+
+def _number(item: Dict, name: str) -> Optional[float]:
+    value = item.get(name)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"{name} must be a number")
+    return float(value)
+
+
+def validate_item(item) -> Dict:
+    """
+    Column values of one record
+
+    Raises:
+        ValueError: With the message reported for the item
+    """
+    if not isinstance(item, dict):
+        raise ValueError("Record must be a JSON object")
+    object_id = item.get("object_id")
+    if isinstance(object_id, bool) or not isinstance(object_id, int):
+        raise ValueError("object_id must be an integer")
+    line_type = item.get("line_type")
+    if not isinstance(line_type, str) or not line_type.strip():
+        raise ValueError("line_type is required")
+    length, width, material_used = (_number(item, name) for name in ("length", "width", "material_used"))
+    if length is not None and length <= 0:
+        raise ValueError("length must be positive")
+    if width is not None and width <= 0:
+        raise ValueError("width must be positive")
+    if material_used is not None and material_used < 0:
+        raise ValueError("material_used cannot be negative")
+    notes = item.get("notes")
+    if notes is not None and not isinstance(notes, str):
+        raise ValueError("notes must be a string")
+    key = item.get("idempotency_key")
+    if key is not None and (not isinstance(key, str) or not key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH):
+        raise ValueError(f"idempotency_key must be a string of 1-{IDEMPOTENCY_KEY_MAX_LENGTH} characters")
+    moment = item.get("date")
+    if moment is None:
+        moment = datetime.utcnow()
+    else:
+        try:
+            moment = datetime.fromisoformat(moment)
+        except (TypeError, ValueError):
+            raise ValueError("date must be an ISO 8601 string") from None
+    return {
+        "object_id": object_id,
+        "line_type": line_type,
+        "length": length,
+        "width": width,
+        "material_used": material_used,
+        "notes": notes,
+        "date": moment,
+        "idempotency_key": key,
+    }
+
+
+def _stored_keys(session, model, keys) -> Dict[str, int]:
+    stored = {}
+    keys = list(keys)
+    for offset in range(0, len(keys), _KEY_CHUNK):
+        rows = session.execute(select(model.idempotency_key, model.id)
+                               .where(model.idempotency_key.in_(keys[offset:offset + _KEY_CHUNK])))
+        stored.update(tuple(row) for row in rows)
+    return stored
+
+
+def _is_key_conflict(error: IntegrityError) -> bool:
+    # SQLite names the column, PostgreSQL and MySQL the unique index
+    return "idempotency_key" in str(error.orig)
+
+
+def _new_rows(session, model, results: List[Dict], pending: Dict[int, Dict]) -> List[Tuple[int, Dict]]:
+    """Mark stored and repeated keys as duplicates and return the rows to insert"""
+    stored = _stored_keys(session, model, {values["idempotency_key"] for values in pending.values()
+                                           if values["idempotency_key"] is not None})
+    first_index = {}
+    rows = []
+    for index, values in pending.items():
+        key = values["idempotency_key"]
+        if key is not None and key in stored:
+            results[index] = {"index": index, "status": "duplicate", "id": stored[key]}
+        elif key is not None and key in first_index:
+            results[index] = {"index": index, "status": "duplicate", "duplicate_of": first_index[key]}
+        else:
+            if key is not None:
+                first_index[key] = index
+            rows.append((index, values))
+    return rows
+
+
+def _link_duplicates(results: List[Dict]) -> None:
+    """Give items repeating a key of the same batch the outcome of its first item"""
+    for index, result in enumerate(results):
+        if result and "duplicate_of" in result:
+            first = results[result.pop("duplicate_of")]
+            if first["status"] == "error":
+                results[index] = {"index": index, "status": "error", "error": first["error"]}
+            else:
+                result["id"] = first["id"]
+
+
+def _insert(session, model, results: List[Dict], pending: Dict[int, Dict]) -> None:
+    """Insert the batch with one executemany; the caller commits"""
+    rows = _new_rows(session, model, results, pending)
+    if rows:
+        ids = session.execute(insert(model).returning(model.id, sort_by_parameter_order=True),
+                              [values for _, values in rows]).scalars().all()
+        for (index, _), row_id in zip(rows, ids):
+            results[index] = {"index": index, "status": "created", "id": row_id}
+    _link_duplicates(results)
+
+
+def _insert_each(session, model, results: List[Dict], pending: Dict[int, Dict]) -> None:
+    """Insert row by row in savepoints so a failing row does not fail the batch; the caller commits"""
+    for index, values in _new_rows(session, model, results, pending):
+        try:
+            with session.begin_nested():
+                row_id = session.execute(insert(model).returning(model.id), values).scalar_one()
+        except IntegrityError as e:
+            key = values["idempotency_key"]
+            stored = _stored_keys(session, model, [key]) if _is_key_conflict(e) else {}
+            if key in stored:
+                results[index] = {"index": index, "status": "duplicate", "id": stored[key]}
+            else:
+                results[index] = {"index": index, "status": "error", "error": CONSTRAINT_ERROR}
+        else:
+            results[index] = {"index": index, "status": "created", "id": row_id}
+    _link_duplicates(results)
+
+
+def _summary(results: List[Dict]) -> BatchResult:
+    statuses = [result["status"] for result in results]
+    return BatchResult(created=statuses.count("created"), duplicates=statuses.count("duplicate"),
+                       errors=statuses.count("error"), results=results)
+
+
+def save_batch(session, model, items: List) -> BatchResult:
+    """
+    Validate ``items`` and insert the valid ones into ``model`` in one transaction
+
+    ``model`` is the backend's FieldData model with an ``idempotency_key``
+    column under a unique index.
+    """
+    results: List[Optional[Dict]] = [None] * len(items)
+    pending = {}
+    for index, item in enumerate(items):
+        try:
+            pending[index] = validate_item(item)
+        except ValueError as e:
+            results[index] = {"index": index, "status": "error", "error": str(e)}
+
+    if pending:
+        # A key conflict means a concurrent retry of the same batch stored
+        # some keys first: look them up again and insert what is still missing
+        for _ in range(2):
+            try:
+                _insert(session, model, results, pending)
+                session.commit()
+                return _summary(results)
+            except IntegrityError as e:
+                session.rollback()
+                if not _is_key_conflict(e):
+                    break
+        _insert_each(session, model, results, pending)
+        session.commit()
+    return _summary(results)
@@ -6,31 +6,46 @@
 - Масштабирования изображений
 - Конвертации форматов изображений
 - Валидации изображений
+- Отображения миниатюр из постоянного кэша с фоновой подгрузкой
 """
 
 import os
 from pathlib import Path
 from PIL import Image, ImageQt
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
 from PyQt5.QtGui import QPixmap
 from PyQt5.QtWidgets import QMessageBox
 import logging
 
+from .image_probe import SUPPORTED_FORMATS, probe_image, probe_images
+from .image_transcoder import open_downscaled
+from .thumbnail_cache import ThumbnailCache, get_thumbnail_cache
+
 
 class ImageHandler:
     """
     Класс для обработки изображений.
     """
     
-    SUPPORTED_FORMATS = {'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tiff'}
+    SUPPORTED_FORMATS = SUPPORTED_FORMATS
     
-    def __init__(self, logger=None):
+    def __init__(self, logger=None, thumbnail_cache=None):
         """
         Инициализация обработчика изображений.
         
         Args:
             logger: Объект логгера (опционально)
+            thumbnail_cache: Кэш миниатюр (по умолчанию общий кэш приложения)
         """
         self.logger = logger or logging.getLogger(__name__)
+        self._thumbnail_cache = thumbnail_cache
+    
+    @property
+    def thumbnail_cache(self) -> ThumbnailCache:
+        """Кэш миниатюр, создается при первом обращении"""
+        if self._thumbnail_cache is None:
+            self._thumbnail_cache = get_thumbnail_cache()
+        return self._thumbnail_cache
         
     def validate_image(self, file_path):
         """
@@ -42,33 +57,48 @@ class ImageHandler:
         Returns:
             bool: True, если файл является допустимым изображением, иначе False
         """
-        try:
-            file_path = Path(file_path)
-            if not file_path.exists():
-                self.logger.error(f"Файл не существует: {file_path}")
-                return False
-            
-            if file_path.suffix.lower() not in self.SUPPORTED_FORMATS:
-                self.logger.error(f"Неподдерживаемый формат изображения: {file_path.suffix}")
-                return False
-            
-            # Проверяем, можно ли открыть изображение
-            with Image.open(file_path) as img:
-                img.verify()
+        return self.probe(file_path)['valid']
+    
+    def probe(self, file_path):
+        """
+        Проверяет изображение и извлекает метаданные за одно открытие файла.
+        
+        Args:
+            file_path (str): Путь к файлу изображения
             
-            # Повторно открываем изображение, так как verify() закрывает его
-            with Image.open(file_path):
-                pass
+        Returns:
+            dict: Результат probe_image (valid, format, size, mode, orientation,
+            taken_at, gps и др.)
+        """
+        info = probe_image(file_path)
+        if not info['valid']:
+            self.logger.error(info['error'])
+        return info
+    
+    def probe_many(self, file_paths, workers=None):
+        """
+        Пакетная проверка изображений в пуле процессов.
+        
+        Args:
+            file_paths: Пути к файлам изображений
+            workers (int): Число процессов (по умолчанию число ядер)
             
-            return True
-        except Exception as e:
-            self.logger.error(f"Ошибка при валидации изображения {file_path}: {str(e)}")
-            return False
+        Returns:
+            list: Результаты probe_image в порядке входных путей
+        """
+        results = probe_images(file_paths, workers=workers)
+        for info in results:
+            if not info['valid']:
+                self.logger.error(info['error'])
+        return results
     
     def load_image(self, file_path, max_size=(800, 600)):
         """
         Загружает изображение и возвращает его в формате QPixmap.
         
+        Уменьшенная копия берется из кэша миниатюр; исходный файл
+        открывается только при промахе кэша.
+        
         Args:
             file_path (str): Путь к файлу изображения
             max_size (tuple): Максимальный размер изображения (ширина, высота)
@@ -77,23 +107,16 @@ class ImageHandler:
             QPixmap: Изображение в формате QPixmap или None в случае ошибки
         """
         try:
-            if not self.validate_image(file_path):
+            if Path(file_path).suffix.lower() not in self.SUPPORTED_FORMATS:
+                self.logger.error(f"Неподдерживаемый формат изображения: {Path(file_path).suffix}")
                 return None
             
-            # Открываем изображение с помощью PIL
-            with Image.open(file_path) as img:
-                # Конвертируем в RGB, если изображение в другом формате (например, RGBA)
-                if img.mode in ('RGBA', 'LA', 'P'):
-                    img = img.convert('RGB')
-                
-                # Масштабируем изображение, если оно больше максимального размера
-                img.thumbnail(max_size, Image.Resampling.LANCZOS)
-                
-                # Конвертируем в QPixmap
-                qt_image = ImageQt.ImageQt(img)
-                pixmap = QPixmap.fromImage(qt_image)
-                
-                return pixmap
+            thumbnail_path = self.thumbnail_cache.get_or_create(file_path, tuple(max_size))
+            if thumbnail_path is None:
+                return None
+            
+            pixmap = QPixmap(str(thumbnail_path))
+            return None if pixmap.isNull() else pixmap
         except Exception as e:
             self.logger.error(f"Ошибка при загрузке изображения {file_path}: {str(e)}")
             return None
@@ -137,21 +160,25 @@ class ImageHandler:
             bool: True при успешном изменении размера, иначе False
         """
         try:
-            if not self.validate_image(file_path):
+            if Path(file_path).suffix.lower() not in self.SUPPORTED_FORMATS:
+                self.logger.error(f"Неподдерживаемый формат изображения: {Path(file_path).suffix}")
                 return False
             
-            with Image.open(file_path) as img:
-                if maintain_aspect_ratio:
-                    # Масштабируем с сохранением пропорций
-                    img.thumbnail(size, Image.Resampling.LANCZOS)
-                else:
-                    # Изменяем размер без сохранения пропорций
+            # Поврежденный файл не откроется или не декодируется, отдельная
+            # проверка перед открытием не нужна
+            if maintain_aspect_ratio:
+                # Масштабируем с сохранением пропорций; JPEG уменьшается
+                # уже при декодировании
+                img = open_downscaled(file_path, size)
+            else:
+                # Изменяем размер без сохранения пропорций
+                with Image.open(file_path) as img:
                     img = img.resize(size, Image.Resampling.LANCZOS)
-                
-                # Сохраняем изображение
-                img.save(output_path)
-                self.logger.info(f"Размер изображения изменен: {file_path} -> {output_path}")
-                return True
+            
+            # Сохраняем изображение
+            img.save(output_path)
+            self.logger.info(f"Размер изображения изменен: {file_path} -> {output_path}")
+            return True
         except Exception as e:
             self.logger.error(f"Ошибка при изменении размера изображения {file_path}: {str(e)}")
             return False
@@ -167,18 +194,11 @@ class ImageHandler:
             dict: Словарь с информацией об изображении
         """
         try:
-            if not self.validate_image(file_path):
+            info = self.probe(file_path)
+            if not info['valid']:
                 return None
-            
-            with Image.open(file_path) as img:
-                info = {
-                    'format': img.format,
-                    'size': img.size,  # (ширина, высота)
-                    'mode': img.mode,
-                    'file_path': str(file_path),
-                    'file_size': os.path.getsize(file_path)
-                }
-                return info
+            # size - (ширина, высота); также orientation, taken_at и gps
+            return {key: value for key, value in info.items() if key not in ('valid', 'error')}
         except Exception as e:
             self.logger.error(f"Ошибка при получении информации об изображении {file_path}: {str(e)}")
             return None
@@ -210,4 +230,85 @@ def scale_pixmap(pixmap, max_width, max_height, keep_aspect_ratio=True):
             max_width, max_height,
             Qt.IgnoreAspectRatio,
             Qt.SmoothTransformation
-        )
\ No newline at end of file
+        )
+
+
+class _ThumbnailSignals(QObject):
+    finished = pyqtSignal(str, tuple, str)
+
+
+class _ThumbnailTask(QRunnable):
+    """Задача пула потоков, создающая одну миниатюру"""
+    
+    def __init__(self, cache, file_path, size):
+        super().__init__()
+        self.cache = cache
+        self.file_path = file_path
+        self.size = size
+        self.signals = _ThumbnailSignals()
+    
+    def run(self):
+        thumbnail_path = self.cache.get_or_create(self.file_path, self.size)
+        self.signals.finished.emit(self.file_path, self.size, str(thumbnail_path or ""))
+
+
+class ThumbnailLoader(QObject):
+    """
+    Фоновая подгрузка миниатюр для списков и таблиц фотографий.
+    
+    Попадания в кэш отдаются сразу, промахи обрабатываются в QThreadPool,
+    и готовая миниатюра приходит сигналом thumbnail_ready, не блокируя
+    цикл событий Qt. Повторные запросы одной и той же миниатюры, пока она
+    создается, не порождают новых задач.
+    
+    Пример:
+        loader = ThumbnailLoader()
+        loader.thumbnail_ready.connect(self.on_thumbnail_ready)
+        pixmap = loader.request(path, (160, 120))  # None, если миниатюры еще нет
+    """
+    
+    thumbnail_ready = pyqtSignal(str, QPixmap)
+    thumbnail_failed = pyqtSignal(str)
+    
+    def __init__(self, thumbnail_cache=None, max_threads=None, parent=None):
+        super().__init__(parent)
+        self.cache = thumbnail_cache or get_thumbnail_cache()
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads or self.cache.workers)
+        self._pending = set()
+    
+    def request(self, file_path, size):
+        """
+        Запрашивает миниатюру.
+        
+        Returns:
+            QPixmap: Миниатюра из кэша или None, если она будет прислана сигналом
+        """
+        file_path, size = str(file_path), tuple(size)
+        cached = self.cache.get(file_path, size)
+        if cached is not None:
+            pixmap = QPixmap(str(cached))
+            if not pixmap.isNull():
+                return pixmap
+        
+        if (file_path, size) not in self._pending:
+            self._pending.add((file_path, size))
+            task = _ThumbnailTask(self.cache, file_path, size)
+            task.signals.finished.connect(self._on_finished)
+            self.pool.start(task)
+        return None
+    
+    @pyqtSlot(str, tuple, str)
+    def _on_finished(self, file_path, size, thumbnail_path):
+        # Слот выполняется в потоке интерфейса, где можно создавать QPixmap
+        self._pending.discard((file_path, size))
+        pixmap = QPixmap(thumbnail_path) if thumbnail_path else QPixmap()
+        if pixmap.isNull():
+            self.thumbnail_failed.emit(file_path)
+        else:
+            self.thumbnail_ready.emit(file_path, pixmap)
+    
+    def clear(self):
+        """Отменяет задачи, которые еще не начали выполняться"""
+        self.pool.clear()
+        self._pending.clear()
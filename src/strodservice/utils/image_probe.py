@@ -0,0 +1,152 @@
+"""
+Модуль однопроходной проверки фотографий и извлечения их метаданных.
+
+Каждый файл открывается ровно один раз: из заголовка берутся формат,
+размер, цветовой режим и EXIF (ориентация, время съемки, GPS), после
+чего проверяется целостность данных. Для JPEG используется Image.draft,
+поэтому декодирование идет в уменьшенном масштабе и занимает доли от
+полного.
+
+Модуль не зависит от Qt, чтобы пакетный режим мог работать в пуле
+процессов.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from PIL import Image
+
+SUPPORTED_FORMATS = {'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tiff'}
+
+# Теги EXIF
+EXIF_ORIENTATION = 0x0112
+EXIF_DATETIME = 0x0132
+EXIF_IFD = 0x8769
+EXIF_DATETIME_ORIGINAL = 0x9003
+GPS_IFD = 0x8825
+
+# Размер, до которого draft уменьшает JPEG при проверке
+DRAFT_SIZE = (64, 64)
+
+
+def _parse_exif_datetime(value) -> Optional[str]:
+    if not value:
+        return None
+    try:
+        return datetime.strptime(str(value).strip('\x00 '), "%Y:%m:%d %H:%M:%S").isoformat()
+    except ValueError:
+        return None
+
+
+def _gps_to_degrees(value, ref) -> Optional[float]:
+    try:
+        degrees, minutes, seconds = (float(part) for part in value)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+    result = degrees + minutes / 60 + seconds / 3600
+    return -result if ref in ('S', 'W') else result
+
+
+def _read_gps(exif) -> Optional[Dict]:
+    gps = exif.get_ifd(GPS_IFD)
+    if not gps:
+        return None
+    latitude = _gps_to_degrees(gps.get(2), gps.get(1))
+    longitude = _gps_to_degrees(gps.get(4), gps.get(3))
+    if latitude is None or longitude is None:
+        return None
+    altitude = gps.get(6)
+    try:
+        altitude = float(altitude) if altitude is not None else None
+        if altitude is not None and gps.get(5) in (1, b'\x01'):
+            altitude = -altitude
+    except (TypeError, ValueError, ZeroDivisionError):
+        altitude = None
+    return {'latitude': latitude, 'longitude': longitude, 'altitude': altitude}
+
+
+def probe_image(file_path) -> Dict:
+    """
+    Проверяет изображение и извлекает метаданные за одно открытие файла.
+
+    Args:
+        file_path (str): Путь к файлу изображения
+
+    Returns:
+        dict: Ключи valid, error, file_path, file_size, format, size (ширина,
+        высота), mode, orientation (1-8), taken_at (ISO 8601), gps (latitude,
+        longitude, altitude). Для недопустимого файла valid=False, а error
+        содержит причину.
+    """
+    file_path = Path(file_path)
+    result = {
+        'valid': False,
+        'error': None,
+        'file_path': str(file_path),
+        'file_size': None,
+        'format': None,
+        'size': None,
+        'mode': None,
+        'orientation': 1,
+        'taken_at': None,
+        'gps': None,
+    }
+
+    if file_path.suffix.lower() not in SUPPORTED_FORMATS:
+        result['error'] = f"Неподдерживаемый формат изображения: {file_path.suffix}"
+        return result
+
+    try:
+        result['file_size'] = file_path.stat().st_size
+        with Image.open(file_path) as img:
+            result['format'] = img.format
+            result['size'] = img.size
+            result['mode'] = img.mode
+
+            exif = img.getexif()
+            if exif:
+                result['orientation'] = exif.get(EXIF_ORIENTATION, 1)
+                result['taken_at'] = (
+                    _parse_exif_datetime(exif.get_ifd(EXIF_IFD).get(EXIF_DATETIME_ORIGINAL))
+                    or _parse_exif_datetime(exif.get(EXIF_DATETIME))
+                )
+                result['gps'] = _read_gps(exif)
+
+            # Проверка целостности данных: JPEG декодируется в уменьшенном
+            # масштабе, остальные форматы проверяются verify()
+            if img.format == 'JPEG':
+                img.draft('RGB', DRAFT_SIZE)
+                img.load()
+            else:
+                img.verify()
+        result['valid'] = True
+    except FileNotFoundError:
+        result['error'] = f"Файл не существует: {file_path}"
+    except Exception as e:
+        result['error'] = f"Ошибка при валидации изображения {file_path}: {str(e)}"
+    return result
+
+
+def probe_images(file_paths: Iterable, workers: int = None, chunksize: int = 16) -> List[Dict]:
+    """
+    Пакетная проверка изображений в пуле процессов.
+
+    Args:
+        file_paths: Пути к файлам изображений
+        workers (int): Число процессов (по умолчанию число ядер); 1 - без пула
+        chunksize (int): Число файлов, передаваемых процессу за раз
+
+    Returns:
+        list: Результаты probe_image в порядке входных путей
+    """
+    file_paths = [str(path) for path in file_paths]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(file_paths) <= 1:
+        return [probe_image(path) for path in file_paths]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(probe_image, file_paths, chunksize=chunksize))
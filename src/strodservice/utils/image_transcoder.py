@@ -0,0 +1,289 @@
+"""
+Модуль пакетного уменьшения и перекодирования фотографий.
+
+Фотографии обрабатываются в пуле процессов. JPEG уменьшается уже при
+декодировании (Image.draft), затем быстрым усреднением (Image.reduce), и
+только остаток масштаба приходится на LANCZOS. Уже готовые результаты
+пропускаются: сведения об исходных файлах и параметрах хранятся в
+манифесте каталога результатов.
+"""
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+from .image_probe import SUPPORTED_FORMATS, EXIF_ORIENTATION
+
+MANIFEST_NAME = ".transcode_manifest.json"
+
+OUTPUT_FORMATS = {
+    'jpeg': ('JPEG', '.jpg'),
+    'webp': ('WEBP', '.webp'),
+}
+
+# Ориентации EXIF, при которых ширина и высота меняются местами
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+# Во сколько раз промежуточное изображение после draft/reduce должно быть
+# больше результата. При 1.0 декодер JPEG сразу уменьшает 12-мегапиксельный
+# снимок до ближайшего масштаба не меньше результата; на снимке 4000x3000 ->
+# 1600x1200 это примерно вдвое быстрее полного декодирования с LANCZOS
+REDUCING_GAP = 1.0
+
+
+@dataclass
+class TranscodeReport:
+    """Итоги пакетного перекодирования"""
+    done: int = 0
+    skipped: int = 0
+    errors: Dict[str, str] = field(default_factory=dict)
+    bytes_in: int = 0
+    bytes_out: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def images_per_sec(self) -> float:
+        return self.done / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def mb_per_sec(self) -> float:
+        return self.bytes_in / (1024 * 1024) / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"Обработано: {self.done}, пропущено: {self.skipped}, ошибок: {len(self.errors)}; "
+            f"{self.elapsed:.1f} с, {self.images_per_sec:.1f} изобр./с, {self.mb_per_sec:.1f} МБ/с"
+        )
+
+
+def _file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def open_downscaled(file_path, max_size: Tuple[int, int], rgb: bool = False) -> Image.Image:
+    """
+    Открывает изображение, уменьшенное до размеров не больше max_size.
+
+    JPEG декодируется сразу в масштабе 1/2, 1/4 или 1/8 (draft), затем
+    уменьшается усреднением блоков (reduce), и только последний шаг
+    выполняется фильтром LANCZOS. Ориентация по EXIF применяется к
+    результату.
+
+    Args:
+        rgb: Привести изображение к RGB (для записи в JPEG/WebP); иначе
+            режим исходника, в том числе прозрачность, сохраняется
+    """
+    with Image.open(file_path) as img:
+        orientation = img.getexif().get(EXIF_ORIENTATION, 1)
+        box = max_size[::-1] if orientation in TRANSPOSED_ORIENTATIONS else max_size
+        if rgb and img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        # thumbnail с reducing_gap выполняет draft и reduce перед LANCZOS
+        img.thumbnail(box, Image.Resampling.LANCZOS, reducing_gap=REDUCING_GAP)
+        img.load()
+
+    return ImageOps.exif_transpose(img)
+
+
+def transcode_image(source, destination, max_size: Tuple[int, int], output_format: str = 'jpeg',
+                    quality: int = 85) -> Dict:
+    """
+    Уменьшает и перекодирует одну фотографию.
+
+    Результат записывается во временный файл и переименовывается, чтобы
+    прерванная обработка не оставляла испорченных файлов.
+
+    Returns:
+        dict: source, destination, bytes_in, bytes_out
+    """
+    source, destination = Path(source), Path(destination)
+    pil_format, _ = OUTPUT_FORMATS[output_format]
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = destination.with_name(destination.name + ".part")
+
+    img = open_downscaled(source, max_size, rgb=True)
+    save_options = {'quality': quality}
+    if pil_format == 'JPEG':
+        save_options.update(optimize=True, progressive=True)
+    else:
+        save_options.update(method=4)
+    exif = img.info.get('exif')
+    if exif:
+        save_options['exif'] = exif
+
+    try:
+        img.save(tmp_path, pil_format, **save_options)
+        os.replace(tmp_path, destination)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+    return {
+        'source': str(source),
+        'destination': str(destination),
+        'bytes_in': source.stat().st_size,
+        'bytes_out': destination.stat().st_size,
+    }
+
+
+def _run_job(source: Path, destination: Path, max_size: Tuple[int, int], output_format: str,
+             quality: int) -> Dict:
+    """Задание пула процессов: перекодирование и данные исходника для манифеста"""
+    stat = source.stat()
+    result = transcode_image(source, destination, max_size, output_format, quality)
+    result['source_mtime_ns'] = stat.st_mtime_ns
+    result['source_sha256'] = _file_hash(source)
+    return result
+
+
+def plan_directory(input_dir, output_dir, output_format: str = 'jpeg') -> List[Tuple[Path, Path]]:
+    """
+    Составляет список заданий для всех изображений каталога.
+
+    Структура подкаталогов сохраняется, расширение меняется на
+    расширение выходного формата.
+    """
+    input_dir, output_dir = Path(input_dir), Path(output_dir)
+    _, suffix = OUTPUT_FORMATS[output_format]
+    jobs = []
+    for source in sorted(input_dir.rglob('*')):
+        if source.is_file() and source.suffix.lower() in SUPPORTED_FORMATS:
+            jobs.append((source, (output_dir / source.relative_to(input_dir)).with_suffix(suffix)))
+    return jobs
+
+
+def plan_storage_tag(storage, tag: str, output_dir, output_format: str = 'jpeg') -> List[Tuple[Path, Path]]:
+    """
+    Составляет список заданий для изображений FileStorage с указанным тегом.
+    """
+    output_dir = Path(output_dir)
+    _, suffix = OUTPUT_FORMATS[output_format]
+    jobs = []
+    for file_info in storage.search_files(tags=[tag]):
+        stored_name = file_info['stored_name']
+        if Path(stored_name).suffix.lower() not in SUPPORTED_FORMATS:
+            continue
+        source = storage.get_file_path(stored_name)
+        if source:
+            jobs.append((Path(source), (output_dir / stored_name).with_suffix(suffix)))
+    return jobs
+
+
+class _Manifest:
+    """Сведения о готовых результатах: время изменения, размер и хэш исходника"""
+
+    def __init__(self, output_dir: Path):
+        self.path = Path(output_dir) / MANIFEST_NAME
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.entries = {}
+
+    def is_up_to_date(self, source: Path, destination: Path, params: str) -> bool:
+        entry = self.entries.get(str(destination))
+        if entry is None or entry.get('params') != params or not destination.exists():
+            return False
+        stat = source.stat()
+        if entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            return True
+        # Время изменения другое (например, файл скопирован заново), но
+        # содержимое могло не измениться
+        if entry['size'] == stat.st_size and entry.get('sha256') == _file_hash(source):
+            entry['mtime_ns'] = stat.st_mtime_ns
+            return True
+        return False
+
+    def record(self, destination: Path, params: str, result: Dict) -> None:
+        self.entries[str(destination)] = {
+            'mtime_ns': result['source_mtime_ns'],
+            'size': result['bytes_in'],
+            'sha256': result['source_sha256'],
+            'params': params,
+        }
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+def transcode_batch(jobs: List[Tuple[Path, Path]], output_dir, max_size: Tuple[int, int],
+                    output_format: str = 'jpeg', quality: int = 85, workers: int = None,
+                    progress: Optional[Callable[[int, int], None]] = None) -> TranscodeReport:
+    """
+    Выполняет задания перекодирования в пуле процессов.
+
+    Args:
+        jobs: Пары (исходный файл, файл результата)
+        output_dir: Каталог результатов, в нем хранится манифест
+        max_size: Максимальные ширина и высота результата
+        output_format: 'jpeg' или 'webp'
+        quality: Качество сжатия
+        workers: Число процессов (по умолчанию число ядер)
+        progress: Вызывается как progress(done, total) после каждого файла
+
+    Returns:
+        TranscodeReport: Итоги с пропускной способностью
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Неподдерживаемый выходной формат: {output_format}")
+    params = f"{max_size[0]}x{max_size[1]}|{output_format}|{quality}"
+    manifest = _Manifest(output_dir)
+    report = TranscodeReport()
+    started = time.perf_counter()
+
+    pending = []
+    for source, destination in jobs:
+        try:
+            if manifest.is_up_to_date(Path(source), Path(destination), params):
+                report.skipped += 1
+                continue
+        except OSError as e:
+            report.errors[str(source)] = str(e)
+            continue
+        pending.append((Path(source), Path(destination)))
+
+    total = len(jobs)
+    finished = report.skipped + len(report.errors)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    try:
+        with ProcessPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = {
+                executor.submit(_run_job, source, destination, max_size, output_format, quality):
+                    (source, destination)
+                for source, destination in pending
+            }
+            for future in as_completed(futures):
+                source, destination = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    report.errors[str(source)] = str(e)
+                else:
+                    report.done += 1
+                    report.bytes_in += result['bytes_in']
+                    report.bytes_out += result['bytes_out']
+                    manifest.record(destination, params, result)
+                finished += 1
+                if progress is not None:
+                    progress(finished, total)
+    finally:
+        manifest.save()
+        report.elapsed = time.perf_counter() - started
+    return report
@@ -1,28 +1,11 @@
-import smtplib
-from email.mime.text import MIMEText
-from twilio.rest import Client
+from strodservice.services.notification_outbox import get_outbox
 
-def send_email(to_email, subject, body):
-    msg = MIMEText(body)
-    msg['Subject'] = subject
-    msg['From'] = 'admin@company.com'
-    msg['To'] = to_email
+# Сообщения ставятся в очередь (services/notification_outbox.py) и
+# отправляются фоновыми потоками: вызов не ждет SMTP-сервер или Twilio.
+# Сообщения с одним ключом digest за короткое время приходят одной сводкой.
 
-    try:
-        with smtplib.SMTP('smtp.gmail.com', 587) as server:
-            server.starttls()
-            server.login('your_email@gmail.com', 'password')
-            server.send_message(msg)
-    except Exception as e:
-        print(f"Ошибка email: {e}")
+def send_email(to_email, subject, body, digest=None):
+    return get_outbox().enqueue('email', to_email, body, subject=subject, digest=digest)
 
-def send_sms(to_number, message):
-    client = Client("TWILIO_SID", "TWILIO_TOKEN")
-    try:
-        client.messages.create(
-            body=message,
-            from_="+1234567890",
-            to=to_number
-        )
-    except Exception as e:
-        print(f"Ошибка SMS: {e}")
\ No newline at end of file
+def send_sms(to_number, message, digest=None):
+    return get_outbox().enqueue('sms', to_number, message, digest=digest)
\ No newline at end of file
@@ -4,20 +4,10 @@ import sys
 # Это должно быть САМЫМ первым (до всех остальных импортов)
 BASE_DIR = Path(__file__).resolve().parents[2]   # два уровня вверх → корень проекта
 sys.path.insert(0, str(BASE_DIR))
-import requests
+from strodservice.config.settings import settings
+from strodservice.services.notification_outbox import get_outbox
 
-TELEGRAM_BOT_TOKEN = "YOUR_BOT_TOKEN"
-TELEGRAM_CHAT_ID = "YOUR_CHAT_ID"
-
-def send_telegram_message(message):
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-    data = {
-        'chat_id': TELEGRAM_CHAT_ID,
-        'text': message
-    }
-    try:
-        response = requests.post(url, data=data)
-        response.raise_for_status()
-        print("Сообщение отправлено в Telegram.")
-    except Exception as e:
-        print(f"Ошибка отправки в Telegram: {e}")
\ No newline at end of file
+def send_telegram_message(message, chat_id=None):
+    # Отправка выполняется в фоне (services/notification_outbox.py),
+    # поэтому окно приложения не ждет ответа Telegram
+    return get_outbox().enqueue('telegram', chat_id or settings.TELEGRAM_CHAT_ID, message)
\ No newline at end of file
@@ -0,0 +1,221 @@
+"""
+Модуль постоянного кэша миниатюр фотоотчетов.
+
+Миниатюры хранятся на диске в виде JPEG-файлов. Ключ кэша строится из
+пути к исходному файлу, его времени изменения, размера и требуемых
+габаритов миниатюры, поэтому измененная фотография автоматически получает
+новую миниатюру. Общий объем кэша ограничен: при превышении лимита
+удаляются давно не использованные миниатюры (LRU). Порядок использования
+хранится во времени изменения файлов кэша и переживает перезапуск.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+
+from PIL import Image
+
+from ..config.settings import settings
+
+THUMBNAIL_SUFFIX = ".jpg"
+THUMBNAIL_QUALITY = 85
+
+# Расширения, для которых pregenerate строит миниатюры
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tiff'}
+
+
+class ThumbnailCache:
+    """
+    Дисковый кэш миниатюр с LRU-вытеснением по суммарному размеру.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=None, workers=None, logger=None):
+        """
+        Инициализация кэша.
+
+        Args:
+            cache_dir: Каталог кэша (по умолчанию THUMBNAIL_CACHE_DIR)
+            max_bytes: Максимальный объем кэша в байтах (по умолчанию THUMBNAIL_CACHE_MAX_SIZE)
+            workers: Число потоков фоновой генерации (по умолчанию THUMBNAIL_WORKERS)
+            logger: Объект логгера (опционально)
+        """
+        self.cache_dir = Path(cache_dir or settings.THUMBNAIL_CACHE_DIR)
+        self.max_bytes = settings.THUMBNAIL_CACHE_MAX_SIZE if max_bytes is None else max_bytes
+        self.workers = workers or settings.THUMBNAIL_WORKERS
+        self.logger = logger or logging.getLogger(__name__)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._executor = None
+        self._scan()
+
+    def _scan(self):
+        """Восстанавливает LRU-порядок по времени изменения файлов кэша"""
+        files = []
+        for path in self.cache_dir.glob(f"*/*{THUMBNAIL_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime_ns, path.stem, stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_bytes += size
+
+    @staticmethod
+    def make_key(file_path, size: Tuple[int, int]) -> Optional[str]:
+        """Ключ кэша для файла и размера миниатюры, None если файла нет"""
+        try:
+            resolved = Path(file_path).resolve()
+            stat = resolved.stat()
+        except OSError:
+            return None
+        raw = f"{resolved}|{stat.st_mtime_ns}|{stat.st_size}|{size[0]}x{size[1]}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def _path_for_key(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / (key + THUMBNAIL_SUFFIX)
+
+    def get(self, file_path, size: Tuple[int, int]) -> Optional[Path]:
+        """
+        Возвращает путь к готовой миниатюре или None, если ее нет в кэше.
+        """
+        key = self.make_key(file_path, size)
+        if key is None:
+            return None
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+        path = self._path_for_key(key)
+        try:
+            # Время изменения файла хранит LRU-порядок между запусками
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._forget(key)
+            return None
+        return path
+
+    def get_or_create(self, file_path, size: Tuple[int, int]) -> Optional[Path]:
+        """
+        Возвращает путь к миниатюре, создавая ее при промахе кэша.
+
+        Returns:
+            Path: Путь к миниатюре или None, если изображение не удалось открыть
+        """
+        cached = self.get(file_path, size)
+        if cached is not None:
+            return cached
+
+        key = self.make_key(file_path, size)
+        if key is None:
+            self.logger.error(f"Файл не существует: {file_path}")
+            return None
+        path = self._path_for_key(key)
+        try:
+            self._render(file_path, size, path)
+        except Exception as e:
+            self.logger.error(f"Ошибка при создании миниатюры {file_path}: {str(e)}")
+            return None
+
+        with self._lock:
+            self._forget(key)
+            self._entries[key] = path.stat().st_size
+            self._total_bytes += self._entries[key]
+            self._evict()
+        return path
+
+    @staticmethod
+    def _render(file_path, size: Tuple[int, int], path: Path):
+        """Создает миниатюру за одно открытие исходного файла"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.stem}.{uuid.uuid4().hex}.part")
+        try:
+            with Image.open(file_path) as img:
+                # Для JPEG декодер сразу уменьшает изображение в 2-8 раз
+                img.draft('RGB', size)
+                if img.mode not in ('RGB', 'L'):
+                    img = img.convert('RGB')
+                img.thumbnail(size, Image.Resampling.LANCZOS)
+                img.save(tmp_path, 'JPEG', quality=THUMBNAIL_QUALITY)
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def _forget(self, key: str):
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    def _evict(self):
+        """Удаляет самые старые миниатюры, пока кэш больше лимита"""
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                self._path_for_key(key).unlink()
+            except FileNotFoundError:
+                pass
+
+    @property
+    def total_bytes(self) -> int:
+        """Текущий объем кэша в байтах"""
+        return self._total_bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def pregenerate(self, file_paths: Iterable, sizes: Iterable[Tuple[int, int]] = None):
+        """
+        Ставит создание миниатюр в очередь фонового пула потоков.
+
+        Не блокирует вызывающий код; файлы, не являющиеся изображениями,
+        пропускаются.
+
+        Returns:
+            list: Объекты Future для созданных задач
+        """
+        sizes = list(sizes or settings.THUMBNAIL_PREGENERATE_SIZES)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="thumbnails"
+                )
+            executor = self._executor
+        futures = []
+        for file_path in file_paths:
+            if Path(file_path).suffix.lower() not in IMAGE_EXTENSIONS:
+                continue
+            for size in sizes:
+                futures.append(executor.submit(self.get_or_create, file_path, size))
+        return futures
+
+    def shutdown(self, wait: bool = True):
+        """Останавливает фоновый пул потоков"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_thumbnail_cache() -> ThumbnailCache:
+    """Возвращает общий для приложения кэш миниатюр"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ThumbnailCache()
+        return _default_cache
@@ -17,6 +17,14 @@ import uuid
 from werkzeug.utils import secure_filename
 from utils.erp_integration import ERPIntegration
 from core.excel_reports import generate_excel_report
+from strodservice.database.engine import engine_options, install_sqlite_pragmas, is_sqlite
+from strodservice.exceptions import AuthenticationError, ValidationError
+from strodservice.utils.auth_cache import AuthCache, CachedUser
+from strodservice.utils.field_batch import read_batch, save_batch, validate_item
+from sqlalchemy import event
+from strodservice.utils.api_pagination import keyset_response, parse_int, parse_period
+from strodservice.services.sync_changes import ChangeFeed
+from dataclasses import asdict
 
 SWAGGER_URL = '/api/docs'
 API_URL = '/static/swagger.json'
@@ -37,10 +45,17 @@ ERP_CONFIG = {
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key')
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///app_data.db')
+# Движок создается с теми же параметрами пула и PRAGMA SQLite, что и
+# у настольного приложения (database/engine.py)
+DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///app_data.db')
+app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(DATABASE_URL)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 db = SQLAlchemy(app)
+if is_sqlite(DATABASE_URL):
+    with app.app_context():
+        install_sqlite_pragmas(db.engine)
 CORS(app)
 socketio = SocketIO(app, cors_allowed_origins="*")
 
@@ -50,13 +65,29 @@ class User(db.Model):
     username = db.Column(db.String(80), unique=True, nullable=False)
     password_hash = db.Column(db.String(120), nullable=False)
     role = db.Column(db.String(20), default='employee')
+    # Увеличивается при смене роли; токены с прежней версией (claim ver)
+    # больше не принимаются (см. utils/auth_cache.py)
+    auth_version = db.Column(db.Integer, nullable=False, default=1)
 
 class Object(db.Model):
+    # Индекс выборки изменений для /api/sync/objects
+    __table_args__ = (
+        db.Index('ix_object_updated_at_id', 'updated_at', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String)
     location = db.Column(db.String)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class FieldData(db.Model):
+    # Индексы под постраничную выдачу /api/field_data по id и по (date, id)
+    __table_args__ = (
+        db.Index('ix_field_data_object_id_id', 'object_id', 'id'),
+        db.Index('ix_field_data_object_id_date_id', 'object_id', 'date', 'id'),
+        db.Index('ix_field_data_date_id', 'date', 'id'),
+        db.Index('ux_field_data_idempotency_key', 'idempotency_key', unique=True),
+        db.Index('ix_field_data_updated_at_id', 'updated_at', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     object_id = db.Column(db.Integer)
     line_type = db.Column(db.String)
@@ -65,8 +96,74 @@ class FieldData(db.Model):
     material_used = db.Column(db.Float)
     date = db.Column(db.DateTime, default=datetime.utcnow)
     notes = db.Column(db.String)
+    # Ключ записи от клиента: повтор пакета не создает дубликатов (см. utils/field_batch.py)
+    idempotency_key = db.Column(db.String(64))
+    # Время последнего изменения для /api/sync/field_data
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class DeletedRecord(db.Model):
+    # Отметки об удалении объектов и полевых данных для /api/sync/<table>;
+    # пишутся в той же транзакции, что и удаление (services/sync_changes.py)
+    __tablename__ = 'deleted_records'
+    __table_args__ = (
+        db.Index('ix_deleted_records_table_name_deleted_at_id', 'table_name', 'deleted_at', 'id'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(64), nullable=False)
+    record_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+# Столбцы, которые получают клиенты API; idempotency_key остается на сервере
+OBJECT_FIELDS = ('id', 'name', 'location')
+FIELD_DATA_FIELDS = ('id', 'object_id', 'line_type', 'length', 'width', 'material_used', 'date', 'notes')
+
+# Изменения для /api/sync/<table> из этой же базы и в том же виде, что и
+# полные списки /api/objects и /api/field_data
+sync_feed = ChangeFeed({'objects': Object, 'field_data': FieldData}, DeletedRecord.__table__,
+                       {'objects': OBJECT_FIELDS, 'field_data': FIELD_DATA_FIELDS})
+
+@event.listens_for(User.role, 'set')
+def bump_auth_version(target, value, oldvalue, initiator):
+    if target.id is not None and value != oldvalue:
+        target.auth_version = (target.auth_version or 1) + 1
+        auth_cache.invalidate_user(target.id)
+
+def upgrade_schema():
+    """Добавляет столбцы и индексы, появившиеся после создания базы (create_all их не добавляет)"""
+    inspector = db.inspect(db.engine)
+    if 'auth_version' not in {column['name'] for column in inspector.get_columns('user')}:
+        db.session.execute(db.text('ALTER TABLE "user" ADD COLUMN auth_version INTEGER NOT NULL DEFAULT 1'))
+    if 'idempotency_key' not in {column['name'] for column in inspector.get_columns('field_data')}:
+        db.session.execute(db.text('ALTER TABLE field_data ADD COLUMN idempotency_key VARCHAR(64)'))
+        db.session.execute(db.text('CREATE UNIQUE INDEX IF NOT EXISTS ux_field_data_idempotency_key '
+                                   'ON field_data (idempotency_key)'))
+    # Индексы постраничной выдачи /api/field_data (create_all не добавляет
+    # индексы к существующей таблице)
+    for name, columns in (('ix_field_data_object_id_id', 'object_id, id'),
+                          ('ix_field_data_object_id_date_id', 'object_id, date, id'),
+                          ('ix_field_data_date_id', 'date, id')):
+        db.session.execute(db.text(f'CREATE INDEX IF NOT EXISTS {name} ON field_data ({columns})'))
+    # Время изменения для /api/sync/<table>: существующие строки считаются
+    # измененными сейчас и придут клиентам при следующей синхронизации
+    now = datetime.utcnow()
+    for table in (Object.__table__, FieldData.__table__):
+        if 'updated_at' not in {column['name'] for column in inspector.get_columns(table.name)}:
+            db.session.execute(db.text(f'ALTER TABLE "{table.name}" ADD COLUMN updated_at DATETIME'))
+            db.session.execute(db.update(table).values(updated_at=now))
+        db.session.execute(db.text(f'CREATE INDEX IF NOT EXISTS ix_{table.name}_updated_at_id '
+                                   f'ON "{table.name}" (updated_at, id)'))
+    db.session.commit()
 
 # === Функции аутентификации ===
+def load_user(user_id):
+    user = db.session.get(User, user_id)
+    if user is None:
+        return None
+    return CachedUser(user.id, user.username, user.role, user.auth_version)
+
+# Проверенные токены и пользователи на settings.AUTH_CACHE_TTL секунд
+auth_cache = AuthCache(load_user)
+
 def token_required(f):
     def decorated(*args, **kwargs):
         token = request.headers.get('Authorization')
@@ -74,9 +171,8 @@ def token_required(f):
             return jsonify({'message': 'Токен отсутствует!'}), 401
 
         try:
-            data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=["HS256"])
-            current_user = User.query.filter_by(id=data['user_id']).first()
-        except:
+            current_user = auth_cache.authenticate(token, app.config['SECRET_KEY'])
+        except AuthenticationError:
             return jsonify({'message': 'Токен недействителен!'}), 401
 
         return f(current_user, *args, **kwargs)
@@ -151,6 +247,7 @@ def login():
     token = jwt.encode({
         'user_id': user.id,
         'role': user.role,
+        'ver': user.auth_version,
         'exp': datetime.utcnow() + timedelta(hours=24)
     }, app.config['SECRET_KEY'], algorithm="HS256")
 
@@ -159,23 +256,95 @@ def login():
 @app.route('/api/objects', methods=['GET'])
 @token_required
 def get_objects(current_user):
-    objects = Object.query.all()
-    return jsonify([{'id': o.id, 'name': o.name, 'location': o.location} for o in objects])
+    # Страница объектов: ?fields=id,name&limit=500&cursor=...&format=ndjson
+    try:
+        return keyset_response(db.session, Object.__table__, OBJECT_FIELDS, {'id': ['id']})
+    except ValidationError as e:
+        return jsonify({'message': e.message}), 400
 
 @app.route('/api/field_data', methods=['GET'])
 @token_required
 def get_field_data(current_user):
-    data = FieldData.query.all()
-    return jsonify([{
-        'id': d.id,
-        'object_id': d.object_id,
-        'line_type': d.line_type,
-        'length': d.length,
-        'width': d.width,
-        'material_used': d.material_used,
-        'date': d.date.isoformat(),
-        'notes': d.notes
-    } for d in data])
+    # Страница полевых данных: фильтры object_id, line_type, date_from, date_to;
+    # порядок order=id или order=date; fields, limit, cursor, format - см.
+    # utils/api_pagination.py
+    args = request.args
+    try:
+        conditions = parse_period(args.get('date_from'), args.get('date_to'), FieldData.date)
+        object_id = parse_int(args.get('object_id'), 'object_id')
+        if object_id is not None:
+            conditions.append(FieldData.object_id == object_id)
+        if args.get('line_type'):
+            conditions.append(FieldData.line_type == args['line_type'])
+        return keyset_response(db.session, FieldData.__table__, FIELD_DATA_FIELDS,
+                               {'id': ['id'], 'date': ['date', 'id']}, conditions)
+    except ValidationError as e:
+        return jsonify({'message': e.message}), 400
+
+@app.route('/api/sync/<table_name>', methods=['GET'])
+@token_required
+def sync_changes(current_user, table_name):
+    # Изменения objects и field_data после водяного знака прошлого ответа:
+    # ?since=<watermark>&limit=500. Без since - все записи; см.
+    # services/sync_changes.py
+    try:
+        limit = parse_int(request.args.get('limit'), 'limit')
+        page = sync_feed.changes_since(db.session, table_name, request.args.get('since'), limit)
+    except ValidationError as e:
+        return jsonify({'message': e.message}), 400
+    return jsonify(asdict(page))
+
+@app.route('/api/field_data/batch', methods=['POST'])
+@token_required
+def add_field_data_batch(current_user):
+    # Пакет записей одним запросом и одной транзакцией: JSON-массив или
+    # NDJSON; в ответе результат по каждой записи (см. utils/field_batch.py)
+    try:
+        result = save_batch(db.session, FieldData, read_batch(request))
+    except ValidationError as e:
+        return jsonify({'message': e.message}), 400
+
+    if result.created:
+        socketio.emit('new_notification', {
+            'message': f'Пользователь {current_user.username} добавил записей полевых данных: {result.created}',
+            'type': 'info'
+        })
+
+    return jsonify(asdict(result))
+
+@app.route('/api/field_data/<int:record_id>', methods=['PUT'])
+@token_required
+def update_field_data(current_user, record_id):
+    # Изменение записи; поля, которых нет в запросе, остаются прежними
+    record = db.session.get(FieldData, record_id)
+    if record is None:
+        return jsonify({'message': 'Запись не найдена!'}), 404
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'message': 'Ожидается JSON-объект!'}), 400
+    current = {name: getattr(record, name) for name in FIELD_DATA_FIELDS if name not in ('id', 'date')}
+    current['date'] = record.date.isoformat() if record.date else None
+    try:
+        values = validate_item({**current, **data})
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    # Ключ идемпотентности задается только при создании записи
+    values.pop('idempotency_key')
+    for name, value in values.items():
+        setattr(record, name, value)
+    db.session.commit()
+    return jsonify({'status': 'success'})
+
+@app.route('/api/field_data/<int:record_id>', methods=['DELETE'])
+@role_required(['admin'])
+def delete_field_data(current_user, record_id):
+    # Удаление через ORM: отметка для /api/sync/field_data пишется в той же транзакции
+    record = db.session.get(FieldData, record_id)
+    if record is None:
+        return jsonify({'message': 'Запись не найдена!'}), 404
+    db.session.delete(record)
+    db.session.commit()
+    return jsonify({'status': 'success'})
 
 @app.route('/api/field_data', methods=['POST'])
 @token_required
@@ -228,11 +397,17 @@ def get_users(current_user):
 
 @app.route('/uploads/<filename>')
 def uploaded_file(filename):
-    return send_from_directory(UPLOAD_FOLDER, filename)
+    # Werkzeug отдает файл потоком и сам обрабатывает Range, ETag и
+    # условные заголовки (If-None-Match, If-Modified-Since, If-Range)
+    return send_from_directory(UPLOAD_FOLDER, filename, conditional=True)
 
 if __name__ == '__main__':
     if not os.path.exists(UPLOAD_FOLDER):
         os.makedirs(UPLOAD_FOLDER)
     with app.app_context():
         db.create_all()
+        upgrade_schema()
+        # Отметки об удалении старше SYNC_TOMBSTONE_RETENTION_DAYS
+        sync_feed.purge_tombstones(db.session.connection())
+        db.session.commit()
     socketio.run(app, host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,113 @@
+"""Tests for keyset pagination of the API list endpoints."""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask, jsonify, request
+from sqlalchemy import Column, DateTime, Float, Integer, MetaData, String, Table, create_engine
+from sqlalchemy.orm import Session
+
+from src.strodservice.exceptions import ValidationError
+from src.strodservice.utils.api_pagination import keyset_response, parse_int, parse_period
+
+metadata = MetaData()
+field_data = Table(
+    "field_data", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("object_id", Integer),
+    Column("length", Float),
+    Column("date", DateTime),
+    Column("notes", String),
+    Column("idempotency_key", String),
+)
+
+FIELDS = ["id", "object_id", "length", "date", "notes"]
+ORDERS = {"id": ["id"], "date": ["date", "id"]}
+START = datetime(2024, 5, 1, 8)
+
+
+@pytest.fixture
+def client():
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        # Every third record shares its date with the previous one
+        connection.execute(field_data.insert(), [
+            {"id": i, "object_id": 1 + i % 2, "length": float(i), "notes": f"запись {i}",
+             "date": START + timedelta(hours=i - i % 3), "idempotency_key": f"key-{i}"}
+            for i in range(1, 51)
+        ])
+    app = Flask(__name__)
+
+    @app.route("/api/field_data")
+    def field_data_page():
+        session = Session(engine)
+        try:
+            conditions = parse_period(request.args.get("date_from"), request.args.get("date_to"),
+                                      field_data.c.date)
+            object_id = parse_int(request.args.get("object_id"), "object_id")
+            if object_id is not None:
+                conditions.append(field_data.c.object_id == object_id)
+            response = keyset_response(session, field_data, FIELDS, ORDERS, conditions)
+            response.call_on_close(session.close)
+            return response
+        except ValidationError as e:
+            session.close()
+            return jsonify({"message": e.message}), 400
+
+    yield app.test_client()
+    engine.dispose()
+
+
+def _all_pages(client, query):
+    items, pages, url = [], 0, f"/api/field_data?{query}"
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        items.extend(json.loads(response.get_data(as_text=True)))
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        url = f"/api/field_data?{query}&cursor={cursor}" if cursor else None
+    return items, pages
+
+
+@pytest.mark.parametrize("order", ["id", "date"])
+def test_pages_cover_every_row_once(client, order):
+    items, pages = _all_pages(client, f"limit=7&order={order}")
+
+    assert pages == 8
+    assert sorted(item["id"] for item in items) == list(range(1, 51))
+    keys = [(item["date"], item["id"]) if order == "date" else item["id"] for item in items]
+    assert keys == sorted(keys)
+    # Columns outside the public list are not returned by default
+    assert all(list(item) == FIELDS for item in items)
+
+
+def test_filters_and_projection(client):
+    items, _ = _all_pages(client, "limit=4&order=date&object_id=2&fields=id,length"
+                                  "&date_from=2024-05-01T12:00:00&date_to=2024-05-02")
+
+    assert all(set(item) == {"id", "length"} for item in items)
+    assert [item["id"] for item in items] == [i for i in range(1, 51)
+                                             if i % 2 == 1 and 4 <= i - i % 3 < 40]
+
+
+def test_ndjson_and_link_header(client):
+    response = client.get("/api/field_data?limit=2&format=ndjson&fields=notes")
+
+    assert response.mimetype == "application/x-ndjson"
+    lines = response.get_data(as_text=True).splitlines()
+    assert [json.loads(line) for line in lines] == [{"notes": "запись 1"}, {"notes": "запись 2"}]
+    assert 'rel="next"' in response.headers["Link"]
+
+
+@pytest.mark.parametrize("query", ["fields=id,password", "fields=id,idempotency_key", "limit=0", "cursor=broken",
+                                   "order=length", "date_from=yesterday", "object_id=x"])
+def test_invalid_parameters_are_rejected(client, query):
+    assert client.get(f"/api/field_data?{query}").status_code == 400
+
+
+def test_cursor_of_another_order_is_rejected(client):
+    cursor = client.get("/api/field_data?limit=1").headers["X-Next-Cursor"]
+
+    assert client.get(f"/api/field_data?order=date&cursor={cursor}").status_code == 400
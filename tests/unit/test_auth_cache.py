@@ -0,0 +1,92 @@
+"""Tests for the JWT claims and user cache used by token_required."""
+from datetime import datetime, timedelta
+
+import jwt
+import pytest
+
+from src.strodservice.exceptions import AuthenticationError
+from src.strodservice.utils.auth_cache import AuthCache, CachedUser, TTLCache
+
+SECRET = "test-secret"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Users:
+    """Stands in for the user table and counts the queries"""
+
+    def __init__(self):
+        self.rows = {1: CachedUser(1, "ivanov", "employee", 1)}
+        self.loads = 0
+
+    def __call__(self, user_id):
+        self.loads += 1
+        return self.rows.get(user_id)
+
+
+def _token(user_id=1, version=1, hours=1):
+    return jwt.encode({"user_id": user_id, "ver": version,
+                       "exp": datetime.utcnow() + timedelta(hours=hours)}, SECRET, algorithm="HS256")
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def users():
+    return Users()
+
+
+@pytest.fixture
+def cache(users, clock):
+    return AuthCache(users, ttl=30, max_size=100, clock=clock)
+
+
+def test_user_is_loaded_once_per_ttl(cache, users, clock):
+    token = _token()
+    for _ in range(5):
+        assert cache.authenticate(token, SECRET).username == "ivanov"
+    assert users.loads == 1
+
+    clock.now += 31
+    cache.authenticate(token, SECRET)
+    assert users.loads == 2
+
+
+def test_role_change_revokes_older_tokens(cache, users):
+    old_token = _token(version=1)
+    cache.authenticate(old_token, SECRET)
+
+    users.rows[1] = CachedUser(1, "ivanov", "admin", 2)
+    # A token issued after the change is newer than the cached snapshot
+    assert cache.authenticate(_token(version=2), SECRET).role == "admin"
+    with pytest.raises(AuthenticationError):
+        cache.authenticate(old_token, SECRET)
+
+
+def test_invalid_tokens_and_missing_users_are_rejected(cache, users):
+    for token in ("garbage", _token(hours=-1), jwt.encode({"user_id": 1}, "other", algorithm="HS256"),
+                  _token(user_id=2)):
+        with pytest.raises(AuthenticationError):
+            cache.authenticate(token, SECRET)
+
+
+def test_ttl_cache_is_bounded_lru(clock):
+    cache = TTLCache(max_size=2, ttl=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+    cache.set("d", 4, ttl=1)
+    clock.now += 2
+    assert cache.get("d") is None and len(cache) == 1
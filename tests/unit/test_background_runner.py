@@ -0,0 +1,113 @@
+"""Tests for the background task runner of the desktop app."""
+import os
+import threading
+import time
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtWidgets = pytest.importorskip("PyQt5.QtWidgets")
+
+from src.strodservice.desktop.components import BackgroundRunner
+
+
+@pytest.fixture(scope="module")
+def qapp():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+@pytest.fixture
+def runner(qapp):
+    runner = BackgroundRunner(max_threads=4)
+    yield runner
+    runner.cancel_all()
+    runner.wait()
+
+
+def _drain(qapp, runner):
+    """Wait for the pool and deliver queued results to the GUI thread."""
+    runner.wait(5000)
+    for _ in range(5):
+        qapp.processEvents()
+
+
+def test_result_is_delivered_in_gui_thread(qapp, runner):
+    results = []
+    worker_threads = []
+
+    def work(value):
+        worker_threads.append(threading.current_thread())
+        return value * 2
+
+    runner.submit("channel", work, 21,
+                  on_result=lambda result: results.append((result, threading.current_thread())))
+    _drain(qapp, runner)
+
+    assert results == [(42, threading.main_thread())]
+    assert worker_threads[0] is not threading.main_thread()
+    assert not runner.is_running("channel")
+
+
+def test_only_latest_result_of_channel_is_delivered(qapp, runner):
+    results = []
+
+    def slow(value):
+        time.sleep(0.2)
+        return value
+
+    runner.submit("filter", slow, "old", on_result=results.append)
+    runner.submit("filter", lambda: "new", on_result=results.append)
+    runner.submit("other", lambda: "other", on_result=results.append)
+    _drain(qapp, runner)
+
+    assert sorted(results) == ["new", "other"]
+
+
+def test_cancellation_stops_cooperative_task(qapp, runner):
+    started = threading.Event()
+    steps = []
+    results = []
+
+    def long_task(cancel_token):
+        started.set()
+        for step in range(100):
+            cancel_token.raise_if_cancelled()
+            steps.append(step)
+            time.sleep(0.01)
+        return "done"
+
+    token = runner.submit("report", long_task, pass_token=True, on_result=results.append)
+    assert started.wait(5)
+    runner.cancel("report")
+    _drain(qapp, runner)
+
+    assert token.cancelled
+    assert results == []
+    assert len(steps) < 100
+
+
+def test_errors_are_delivered_to_error_handler(qapp, runner):
+    errors = []
+
+    def fail():
+        raise ValueError("boom")
+
+    runner.submit("channel", fail, on_result=pytest.fail, on_error=errors.append)
+    _drain(qapp, runner)
+
+    assert [str(error) for error in errors] == ["boom"]
+
+
+def test_progress_is_delivered_in_gui_thread(qapp, runner):
+    progress = []
+
+    def work(steps, progress):
+        for step in range(1, steps + 1):
+            progress(step, steps)
+        return steps
+
+    runner.submit("export", work, 3, on_progress=lambda *args: progress.append(
+        (args, threading.current_thread())))
+    _drain(qapp, runner)
+
+    assert progress == [((step, 3), threading.main_thread()) for step in (1, 2, 3)]
@@ -0,0 +1,69 @@
+"""Tests for the shared database engine factory."""
+import threading
+
+from sqlalchemy import text
+from sqlalchemy.pool import StaticPool
+
+from src.strodservice import database
+from src.strodservice.database import session as db_session
+from src.strodservice.database.engine import create_db_engine
+
+
+def _pragma(connection, name):
+    return connection.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_sqlite_file_engine_applies_pragmas(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    try:
+        with engine.connect() as connection:
+            assert _pragma(connection, "journal_mode") == "wal"
+            assert _pragma(connection, "synchronous") == 1
+            assert _pragma(connection, "busy_timeout") > 0
+            assert _pragma(connection, "temp_store") == 2
+    finally:
+        engine.dispose()
+
+
+def test_untuned_engine_keeps_sqlite_defaults(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'test.db'}", tuned=False)
+    try:
+        with engine.connect() as connection:
+            assert _pragma(connection, "journal_mode") == "delete"
+    finally:
+        engine.dispose()
+
+
+def test_memory_engine_is_shared_between_threads():
+    engine = create_db_engine("sqlite://")
+    assert isinstance(engine.pool, StaticPool)
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE t (x INTEGER)"))
+        connection.execute(text("INSERT INTO t VALUES (1)"))
+
+    result = []
+
+    def read():
+        with engine.connect() as connection:
+            result.append(connection.execute(text("SELECT x FROM t")).scalar())
+
+    thread = threading.Thread(target=read)
+    thread.start()
+    thread.join()
+    assert result == [1]
+    engine.dispose()
+
+
+def test_configure_engine_rebinds_session_factory(tmp_path):
+    original_url = str(db_session.engine.url)
+    try:
+        engine = db_session.configure_engine(f"sqlite:///{tmp_path / 'other.db'}")
+        assert db_session.get_engine() is engine
+        assert database.get_engine() is engine
+        session = db_session.SessionLocal()
+        try:
+            assert session.get_bind() is engine
+        finally:
+            session.close()
+    finally:
+        db_session.configure_engine(original_url)
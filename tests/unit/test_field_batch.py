@@ -0,0 +1,147 @@
+"""Tests for batch field data submission."""
+import json
+
+import pytest
+from flask import Flask, jsonify, request
+from flask_sqlalchemy import SQLAlchemy
+
+from src.strodservice.config.settings import settings
+from src.strodservice.exceptions import ValidationError
+from src.strodservice.utils.field_batch import CONSTRAINT_ERROR, read_batch, save_batch
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    db = SQLAlchemy(app)
+
+    class FieldData(db.Model):
+        __table_args__ = (db.Index("ux_field_data_idempotency_key", "idempotency_key", unique=True),
+                          # Stands in for a constraint the validation does not know about
+                          db.CheckConstraint("length IS NULL OR length < 1000"))
+        id = db.Column(db.Integer, primary_key=True)
+        object_id = db.Column(db.Integer)
+        line_type = db.Column(db.String)
+        length = db.Column(db.Float)
+        width = db.Column(db.Float)
+        material_used = db.Column(db.Float)
+        date = db.Column(db.DateTime)
+        notes = db.Column(db.String)
+        idempotency_key = db.Column(db.String(64))
+
+    @app.route("/api/field_data/batch", methods=["POST"])
+    def batch():
+        try:
+            result = save_batch(db.session, FieldData, read_batch(request))
+        except ValidationError as e:
+            return jsonify({"message": e.message}), 400
+        return jsonify({"created": result.created, "duplicates": result.duplicates,
+                        "errors": result.errors, "results": result.results})
+
+    with app.app_context():
+        db.create_all()
+    app.count_rows = lambda: db.session.query(FieldData).count()
+    return app
+
+
+def _item(key=None, **overrides):
+    item = {"object_id": 1, "line_type": "1.1", "length": 10.0, "width": 0.1,
+            "material_used": 1.5, "date": "2024-05-02T10:00:00", "idempotency_key": key}
+    item.update(overrides)
+    return item
+
+
+def test_batch_reports_each_item_and_retry_does_not_duplicate(app):
+    client = app.test_client()
+    items = [_item("a"), _item("b", length=-1), _item("c"), _item("a"), _item(None, line_type="")]
+
+    first = client.post("/api/field_data/batch", json=items).get_json()
+
+    assert (first["created"], first["duplicates"], first["errors"]) == (2, 1, 2)
+    assert [result["status"] for result in first["results"]] == ["created", "error", "created", "duplicate", "error"]
+    assert first["results"][3]["id"] == first["results"][0]["id"]
+    assert first["results"][1]["error"] == "length must be positive"
+
+    retry = client.post("/api/field_data/batch", json=items).get_json()
+
+    assert (retry["created"], retry["duplicates"]) == (0, 3)
+    assert [result.get("id") for result in retry["results"]] == [result.get("id") for result in first["results"]]
+    with app.app_context():
+        assert app.count_rows() == 2
+
+
+def test_ndjson_body_with_a_broken_line(app):
+    body = "\n".join([json.dumps(_item("x")), "{not json", "", json.dumps(_item(None, notes="без ключа"))])
+
+    response = app.test_client().post("/api/field_data/batch", data=body,
+                                      content_type="application/x-ndjson").get_json()
+
+    assert [result["status"] for result in response["results"]] == ["created", "error", "created"]
+
+
+@pytest.mark.parametrize("body", [{"record": 1}, "text"])
+def test_body_must_be_a_list_of_records(app, body):
+    assert app.test_client().post("/api/field_data/batch", json=body).status_code == 400
+
+
+def test_batch_size_is_limited(app, monkeypatch):
+    monkeypatch.setattr(settings, "API_BATCH_MAX_ITEMS", 2)
+
+    response = app.test_client().post("/api/field_data/batch", json={"items": [_item(), _item(), _item()]})
+
+    assert response.status_code == 400
+
+
+def test_keys_stored_by_a_concurrent_request_are_reported_as_duplicates(app, monkeypatch):
+    from src.strodservice.utils import field_batch
+
+    client = app.test_client()
+    stored = client.post("/api/field_data/batch", json=[_item("a")]).get_json()["results"][0]["id"]
+
+    # The first lookup misses the key, as if the other request committed after it
+    lookup = field_batch._stored_keys
+    calls = []
+    monkeypatch.setattr(field_batch, "_stored_keys",
+                        lambda *args: calls.append(1) or ({} if len(calls) == 1 else lookup(*args)))
+
+    response = client.post("/api/field_data/batch", json=[_item("a"), _item("b")]).get_json()
+
+    assert [(result["status"], result["id"] == stored) for result in response["results"]] == \
+        [("duplicate", True), ("created", False)]
+    with app.app_context():
+        assert app.count_rows() == 2
+
+
+def test_repeated_key_conflict_falls_back_to_row_by_row_insert(app, monkeypatch):
+    from src.strodservice.utils import field_batch
+
+    client = app.test_client()
+    stored = client.post("/api/field_data/batch", json=[_item("a")]).get_json()["results"][0]["id"]
+
+    # Both batch attempts miss the key; the row by row insert finds it
+    lookup = field_batch._stored_keys
+    calls = []
+    monkeypatch.setattr(field_batch, "_stored_keys",
+                        lambda *args: calls.append(1) or ({} if len(calls) <= 2 else lookup(*args)))
+
+    response = client.post("/api/field_data/batch", json=[_item("a"), _item("b"), _item("a")])
+
+    assert response.status_code == 200
+    assert [(result["status"], result["id"] == stored) for result in response.get_json()["results"]] == \
+        [("duplicate", True), ("created", False), ("duplicate", True)]
+    with app.app_context():
+        assert app.count_rows() == 2
+
+
+def test_row_breaking_another_constraint_is_reported_as_an_error(app):
+    items = [_item("a"), _item("b", length=5000.0), _item("c"), _item("b")]
+
+    response = app.test_client().post("/api/field_data/batch", json=items)
+
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert [result["status"] for result in results] == ["created", "error", "created", "error"]
+    assert results[1]["error"] == results[3]["error"] == CONSTRAINT_ERROR
+    with app.app_context():
+        assert app.count_rows() == 2
@@ -0,0 +1,118 @@
+"""Tests for bulk field data loading."""
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import sessionmaker
+
+from src.strodservice.database.base import Base
+from src.strodservice.database.migrations import downgrade, upgrade
+from src.strodservice.models.models import (
+    FieldData, FieldDataDaily, LineType, Material, Object, Organization
+)
+from src.strodservice.services.field_import import bulk_insert_field_data, validate_field_rows
+from src.strodservice.services.field_rollup import rebuild_daily_rollup
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    org = Organization(name="Org")
+    material = Material(name="Краска", unit="кг")
+    session.add_all([org, material])
+    session.flush()
+    session.add_all([LineType(name=f"1.{i}", width=0.1, material_id=material.id) for i in range(1, 3)])
+    session.add_all([Object(name=f"Объект {i}", organization_id=org.id) for i in range(1, 3)])
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _row(**overrides):
+    row = {"object_id": 1, "line_type_id": 1, "length": 10.0, "width": 0.1,
+           "material_used": 2.0, "date": "2024-05-02T10:00:00"}
+    row.update(overrides)
+    return row
+
+
+def _rollup(session):
+    return sorted(
+        (row.object_id, row.line_type_id, row.day, row.records, round(row.total_length, 6),
+         round(row.total_area, 6), round(row.total_material_used, 6), row.material_records)
+        for row in session.query(FieldDataDaily)
+    )
+
+
+def test_invalid_rows_are_reported_by_index(session):
+    rows = [
+        _row(),
+        _row(length=0),
+        _row(width=-1),
+        _row(material_used=-0.5),
+        _row(object_id=None),
+        _row(length="много"),
+        _row(date="вчера"),
+        _row(object_id=99),
+        _row(line_type_id=99),
+        _row(material_used=None, date=None),
+        "не строка",
+    ]
+
+    result = bulk_insert_field_data(session, rows)
+    session.commit()
+
+    assert result.inserted == 2
+    assert sorted(result.errors) == [1, 2, 3, 4, 5, 6, 7, 8, 10]
+    assert result.errors[1] == "Field data length must be positive"
+    assert result.errors[7] == "Object 99 not found"
+    assert session.query(FieldData).count() == 2
+
+
+def test_rows_are_stored_like_orm_records(session):
+    moment = datetime(2024, 5, 2, 13, 0, tzinfo=timezone(timedelta(hours=3)))
+    bulk_insert_field_data(session, [_row(date=moment, length="12.5", notes="импорт")])
+    session.commit()
+
+    record = session.query(FieldData).one()
+    assert (record.length, record.date, record.notes) == (12.5, datetime(2024, 5, 2, 10, 0), "импорт")
+    assert record.created_at is not None and record.created_at == record.updated_at
+
+
+def test_validation_matches_model_rules():
+    valid, errors = validate_field_rows([_row(length=None, width=None), _row(date=date(2024, 5, 2))])
+
+    assert not errors
+    assert valid[1][1]["date"] == datetime(2024, 5, 2)
+
+
+def test_rollup_is_added_to_existing_totals(session):
+    record = FieldData(object_id=1, line_type_id=1, length=5.0, width=0.2, material_used=1.0)
+    record.date = datetime(2024, 5, 2, 8)
+    session.add(record)
+    session.commit()
+
+    rows = [_row(object_id=1 + i % 2, line_type_id=1 + i % 3 % 2, length=1.0 + i,
+                 material_used=None if i % 4 == 0 else 0.5 * i,
+                 date=datetime(2024, 5, 1 + i % 5, i % 24).isoformat())
+            for i in range(50)]
+    result = bulk_insert_field_data(session, rows, chunk_size=7)
+    session.commit()
+
+    assert result.inserted == 50
+    expected = _rollup(session)
+    rebuild_daily_rollup(session.connection())
+    assert _rollup(session) == expected
+    assert sum(row[3] for row in expected) == 51
+
+
+def test_migration_drops_redundant_id_index(session):
+    engine = session.get_bind()
+    session.close()
+    upgrade(engine)
+    assert "ix_field_data_id" not in {index["name"] for index in inspect(engine).get_indexes("field_data")}
+
+    downgrade(engine, target=3)
+    assert "ix_field_data_id" in {index["name"] for index in inspect(engine).get_indexes("field_data")}
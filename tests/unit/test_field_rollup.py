@@ -0,0 +1,137 @@
+"""Tests for the daily field data rollup."""
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from src.strodservice.database.base import Base
+from src.strodservice.database.migrations import downgrade, upgrade
+from src.strodservice.models.models import (
+    FieldData, FieldDataDaily, LineType, Material, Object, Organization
+)
+from src.strodservice.services.field_rollup import rebuild_daily_rollup
+from src.strodservice.services.report_queries import (
+    GROUPINGS, aggregate_field_data, summarize_field_data
+)
+
+START, END = date(2024, 5, 1), date(2024, 6, 30)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    org = Organization(name="Org")
+    session.add(org)
+    session.flush()
+    materials = [Material(name=name, unit="кг") for name in ("Краска", "Термопластик")]
+    session.add_all(materials)
+    session.flush()
+    session.add_all([LineType(name=f"1.{i}", width=0.1, material_id=materials[i % 2].id) for i in range(1, 4)])
+    session.add_all([Object(name=f"Объект {i}", organization_id=org.id) for i in range(1, 4)])
+    session.flush()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _add(session, count):
+    records = []
+    for i in range(count):
+        record = FieldData(object_id=1 + i % 3, line_type_id=1 + i % 2, length=1.0 + i,
+                           width=0.1 + (i % 4) / 10, material_used=None if i % 5 == 0 else 0.5 * i)
+        record.date = datetime(2024, 5 + i % 2, 1 + i % 28, i % 24, 30)
+        records.append(record)
+    session.add_all(records)
+    session.commit()
+    return records
+
+
+def _rollup(session):
+    return sorted(
+        (row.object_id, row.line_type_id, row.day, row.records, round(row.total_length, 6),
+         round(row.total_area, 6), round(row.total_material_used, 6), row.material_records)
+        for row in session.query(FieldDataDaily)
+    )
+
+
+def _rebuilt(session):
+    expected = _rollup(session)
+    rebuild_daily_rollup(session.connection())
+    rebuilt = _rollup(session)
+    session.rollback()
+    return expected, rebuilt
+
+
+def test_rollup_follows_orm_changes(session):
+    records = _add(session, 60)
+    expected, rebuilt = _rebuilt(session)
+    assert expected == rebuilt
+    assert sum(row[3] for row in expected) == 60
+
+    records[0].date = datetime(2024, 6, 15, 12)
+    records[1].object_id = 3
+    records[2].length = 100.0
+    records[3].notes = "без изменения итогов"
+    session.delete(records[4])
+    session.commit()
+
+    expected, rebuilt = _rebuilt(session)
+    assert expected == rebuilt
+    assert sum(row[3] for row in expected) == 59
+
+
+def test_record_with_default_date_is_counted(session):
+    session.add(FieldData(object_id=1, line_type_id=1, length=5.0, width=0.2, material_used=1.0))
+    session.commit()
+
+    rows = session.query(FieldDataDaily).all()
+    assert [(row.day, row.records, row.total_area) for row in rows] == [
+        (datetime.utcnow().date(), 1, pytest.approx(1.0))
+    ]
+
+
+@pytest.mark.parametrize("group_by", list(GROUPINGS))
+def test_rollup_and_raw_reports_match(session, group_by):
+    _add(session, 90)
+
+    raw = aggregate_field_data(session, START, END, group_by, use_rollup=False)
+    rolled = aggregate_field_data(session, START, END, group_by, use_rollup=True)
+
+    assert [group.key for group in rolled] == [group.key for group in raw]
+    for raw_group, rolled_group in zip(raw, rolled):
+        assert rolled_group.records == raw_group.records
+        for name in ("total_length", "total_area", "total_material_used", "avg_material_used"):
+            assert getattr(rolled_group, name) == pytest.approx(getattr(raw_group, name))
+
+
+def test_rollup_totals_match_raw_for_partial_period(session):
+    _add(session, 90)
+
+    for object_id in (None, 2):
+        raw = summarize_field_data(session, date(2024, 5, 3), date(2024, 6, 10), object_id, use_rollup=False)
+        rolled = summarize_field_data(session, date(2024, 5, 3), date(2024, 6, 10), object_id, use_rollup=True)
+        assert rolled.records == raw.records
+        assert rolled.total_area == pytest.approx(raw.total_area)
+        assert rolled.avg_material_used == pytest.approx(raw.avg_material_used)
+
+
+def test_migration_backfills_rows_written_outside_orm(session):
+    engine = session.get_bind()
+    session.close()
+    upgrade(engine)
+    downgrade(engine, target=2)
+    with engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO field_data (object_id, line_type_id, length, width, material_used, date) "
+            "VALUES (1, 1, 10, 0.5, 2, '2024-05-02 10:00:00.000000'), "
+            "(1, 1, 20, 0.5, NULL, '2024-05-02 18:00:00.000000')"
+        ))
+
+    upgrade(engine)
+
+    rows = session.query(FieldDataDaily).all()
+    assert [(row.day, row.records, row.total_length, row.total_area, row.material_records)
+            for row in rows] == [(date(2024, 5, 2), 2, 30.0, 15.0, 1)]
@@ -0,0 +1,373 @@
+"""Unit tests for the file storage system."""
+import json
+import multiprocessing
+from pathlib import Path
+
+import pytest
+
+from src.strodservice.exceptions import FileStorageError
+from src.strodservice.filestorage.file_storage import FileStorage
+from src.strodservice.filestorage.index import JournaledIndex
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run each test from a temporary directory so source paths can be relative."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "report.txt").write_text("report contents", encoding="utf-8")
+    (tmp_path / "photo.jpg").write_bytes(b"\xff\xd8" + b"x" * 64)
+    return tmp_path
+
+
+class TestJournaledIndex:
+    """Test cases for the journaled index mode."""
+
+    def test_mutations_are_replayed_after_restart(self, workdir):
+        """Test that journaled changes survive reopening the storage."""
+        storage = FileStorage("storage", index_mode="journal")
+        storage.store_file("report.txt", tags=["docs"])
+        storage.store_file("photo.jpg")
+        storage.add_tags("photo.jpg", ["field"])
+        storage.delete_file("report.txt")
+        storage.close()
+
+        reopened = FileStorage("storage", index_mode="journal")
+        assert list(reopened.file_index) == ["photo.jpg"]
+        assert reopened.file_index["photo.jpg"]["tags"] == ["field"]
+
+    def test_snapshot_is_not_rewritten_on_every_mutation(self, workdir):
+        """Test that mutations go to the journal until compaction."""
+        storage = FileStorage("storage", index_mode="journal")
+        storage.store_file("report.txt")
+
+        assert not (workdir / "storage" / "file_index.json").exists()
+        assert (workdir / "storage" / "file_index.json.journal").stat().st_size > 0
+
+        storage.compact_index()
+        assert (workdir / "storage" / "file_index.json.journal").stat().st_size == 0
+        snapshot = json.loads((workdir / "storage" / "file_index.json").read_text(encoding="utf-8"))
+        assert list(snapshot) == ["report.txt"]
+
+    def test_compaction_after_threshold(self, workdir):
+        """Test that the journal is folded into the snapshot automatically."""
+        index = JournaledIndex(workdir / "index.json", compact_every=3)
+        for i in range(4):
+            index.put(f"file_{i}.txt", {"stored_name": f"file_{i}.txt"})
+
+        assert index.journal_records == 1
+        snapshot = json.loads((workdir / "index.json").read_text(encoding="utf-8"))
+        assert sorted(snapshot) == ["file_0.txt", "file_1.txt", "file_2.txt"]
+
+    def test_torn_journal_tail_is_discarded(self, workdir):
+        """Test that a record cut off by a crash does not corrupt the index."""
+        index = JournaledIndex(workdir / "index.json")
+        index.put("a.txt", {"stored_name": "a.txt"})
+        index.put("b.txt", {"stored_name": "b.txt"})
+        index.close()
+
+        journal = workdir / "index.json.journal"
+        intact_size = journal.stat().st_size
+        with open(journal, "ab") as f:
+            f.write(b'0badc0de {"op":"put","name":"c.t')
+
+        reopened = JournaledIndex(workdir / "index.json")
+        assert sorted(reopened) == ["a.txt", "b.txt"]
+        assert journal.stat().st_size == intact_size
+
+
+def test_json_mode_keeps_existing_index_format(workdir):
+    """Test that the default mode still writes a readable JSON index."""
+    storage = FileStorage("storage", index_mode="json")
+    storage.store_file("report.txt", tags=["docs"])
+
+    index = json.loads((workdir / "storage" / "file_index.json").read_text(encoding="utf-8"))
+    assert index["report.txt"]["tags"] == ["docs"]
+
+
+class TestSqliteIndex:
+    """Test cases for the SQLite index mode."""
+
+    @pytest.fixture
+    def storage(self, workdir):
+        (workdir / "Фото_объекта.jpg").write_bytes(b"\xff\xd8" + b"y" * 32)
+        storage = FileStorage("storage", index_mode="sqlite")
+        storage.store_file("report.txt", tags=["docs", "monthly"])
+        storage.store_file("photo.jpg", filename="site_1.jpg", tags=["field"])
+        storage.store_file("Фото_объекта.jpg", tags=["field", "monthly"])
+        yield storage
+        storage.close()
+
+    def test_search_by_query_tags_and_extension(self, storage):
+        """Test that SQL lookups return the same entries as a linear scan."""
+        names = lambda results: sorted(r["stored_name"] for r in results)
+
+        assert names(storage.search_files(query="REP")) == ["report.txt"]
+        assert names(storage.search_files(query="объект")) == ["Фото_объекта.jpg"]
+        assert names(storage.search_files(query="e_1")) == ["site_1.jpg"]
+        assert names(storage.search_files(tags=["monthly"])) == ["report.txt", "Фото_объекта.jpg"]
+        assert names(storage.search_files(extension="jpg")) == ["site_1.jpg", "Фото_объекта.jpg"]
+        assert names(storage.search_files(query="photo")) == []
+        assert names(storage.search_files(query="photo", search_original=True)) == ["site_1.jpg"]
+        assert names(storage.search_files(query="та", tags=["field"], extension=".jpg")) == ["Фото_объекта.jpg"]
+
+    def test_tags_update_and_delete(self, storage):
+        """Test that tag changes and deletions are reflected in the indexes."""
+        storage.add_tags("site_1.jpg", ["archive"])
+        storage.delete_file("report.txt")
+
+        assert storage.get_all_tags() == ["archive", "field", "monthly"]
+        assert [r["stored_name"] for r in storage.search_files(tags=["docs"])] == []
+        assert len(storage.list_all_files()) == 2
+
+    def test_existing_json_index_is_imported(self, workdir):
+        """Test that switching to SQLite keeps the files of a JSON index."""
+        json_storage = FileStorage("storage", index_mode="journal")
+        json_storage.store_file("report.txt", tags=["docs"])
+        json_storage.close()
+
+        sqlite_storage = FileStorage("storage", index_mode="sqlite")
+        assert sqlite_storage.get_all_tags() == ["docs"]
+        assert sqlite_storage.get_file_path("report.txt") is not None
+        sqlite_storage.close()
+
+
+class TestDeduplication:
+    """Test cases for the content-addressed dedup mode."""
+
+    def test_identical_content_is_stored_once(self, workdir):
+        """Test that re-uploads share one blob and keep distinct names."""
+        storage = FileStorage("storage", index_mode="journal", dedup=True)
+        first = storage.store_file("photo.jpg", tags=["field"])
+        second = storage.store_file("photo.jpg")
+        (workdir / "copy.jpg").write_bytes((workdir / "photo.jpg").read_bytes())
+        third = storage.store_file("copy.jpg")
+
+        assert first == second == third
+        assert sorted(storage.file_index) == ["copy.jpg", "photo.jpg", "photo_1.jpg"]
+        blobs = [p for p in (workdir / "storage" / "blobs").rglob("*") if p.is_file()]
+        assert len(blobs) == 1
+        assert storage.load_file_content("photo_1.jpg") == (workdir / "photo.jpg").read_bytes()
+
+    def test_blob_is_removed_with_last_reference(self, workdir):
+        """Test that reference counting keeps shared blobs until the last delete."""
+        storage = FileStorage("storage", index_mode="sqlite", dedup=True)
+        blob_path = storage.store_file("report.txt")
+        storage.store_file("report.txt")
+
+        assert storage.delete_file("report.txt")
+        assert (workdir / blob_path).exists()
+        assert storage.delete_file("report_1.txt")
+        assert not (workdir / blob_path).exists()
+        storage.close()
+
+    def test_duplicate_names_continue_from_last_suffix(self, workdir):
+        """Test that name allocation does not re-probe earlier suffixes."""
+        storage = FileStorage("storage", index_mode="json")
+        for _ in range(3):
+            storage.store_file("report.txt")
+
+        probed = []
+        original = storage._name_taken
+        storage._name_taken = lambda name: probed.append(name) or original(name)
+        storage.store_file("report.txt")
+
+        assert "report_3.txt" in storage.file_index
+        assert "report.txt" not in probed and "report_1.txt" not in probed
+
+
+class TestBulkIngest:
+    """Test cases for store_many and directory ingest."""
+
+    @pytest.mark.parametrize("index_mode", ["json", "journal", "sqlite"])
+    def test_batch_is_stored_with_per_file_errors(self, workdir, index_mode):
+        """Test that bad files are reported without aborting the batch."""
+        (workdir / "crew").mkdir()
+        for i in range(20):
+            (workdir / "crew" / f"photo_{i}.jpg").write_bytes(b"\xff\xd8" + bytes([i]) * 16)
+        (workdir / "crew" / "notes.txt").write_text("day notes", encoding="utf-8")
+        (workdir / "crew" / "photo_0.exe").write_bytes(b"MZ")
+
+        calls = []
+        storage = FileStorage("storage", index_mode=index_mode)
+        result = storage.store_many(
+            sorted(f"crew/{p.name}" for p in (workdir / "crew").iterdir()) + ["missing.jpg"],
+            tags=["day"], workers=4, progress=lambda done, total: calls.append((done, total))
+        )
+
+        assert len(result.stored) == 21
+        assert sorted(result.errors) == ["crew/photo_0.exe", "missing.jpg"]
+        assert calls[-1] == (23, 23)
+        assert len(storage.search_files(tags=["day"])) == 21
+        storage.close()
+
+    def test_directory_ingest_keeps_names_unique(self, workdir):
+        """Test that files with the same name in subdirectories get distinct names."""
+        for crew in ("a", "b"):
+            (workdir / "import" / crew).mkdir(parents=True)
+            (workdir / "import" / crew / "site.jpg").write_bytes(crew.encode() * 8)
+            (workdir / "import" / crew / "Thumbs.db").write_bytes(b"\0")
+        storage = FileStorage("storage", index_mode="journal")
+        storage.store_file("photo.jpg", filename="site.jpg")
+
+        result = storage.store_directory("import")
+
+        assert result.errors == {}
+        assert sorted(storage.file_index) == ["site.jpg", "site_1.jpg", "site_2.jpg"]
+        assert storage.load_file_content("site_2.jpg") == b"b" * 8
+
+
+@pytest.mark.parametrize("index_mode", ["json", "journal", "sqlite"])
+@pytest.mark.parametrize("extension, expected", [
+    ("jpg", ["Site.JPG", "photo.jpg"]),
+    (".JPG", ["Site.JPG", "photo.jpg"]),
+    ("txt", ["report.txt"]),
+    ("g", []),
+    ("pg", []),
+])
+def test_extension_search_is_the_same_in_every_index_mode(workdir, index_mode, extension, expected):
+    """Test that every backend matches the extension against the last suffix."""
+    storage = FileStorage("storage", index_mode=index_mode)
+    try:
+        storage.store_file("report.txt")
+        storage.store_file("photo.jpg")
+        storage.store_file("photo.jpg", filename="Site.JPG")
+
+        assert sorted(r["stored_name"] for r in storage.search_files(extension=extension)) == expected
+    finally:
+        storage.close()
+
+
+def _store_from_worker(worker, index_mode):
+    """Store ten files from a separate process."""
+    storage = FileStorage("storage", index_mode=index_mode)
+    for i in range(10):
+        storage.store_file("report.txt", filename=f"w{worker}_{i}.txt", tags=[f"w{worker}"])
+    storage.close()
+
+
+class TestSharedStorage:
+    """Test cases for several processes sharing one storage directory."""
+
+    @pytest.mark.parametrize("index_mode", ["json", "journal", "sqlite"])
+    def test_instances_see_each_others_changes(self, workdir, index_mode):
+        """Test that changes made through one instance are visible in another."""
+        first = FileStorage("storage", index_mode=index_mode)
+        second = FileStorage("storage", index_mode=index_mode)
+
+        first.store_file("report.txt", tags=["docs"])
+        second.store_file("photo.jpg", tags=["field"])
+        first.add_tags("photo.jpg", ["archive"])
+        second.compact_index()
+        first.delete_file("report.txt")
+
+        for storage in (first, second):
+            assert [f["stored_name"] for f in storage.list_all_files()] == ["photo.jpg"]
+            assert storage.get_all_tags() == ["archive", "field"]
+            storage.close()
+
+    def test_journal_tail_is_replayed_incrementally(self, workdir):
+        """Test that a refresh only reads journal records it has not seen."""
+        first = FileStorage("storage", index_mode="journal")
+        second = FileStorage("storage", index_mode="journal")
+        first.store_file("report.txt")
+        second.list_all_files()
+
+        offset = second.file_index._journal_offset
+        first.store_file("photo.jpg")
+        assert sorted(f["stored_name"] for f in second.list_all_files()) == ["photo.jpg", "report.txt"]
+        assert second.file_index._journal_offset > offset
+
+    @pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+    @pytest.mark.parametrize("index_mode", ["json", "journal"])
+    def test_concurrent_processes_do_not_lose_entries(self, workdir, index_mode):
+        """Test that writers in separate processes do not overwrite each other."""
+        context = multiprocessing.get_context("fork")
+        processes = [
+            context.Process(target=_store_from_worker, args=(worker, index_mode)) for worker in range(4)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        storage = FileStorage("storage", index_mode=index_mode)
+        assert len(storage.list_all_files()) == 40
+        assert storage.get_all_tags() == ["w0", "w1", "w2", "w3"]
+
+
+class TestTiering:
+    """Test cases for the compressed cold tier."""
+
+    @pytest.fixture
+    def storage(self, workdir):
+        (workdir / "act.txt").write_text("акт освидетельствования\n" * 200, encoding="utf-8")
+        storage = FileStorage("storage", index_mode="journal")
+        storage.store_file("act.txt")
+        storage.store_file("photo.jpg")
+        storage.store_file("report.txt")
+        for name in ("act.txt", "photo.jpg"):
+            storage.file_index.put(name, dict(storage.file_index[name], last_access="2020-01-01T00:00:00"))
+        return storage
+
+    def test_idle_files_move_to_cold_tier(self, storage, workdir):
+        """Test that only files not read recently are compressed and moved."""
+        content = (workdir / "act.txt").read_bytes()
+
+        assert sorted(storage.apply_tiering(cold_after_days=30)) == ["act.txt", "photo.jpg"]
+        assert not (workdir / "storage" / "act.txt").exists()
+        assert (workdir / "storage" / "cold" / "act.txt.gz").stat().st_size < len(content)
+        assert (workdir / "storage" / "cold" / "photo.jpg").exists()
+        assert storage.file_index["act.txt"]["tier"] == "cold"
+        assert storage.file_index["report.txt"]["tier"] == "hot"
+
+        assert storage.load_file_content("act.txt") == content
+        assert storage.read_range("act.txt", 100, 50) == content[100:150]
+        with storage.open_memoryview("act.txt") as view:
+            assert view.tobytes() == content
+
+    def test_get_file_path_moves_file_back_to_hot_tier(self, storage, workdir):
+        """Test that callers needing a real file get a decompressed one."""
+        storage.apply_tiering(cold_after_days=30)
+
+        path = storage.get_file_path("act.txt")
+
+        assert Path(path) == Path("storage") / "act.txt"
+        assert storage.file_index["act.txt"]["tier"] == "hot"
+        assert not (workdir / "storage" / "cold" / "act.txt.gz").exists()
+        assert storage.load_file_content("act.txt") == (workdir / "act.txt").read_bytes()
+
+    def test_reads_update_last_access(self, storage):
+        """Test that a read of an idle file records the access time."""
+        storage.load_file_content("photo.jpg")
+
+        assert storage.file_index["photo.jpg"]["last_access"] > "2020-01-01T00:00:00"
+        assert storage.apply_tiering(cold_after_days=30) == ["act.txt"]
+
+
+class TestStreamingReads:
+    """Test cases for chunked and ranged reads."""
+
+    @pytest.fixture
+    def storage(self, workdir):
+        (workdir / "scan.pdf").write_bytes(bytes(range(256)) * 40)
+        storage = FileStorage("storage")
+        storage.store_file("scan.pdf")
+        return storage
+
+    def test_chunks_and_ranges_match_full_content(self, storage):
+        """Test that streamed and ranged reads return the same bytes as a full read."""
+        content = storage.load_file_content("scan.pdf")
+
+        assert b"".join(storage.iter_file_content("scan.pdf", chunk_size=1000)) == content
+        assert b"".join(storage.iter_file_content("scan.pdf", chunk_size=7, start=100, end=2099)) == content[100:2100]
+        assert storage.read_range("scan.pdf", 10000, 500) == content[10000:]
+        with storage.open_memoryview("scan.pdf") as view:
+            assert view[256:512].tobytes() == content[256:512]
+
+    def test_paths_outside_storage_are_rejected(self, storage):
+        """Test that an index entry pointing outside the storage is not read."""
+        storage.file_index.put("leak.txt", {"stored_name": "leak.txt", "path": "report.txt"})
+
+        assert storage.get_file_path("leak.txt") is None
+        with pytest.raises(FileStorageError):
+            storage.read_range("leak.txt", 0, 10)
@@ -0,0 +1,57 @@
+"""Unit tests for single-open image probing."""
+import pytest
+from PIL import Image
+
+from src.strodservice.utils import image_probe
+from src.strodservice.utils.image_probe import probe_image, probe_images
+
+
+@pytest.fixture
+def photo(tmp_path):
+    """Create a JPEG with orientation, capture time and GPS in its EXIF."""
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    exif.get_ifd(0x8769)[0x9003] = "2024:05:17 09:30:00"
+    gps = exif.get_ifd(0x8825)
+    gps.update({1: "N", 2: (55.0, 45.0, 0.0), 3: "E", 4: (37.0, 36.0, 36.0), 5: b"\x00", 6: 150.0})
+    path = tmp_path / "site.jpg"
+    Image.new("RGB", (1600, 1200), (90, 120, 60)).save(path, "JPEG", exif=exif)
+    return path
+
+
+def test_probe_reads_metadata_with_one_open(photo, monkeypatch):
+    """Test that validation and metadata come from a single open of the file."""
+    opened = []
+    original_open = image_probe.Image.open
+    monkeypatch.setattr(image_probe.Image, "open", lambda *args: opened.append(args) or original_open(*args))
+
+    info = probe_image(photo)
+
+    assert len(opened) == 1
+    assert info["valid"] and info["format"] == "JPEG"
+    assert info["size"] == (1600, 1200) and info["mode"] == "RGB"
+    assert info["orientation"] == 6
+    assert info["taken_at"] == "2024-05-17T09:30:00"
+    assert info["gps"]["latitude"] == pytest.approx(55.75)
+    assert info["gps"]["longitude"] == pytest.approx(37.61)
+    assert info["gps"]["altitude"] == pytest.approx(150.0)
+
+
+def test_probe_reports_broken_and_unsupported_files(photo, tmp_path):
+    """Test that invalid files are reported instead of raising."""
+    broken = tmp_path / "broken.jpg"
+    broken.write_bytes(photo.read_bytes()[:2000])
+
+    assert not probe_image(broken)["valid"]
+    assert not probe_image(tmp_path / "missing.jpg")["valid"]
+    assert "формат" in probe_image(tmp_path / "notes.txt")["error"]
+
+
+def test_batch_probe_keeps_input_order(photo, tmp_path):
+    """Test that the process pool returns results in input order."""
+    paths = [photo, tmp_path / "missing.jpg", photo]
+
+    results = probe_images(paths, workers=2, chunksize=1)
+
+    assert [r["valid"] for r in results] == [True, False, True]
+    assert results[1]["file_path"].endswith("missing.jpg")
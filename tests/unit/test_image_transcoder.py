@@ -0,0 +1,65 @@
+"""Unit tests for the batch photo transcoder."""
+import os
+
+import pytest
+from PIL import Image
+
+from src.strodservice.utils.image_transcoder import plan_directory, transcode_batch, transcode_image
+
+
+def _make_photos(directory, count=3):
+    (directory / "day1").mkdir(parents=True)
+    for i in range(count):
+        exif = Image.Exif()
+        exif[0x0112] = 6 if i == 0 else 1
+        Image.new("RGB", (4000, 3000), (60 * i, 100, 140)).save(
+            directory / "day1" / f"img_{i}.jpg", "JPEG", exif=exif
+        )
+
+
+def test_batch_downscales_and_skips_up_to_date_outputs(tmp_path):
+    """Test that outputs are bounded, upright, and not redone on a second run."""
+    _make_photos(tmp_path / "in")
+    jobs = plan_directory(tmp_path / "in", tmp_path / "out", "webp")
+
+    report = transcode_batch(jobs, tmp_path / "out", (1024, 1024), output_format="webp", workers=2)
+
+    assert report.done == 3 and not report.errors
+    assert report.images_per_sec > 0 and report.bytes_out < report.bytes_in
+    with Image.open(tmp_path / "out" / "day1" / "img_0.webp") as img:
+        assert img.format == "WEBP" and img.size == (768, 1024)
+    with Image.open(tmp_path / "out" / "day1" / "img_1.webp") as img:
+        assert img.size == (1024, 768)
+
+    again = transcode_batch(jobs, tmp_path / "out", (1024, 1024), output_format="webp", workers=2)
+    assert again.done == 0 and again.skipped == 3
+
+    # A touched but unchanged source is recognised by its hash
+    os.utime(tmp_path / "in" / "day1" / "img_1.jpg", ns=(0, 10 ** 9))
+    assert transcode_batch(jobs, tmp_path / "out", (1024, 1024), output_format="webp").skipped == 3
+
+    # New parameters invalidate earlier outputs
+    smaller = transcode_batch(jobs, tmp_path / "out", (512, 512), output_format="webp", workers=1)
+    assert smaller.done == 3
+
+
+def test_resize_keeps_transparency(tmp_path):
+    """Test that resizing an RGBA PNG keeps its alpha channel."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    pytest.importorskip("PyQt5.QtWidgets")
+    from src.strodservice.utils.image_handler import ImageHandler
+
+    source = tmp_path / "logo.png"
+    img = Image.new("RGBA", (400, 200), (255, 0, 0, 0))
+    img.paste((0, 0, 255, 255), (0, 0, 200, 200))
+    img.save(source)
+
+    assert ImageHandler().resize_image(str(source), str(tmp_path / "small.png"), (100, 100))
+    with Image.open(tmp_path / "small.png") as small:
+        assert small.mode == "RGBA" and small.size == (100, 50)
+        assert small.getpixel((90, 25))[3] == 0 and small.getpixel((10, 25))[3] == 255
+
+    # JPEG output has no alpha channel, so the transcoder still converts
+    transcode_image(source, tmp_path / "logo.jpg", (100, 100))
+    with Image.open(tmp_path / "logo.jpg") as jpeg:
+        assert jpeg.mode == "RGB"
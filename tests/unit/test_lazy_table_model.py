@@ -0,0 +1,146 @@
+"""Tests for the lazily paged table model and the row actions delegate."""
+import os
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtWidgets = pytest.importorskip("PyQt5.QtWidgets")
+
+from PyQt5.QtCore import QEvent, QPoint, Qt
+from PyQt5.QtGui import QMouseEvent
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.strodservice.database.base import Base
+from src.strodservice.models.models import Object, Organization
+from src.strodservice.desktop.components import (
+    BackgroundRunner, LazyQueryTableModel, RowActionsDelegate, TableColumn
+)
+
+
+@pytest.fixture(scope="module")
+def qapp():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+@pytest.fixture
+def session_factory():
+    # One connection shared by all threads: pages may load in the thread pool
+    engine = create_engine("sqlite://", poolclass=StaticPool,
+                           connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    session = factory()
+    org = Organization(name="Org")
+    session.add(org)
+    session.flush()
+    session.add_all([Object(name=f"Объект {i:03d}", organization_id=org.id) for i in range(45)])
+    session.commit()
+    session.close()
+    yield factory
+    engine.dispose()
+
+
+def _model(session_factory, page_size=20, runner=None):
+    model = LazyQueryTableModel(session_factory, [
+        TableColumn("ID", 'id'),
+        TableColumn("Название", 'name', editable=True),
+        TableColumn("Действия"),
+    ], page_size=page_size, runner=runner)
+    model.set_query(lambda session: session.query(Object.id, Object.name).order_by(Object.id))
+    return model
+
+
+def test_rows_are_fetched_in_pages(qapp, session_factory):
+    model = _model(session_factory)
+    statements = []
+    event.listen(session_factory.kw['bind'], "before_cursor_execute",
+                 lambda *args: statements.append(args[2]))
+
+    assert model.rowCount() == 0
+    assert model.canFetchMore()
+
+    model.fetchMore()
+    assert model.rowCount() == 20
+    assert len(statements) == 1
+
+    model.fetch_all()
+    assert model.rowCount() == 45
+    assert not model.canFetchMore()
+    assert len(statements) == 3
+    assert model.data(model.index(44, 1)) == "Объект 044"
+    assert model.data(model.index(0, 2)) is None
+    assert model.row_key(0) == model.value(0, 0)
+
+
+def test_refresh_and_editing(qapp, session_factory):
+    model = _model(session_factory)
+    model.fetchMore()
+
+    index = model.index(0, 1)
+    assert model.flags(index) & Qt.ItemIsEditable
+    assert not model.flags(model.index(0, 0)) & Qt.ItemIsEditable
+    assert model.setData(index, "Новое имя")
+    assert model.value(0, 1) == "Новое имя"
+
+    model.refresh()
+    assert model.rowCount() == 0
+    model.fetchMore()
+    assert model.value(0, 1) == "Объект 000"
+
+
+def test_background_loading_drops_pages_of_replaced_query(qapp, session_factory):
+    runner = BackgroundRunner()
+    model = _model(session_factory, runner=runner)
+
+    model.fetchMore()
+    assert not model.canFetchMore()  # a page is already loading
+    model.set_query(lambda session: session.query(Object.id, Object.name)
+                    .filter(Object.name == "Объект 007").order_by(Object.id))
+    model.fetchMore()
+    runner.wait(5000)
+    for _ in range(5):
+        qapp.processEvents()
+
+    assert model.rowCount() == 1
+    assert model.value(0, 1) == "Объект 007"
+    assert not model.canFetchMore()
+
+
+def test_load_failure_is_reported(qapp, session_factory):
+    model = LazyQueryTableModel(session_factory, [TableColumn("ID", 'id')])
+    errors = []
+    model.load_failed.connect(errors.append)
+
+    model.set_query(lambda session: session.query(Object).filter(Object.no_such_column == 1))
+    model.fetchMore()
+
+    assert errors
+    assert model.rowCount() == 0
+    assert not model.canFetchMore()
+
+
+def test_delegate_reports_clicked_action(qapp, session_factory):
+    model = _model(session_factory)
+    model.fetchMore()
+    view = QtWidgets.QTableView()
+    view.setModel(model)
+    delegate = RowActionsDelegate([('edit', "Редактировать"), ('delete', "Удалить")], view)
+    view.setItemDelegateForColumn(2, delegate)
+    view.setColumnWidth(2, 400)
+    triggered = []
+    delegate.action_triggered.connect(lambda action, row: triggered.append((action, row)))
+
+    index = model.index(3, 2)
+    option = QtWidgets.QStyleOptionViewItem()
+    option.initFrom(view)
+    option.rect = view.visualRect(index)
+    delete_center = delegate.button_rects(option)[1].center()
+
+    for event_type in (QEvent.MouseButtonPress, QEvent.MouseButtonRelease):
+        mouse = QMouseEvent(event_type, delete_center, Qt.LeftButton, Qt.LeftButton, Qt.NoModifier)
+        delegate.editorEvent(mouse, model, option, index)
+
+    assert triggered == [('delete', 3)]
+    assert delegate.action_at(option, QPoint(option.rect.right() + 50, delete_center.y())) is None
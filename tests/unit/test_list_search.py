@@ -0,0 +1,84 @@
+"""Tests for the list search predicates."""
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from src.strodservice.database.base import Base
+from src.strodservice.database.migrations import upgrade
+from src.strodservice.models.models import Object, Organization
+from src.strodservice.services.list_search import (
+    apply_text_search, fts_match_expression, text_search
+)
+
+NAMES = ["улица Тверская", "Тверской бульвар", "МКАД 45 км", "Проезд 100%_new"]
+
+
+def _session(migrated):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    if migrated:
+        upgrade(engine)
+    session = sessionmaker(bind=engine)()
+    org = Organization(name="Org")
+    session.add(org)
+    session.flush()
+    session.add_all([Object(name=name, organization_id=org.id) for name in NAMES])
+    session.commit()
+    return session
+
+
+@pytest.fixture(params=[True, False], ids=["fts", "like"])
+def session(request):
+    session = _session(request.param)
+    yield session
+    session.close()
+    session.get_bind().dispose()
+
+
+def _search(session, text):
+    query = apply_text_search(session.query(Object.name), session, Object.name, text)
+    return sorted(name for name, in query.order_by(Object.id))
+
+
+def test_fts_match_expression():
+    assert fts_match_expression("  ул. твер ") == '"ул"* "твер"*'
+    assert fts_match_expression("%%") is None
+
+
+def test_empty_text_does_not_filter(session):
+    assert text_search(session, Object.name, "   ") is None
+    assert len(_search(session, "")) == len(NAMES)
+
+
+def test_search_matches_word_prefixes(session):
+    assert _search(session, "Твер") == ["Тверской бульвар", "улица Тверская"]
+    assert _search(session, "улиц Твер") == ["улица Тверская"]
+    assert _search(session, "45") == ["МКАД 45 км"]
+
+
+def test_fts_search_ignores_cyrillic_case():
+    session = _session(migrated=True)
+    assert _search(session, "мкад") == ["МКАД 45 км"]
+    assert _search(session, "ТВЕРСКАЯ") == ["улица Тверская"]
+    session.close()
+
+
+def test_fts_search_uses_search_table():
+    session = _session(migrated=True)
+    statements = []
+    event.listen(session.get_bind(), "before_cursor_execute",
+                 lambda *args: statements.append(args[2]))
+
+    _search(session, "бульвар")
+
+    assert "objects_fts MATCH" in statements[-1]
+    assert "LIKE" not in statements[-1]
+    session.close()
+
+
+def test_like_fallback_escapes_wildcards():
+    session = _session(migrated=False)
+    assert _search(session, "100%_") == ["Проезд 100%_new"]
+    assert _search(session, "0%_n") == ["Проезд 100%_new"]
+    assert _search(session, "_") == ["Проезд 100%_new"]
+    session.close()
@@ -0,0 +1,86 @@
+"""Tests for the schema migration runner."""
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from src.strodservice.database.base import Base
+from src.strodservice.database.migrations import (
+    available_migrations, current_version, downgrade, upgrade
+)
+from src.strodservice.database.migrations.m0001_report_indexes import INDEXES
+
+
+VERSIONS = [version for version, _ in available_migrations()]
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def _index_names(engine):
+    inspector = inspect(engine)
+    return {index['name'] for table in ('field_data', 'documents')
+            for index in inspector.get_indexes(table)}
+
+
+def _drop_report_indexes(engine):
+    with engine.begin() as connection:
+        for name, _, _ in INDEXES:
+            connection.execute(text(f"DROP INDEX {name}"))
+
+
+def test_upgrade_creates_missing_indexes(engine):
+    _drop_report_indexes(engine)
+
+    assert upgrade(engine) == VERSIONS
+
+    assert {name for name, _, _ in INDEXES} <= _index_names(engine)
+    with engine.connect() as connection:
+        assert current_version(connection) == VERSIONS[-1]
+
+
+def test_upgrade_is_idempotent(engine):
+    upgrade(engine)
+
+    assert upgrade(engine) == []
+
+
+def test_downgrade_drops_indexes(engine):
+    upgrade(engine)
+
+    assert downgrade(engine) == VERSIONS[::-1]
+
+    assert not {name for name, _, _ in INDEXES} & _index_names(engine)
+    with engine.connect() as connection:
+        assert current_version(connection) == 0
+
+
+def test_search_tables_follow_source_rows(engine):
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO materials (name, unit) VALUES ('Краска белая', 'кг')"))
+    upgrade(engine)
+
+    def matches(query):
+        with engine.connect() as connection:
+            return connection.execute(
+                text("SELECT rowid FROM materials_fts WHERE materials_fts MATCH :q"), {"q": query}
+            ).scalars().all()
+
+    # rows added before the migration are indexed by the rebuild
+    assert matches('"краска"*') == [1]
+
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE materials SET name = 'Термопластик' WHERE id = 1"))
+        connection.execute(text("INSERT INTO materials (name, unit) VALUES ('Краска желтая', 'кг')"))
+    assert matches('"краска"*') == [2]
+    assert matches('"термо"*') == [1]
+
+    with engine.begin() as connection:
+        connection.execute(text("DELETE FROM materials WHERE id = 2"))
+    assert matches('"краска"*') == []
+
+    downgrade(engine)
+    assert "materials_fts" not in inspect(engine).get_table_names()
@@ -0,0 +1,225 @@
+"""Tests for the persistent notification outbox."""
+import smtplib
+import threading
+import time
+
+import pytest
+
+from src.strodservice.config.settings import settings
+from src.strodservice.exceptions import ValidationError
+from src.strodservice.services import notification_outbox
+from src.strodservice.services.notification_outbox import FakeSink, Message, NotificationOutbox, SmtpTransport
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def sink():
+    return FakeSink()
+
+
+@pytest.fixture
+def outbox(tmp_path, sink, clock, monkeypatch):
+    monkeypatch.setattr(settings, "NOTIFY_DIGEST_SECONDS", 30)
+    monkeypatch.setattr(settings, "NOTIFY_RETRY_BASE_SECONDS", 10)
+    monkeypatch.setattr(settings, "NOTIFY_MAX_ATTEMPTS", 3)
+    outbox = NotificationOutbox(tmp_path / "outbox.db", {"email": lambda: sink, "sms": lambda: sink},
+                                workers=2, clock=clock)
+    yield outbox
+    outbox.close()
+
+
+def test_messages_are_delivered_and_removed(outbox, sink):
+    outbox.enqueue("email", "manager@company.com", "Проверьте новые данные.", subject="Новые данные")
+    outbox.enqueue("sms", "+1234567890", "Новые данные добавлены.")
+
+    assert outbox.process_due() == 2
+    assert [(m.channel, m.recipient, m.subject) for m in sink.sent] == [
+        ("email", "manager@company.com", "Новые данные"), ("sms", "+1234567890", None)]
+    assert outbox.pending_count() == 0
+
+
+def test_burst_with_a_digest_key_is_sent_as_one_message(outbox, sink, clock):
+    for count in (1, 2, 3):
+        outbox.enqueue("email", "manager@company.com", f"Добавлено записей: {count}", subject="Новые данные",
+                       digest="field_data")
+        clock.now += 5
+    outbox.enqueue("email", "other@company.com", "Добавлено записей: 4", subject="Новые данные", digest="field_data")
+
+    assert outbox.process_due() == 0
+    clock.now += 30
+
+    assert outbox.process_due() == 4
+    digest, single = sink.sent
+    assert digest.subject == "Новые данные (сообщений: 3)"
+    assert digest.body.splitlines() == ["Добавлено записей: 1", "Добавлено записей: 2", "Добавлено записей: 3"]
+    assert single.recipient == "other@company.com" and single.subject == "Новые данные"
+
+
+def test_failures_are_retried_with_backoff(outbox, sink, clock):
+    sink.fail_times = 2
+    outbox.enqueue("sms", "+1234567890", "Новые данные добавлены.")
+
+    outbox.process_due()
+    clock.now += 9
+    assert outbox.process_due() == 0
+    clock.now += 1
+    outbox.process_due()
+    # The second failure doubles the pause
+    clock.now += 19
+    assert outbox.process_due() == 0
+    clock.now += 1
+
+    assert outbox.process_due() == 1
+    assert len(sink.sent) == 1 and outbox.pending_count() == 0
+
+
+def test_undeliverable_messages_move_to_dead_letters(outbox, sink, clock):
+    sink.fail_times = 3
+    outbox.enqueue("email", "manager@company.com", "Текст", subject="Тема")
+    for _ in range(3):
+        outbox.process_due()
+        clock.now += 1000
+
+    dead, = outbox.dead_letters()
+    assert (dead["recipient"], dead["attempts"]) == ("manager@company.com", 3)
+    assert "DeliveryError" in dead["last_error"]
+    assert outbox.pending_count() == 0
+
+    assert outbox.retry_dead() == 1
+    assert outbox.process_due() == 1
+    assert sink.sent[0].body == "Текст" and outbox.dead_letters() == []
+
+
+def test_permanent_errors_are_not_retried(outbox, sink):
+    sink.fail_times, sink.permanent = 1, True
+    outbox.enqueue("email", "nobody@company.com", "Текст")
+
+    outbox.process_due()
+
+    assert [dead["attempts"] for dead in outbox.dead_letters()] == [1]
+
+
+def test_messages_of_a_dead_worker_are_claimed_again_after_the_lease(outbox, sink, clock):
+    outbox.enqueue("email", "manager@company.com", "Текст")
+    outbox._claim(10)  # claimed by a worker that died before sending
+
+    assert outbox.process_due() == 0
+    clock.now += settings.NOTIFY_LEASE_SECONDS
+    assert outbox.process_due() == 1
+
+
+def test_queue_survives_a_restart(tmp_path, sink, clock):
+    first = NotificationOutbox(tmp_path / "outbox.db", {"email": lambda: sink}, clock=clock)
+    first.enqueue("email", "manager@company.com", "Текст")
+    first.close()
+
+    second = NotificationOutbox(tmp_path / "outbox.db", {"email": lambda: sink}, clock=clock)
+    assert second.process_due() == 1
+    second.close()
+
+
+def test_unknown_channel_is_rejected(outbox):
+    with pytest.raises(ValidationError):
+        outbox.enqueue("fax", "+1234567890", "Текст")
+
+
+def test_workers_deliver_in_background(tmp_path):
+    slow = FakeSink(delay=0.2)
+    outbox = NotificationOutbox(tmp_path / "outbox.db", {"email": lambda: slow}, workers=2)
+    outbox.start()
+    try:
+        started = time.perf_counter()
+        for index in range(4):
+            outbox.enqueue("email", "manager@company.com", f"Письмо {index}")
+        assert time.perf_counter() - started < 0.2
+
+        deadline = time.monotonic() + 5
+        while len(slow.sent) < 4 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert sorted(m.body for m in slow.sent) == [f"Письмо {index}" for index in range(4)]
+    finally:
+        outbox.close()
+
+
+def test_short_lived_threads_do_not_leave_connections_open(tmp_path):
+    sink = FakeSink()
+    outbox = NotificationOutbox(tmp_path / "outbox.db", {"email": lambda: sink}, workers=2)
+    outbox.start()
+    try:
+        for _ in range(5):
+            threads = [threading.Thread(target=outbox.enqueue, args=("email", "manager@company.com", "Текст"))
+                       for _ in range(20)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        # One connection per worker and one shared by every other thread
+        assert len(outbox._connections) <= outbox.workers + 1
+
+        deadline = time.monotonic() + 5
+        while len(sink.sent) < 100 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert len(sink.sent) == 100
+    finally:
+        outbox.close()
+    assert outbox._connections == []
+
+
+class FakeSMTP:
+    """Stands in for smtplib.SMTP and records the connections"""
+    connections = []
+
+    def __init__(self, host, port, timeout=None):
+        self.sent = []
+        self.drop_next = False
+        FakeSMTP.connections.append(self)
+
+    def starttls(self):
+        pass
+
+    def login(self, username, password):
+        pass
+
+    def send_message(self, msg):
+        if self.drop_next:
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        self.sent.append(msg["Subject"])
+
+    def quit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_smtp_connection_is_reused(monkeypatch, clock):
+    FakeSMTP.connections = []
+    monkeypatch.setattr(notification_outbox.smtplib, "SMTP", FakeSMTP)
+    transport = SmtpTransport(idle_seconds=60, clock=clock)
+
+    def send(subject):
+        transport.send(Message("email", "manager@company.com", subject, "Текст", [1]))
+
+    send("1")
+    send("2")
+    assert len(FakeSMTP.connections) == 1
+
+    FakeSMTP.connections[0].drop_next = True
+    send("3")
+    clock.now += 61
+    send("4")
+
+    assert [connection.sent for connection in FakeSMTP.connections] == [["1", "2"], ["3"], ["4"]]
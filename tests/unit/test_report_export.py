@@ -0,0 +1,103 @@
+"""Tests for the streaming report export."""
+import csv
+from datetime import date, datetime
+from types import SimpleNamespace
+
+import pytest
+from openpyxl import load_workbook
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.strodservice.database.base import Base
+from src.strodservice.exceptions import TaskCancelledError, ValidationError
+from src.strodservice.models.models import FieldData, LineType, Material, Object, Organization
+from src.strodservice.services import report_export
+from src.strodservice.services.report_export import (
+    FIELD_DATA_COLUMNS, export_query, export_rows
+)
+from src.strodservice.services.report_queries import field_data_query
+
+ROWS = 120
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    session = factory()
+    org = Organization(name="Org")
+    material = Material(name="Краска", unit="кг")
+    session.add_all([org, material])
+    session.flush()
+    line_type = LineType(name="1.1", width=0.1, material_id=material.id)
+    obj = Object(name="Объект", organization_id=org.id)
+    session.add_all([line_type, obj])
+    session.flush()
+    for i in range(ROWS):
+        record = FieldData(object_id=obj.id, line_type_id=line_type.id,
+                           length=float(i + 1), width=0.1, material_used=1.5)
+        record.date = datetime(2024, 5, 1 + i % 28)
+        session.add(record)
+    session.commit()
+    session.close()
+    yield factory
+    engine.dispose()
+
+
+def _query(session):
+    return field_data_query(session, date(2024, 5, 1), date(2024, 5, 31))
+
+
+def test_export_csv_streams_all_rows(tmp_path, session_factory, monkeypatch):
+    monkeypatch.setattr(report_export, "PROGRESS_EVERY", 50)
+    progress = []
+    path = tmp_path / "report.csv"
+
+    written = export_query(str(path), FIELD_DATA_COLUMNS, session_factory, _query,
+                           batch_size=25, progress=lambda *args: progress.append(args))
+
+    assert written == ROWS
+    assert progress == [(50, ROWS), (100, ROWS), (ROWS, ROWS)]
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == [header for header, _ in FIELD_DATA_COLUMNS]
+    assert len(rows) == ROWS + 1
+    assert rows[1][1:4] == ["Объект", "1.1", "1.0"]
+    assert rows[1][6] == "2024-05-01 00:00:00"
+
+
+def test_export_xlsx_splits_sheets(tmp_path, monkeypatch):
+    monkeypatch.setattr(report_export, "XLSX_MAX_ROWS", 4)
+    rows = [SimpleNamespace(id=i, date=date(2024, 5, 1)) for i in range(7)]
+    columns = [("ID", lambda row: row.id), ("Дата", lambda row: row.date)]
+    path = tmp_path / "report.xlsx"
+
+    assert export_rows(str(path), columns, iter(rows)) == 7
+
+    workbook = load_workbook(path, read_only=True)
+    sheets = [list(sheet.values) for sheet in workbook.worksheets]
+    assert [len(sheet) for sheet in sheets] == [4, 4, 2]
+    assert all(sheet[0] == ("ID", "Дата") for sheet in sheets)
+    assert [row[0] for sheet in sheets for row in sheet[1:]] == list(range(7))
+    assert sheets[0][1][1] == datetime(2024, 5, 1)
+    workbook.close()
+
+
+def test_cancelled_export_leaves_no_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(report_export, "PROGRESS_EVERY", 10)
+
+    class Token:
+        def raise_if_cancelled(self):
+            raise TaskCancelledError("cancelled")
+
+    path = tmp_path / "report.xlsx"
+    with pytest.raises(TaskCancelledError):
+        export_rows(str(path), [("N", lambda row: row)], range(100), cancel_token=Token())
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_unsupported_format(tmp_path):
+    with pytest.raises(ValidationError):
+        export_rows(str(tmp_path / "report.txt"), [("N", lambda row: row)], range(3))
@@ -0,0 +1,148 @@
+"""Tests for the report query helpers."""
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from src.strodservice.database.base import Base
+from src.strodservice.models.models import FieldData, LineType, Material, Object, Organization
+from src.strodservice.services.report_queries import (
+    aggregate_field_data, field_data_rows, summarize_field_data
+)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _populate(session, count):
+    org = Organization(name="Org")
+    session.add(org)
+    session.flush()
+    material = Material(name="Краска", unit="кг", norm=0.5)
+    session.add(material)
+    session.flush()
+    line_type = LineType(name="1.1", width=0.1, material_id=material.id)
+    objects = [Object(name=f"Объект {i}", organization_id=org.id) for i in range(3)]
+    session.add_all([line_type, *objects])
+    session.flush()
+    for i in range(count):
+        record = FieldData(object_id=objects[i % 3].id, line_type_id=line_type.id,
+                           length=10.0, width=0.1, material_used=1.5)
+        record.date = datetime(2024, 5, 1 + i % 28)
+        session.add(record)
+    session.commit()
+    return objects, line_type
+
+
+def _count_queries(session):
+    statements = []
+    event.listen(session.get_bind(), "before_cursor_execute",
+                 lambda *args: statements.append(args[2]))
+    return statements
+
+
+def test_rows_carry_object_and_line_type_names(session):
+    objects, line_type = _populate(session, 6)
+
+    rows = field_data_rows(session, date(2024, 5, 1), date(2024, 5, 31))
+
+    assert len(rows) == 6
+    assert {row.object_name for row in rows} == {obj.name for obj in objects}
+    assert all(row.line_type_name == line_type.name for row in rows)
+
+
+def test_filters_by_object_and_period(session):
+    objects, _ = _populate(session, 6)
+
+    rows = field_data_rows(session, date(2024, 5, 1), date(2024, 5, 3), objects[0].id)
+
+    assert [row.object_name for row in rows] == [objects[0].name]
+
+
+def test_missing_line_type_yields_none(session):
+    objects, _ = _populate(session, 1)
+    record = FieldData(object_id=objects[0].id, line_type_id=999, length=1.0)
+    record.date = datetime(2024, 5, 2)
+    session.add(record)
+    session.commit()
+
+    rows = field_data_rows(session, date(2024, 5, 1), date(2024, 5, 31))
+
+    assert [row.line_type_name for row in rows if row.id == record.id] == [None]
+
+
+def test_query_count_does_not_depend_on_row_count(session):
+    _populate(session, 200)
+    statements = _count_queries(session)
+
+    rows = field_data_rows(session, date(2024, 5, 1), date(2024, 5, 31))
+
+    assert len(rows) == 200
+    assert len(statements) == 1
+
+
+def test_summary_totals_are_computed_in_one_query(session):
+    _populate(session, 200)
+    statements = _count_queries(session)
+
+    totals = summarize_field_data(session, date(2024, 5, 1), date(2024, 5, 31))
+
+    assert len(statements) == 1
+    assert totals.records == 200
+    assert totals.total_length == pytest.approx(2000.0)
+    assert totals.total_material_used == pytest.approx(300.0)
+    assert totals.avg_material_used == pytest.approx(1.5)
+
+
+def test_summary_of_empty_period(session):
+    _populate(session, 3)
+
+    totals = summarize_field_data(session, date(2023, 1, 1), date(2023, 1, 31))
+
+    assert totals.records == 0
+    assert totals.total_length == 0
+    assert totals.avg_material_used is None
+
+
+@pytest.mark.parametrize("group_by, expected", [
+    ("object", {"Объект 0": 4, "Объект 1": 3, "Объект 2": 3}),
+    ("line_type", {"1.1": 10}),
+    ("material", {"Краска": 10}),
+    ("month", {"2024-05": 10}),
+    # 2024-05-01 is a Wednesday, its week starts on Monday 2024-04-29
+    ("week", {"2024-04-29": 5, "2024-05-06": 5}),
+    ("day", {f"2024-05-{day:02d}": 1 for day in range(1, 11)}),
+])
+def test_aggregate_groups_in_sql(session, group_by, expected):
+    _populate(session, 10)
+    statements = _count_queries(session)
+
+    groups = aggregate_field_data(session, date(2024, 5, 1), date(2024, 5, 31), group_by)
+
+    assert len(statements) == 1
+    assert {group.key: group.records for group in groups} == expected
+    assert sum(group.total_length for group in groups) == pytest.approx(100.0)
+
+
+def test_objects_with_the_same_name_are_separate_groups(session):
+    objects, line_type = _populate(session, 10)
+    objects[1].name = objects[0].name
+    session.commit()
+
+    groups = aggregate_field_data(session, date(2024, 5, 1), date(2024, 5, 31), "object")
+
+    assert [(group.key, group.records) for group in groups] == [
+        ("Объект 0", 4), ("Объект 0", 3), ("Объект 2", 3)]
+
+
+def test_aggregate_rejects_unknown_grouping(session):
+    with pytest.raises(ValueError):
+        aggregate_field_data(session, date(2024, 5, 1), date(2024, 5, 31), "year")
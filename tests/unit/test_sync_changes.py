@@ -0,0 +1,207 @@
+"""Tests for incremental sync of changed and deleted records."""
+from datetime import datetime, timedelta
+
+from dataclasses import asdict
+
+import pytest
+from flask import Flask, jsonify, request
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from src.strodservice.config.settings import settings
+from src.strodservice.database.base import Base
+from src.strodservice.database.migrations import downgrade, upgrade
+from src.strodservice.exceptions import ValidationError
+from src.strodservice.models.models import DeletedRecord, Object, Organization
+from src.strodservice.services.sync_changes import ChangeFeed, changes_since, purge_tombstones
+from src.strodservice.utils.api_pagination import keyset_response
+from src.strodservice.utils.field_batch import read_batch, save_batch
+
+
+def _later(**delta):
+    # Past the settle period, so fresh changes are visible
+    return datetime.utcnow() + timedelta(minutes=1, **delta)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    org = Organization(name="Org")
+    session.add(org)
+    session.flush()
+    session.add_all([Object(name=f"Объект {i}", organization_id=org.id) for i in range(1, 8)])
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _sync(session, watermark=None, limit=3):
+    changes, deleted = {}, []
+    while True:
+        page = changes_since(session, "objects", watermark, limit, now=_later())
+        for record_id in page.deleted:
+            changes.pop(record_id, None)
+            deleted.append(record_id)
+        changes.update((row["id"], row) for row in page.changes)
+        watermark = page.watermark
+        if not page.has_more:
+            return changes, deleted, watermark
+
+
+def test_initial_sync_then_deltas(session):
+    session.delete(session.get(Object, 7))
+    session.commit()
+
+    rows, deleted, watermark = _sync(session)
+    assert sorted(rows) == [1, 2, 3, 4, 5, 6]
+    assert deleted == []  # deleted before the first sync
+
+    session.get(Object, 2).name = "Переименован"
+    session.delete(session.get(Object, 3))
+    session.add(Object(name="Новый"))
+    session.commit()
+
+    rows, deleted, watermark = _sync(session, watermark)
+    # SQLite gives the new object the id of the deleted object 7
+    assert {row_id: row["name"] for row_id, row in rows.items()} == {2: "Переименован", 7: "Новый"}
+    assert deleted == [3]
+
+    assert _sync(session, watermark)[:2] == ({}, [])
+
+
+def test_changes_inside_settle_period_wait_for_next_poll(session):
+    page = changes_since(session, "objects", now=datetime.utcnow())
+
+    assert page.changes == [] and not page.has_more
+    assert len(changes_since(session, "objects", page.watermark, now=_later()).changes) == 7
+
+
+def test_old_watermark_requires_reset_and_tombstones_expire(session):
+    watermark = _sync(session)[2]
+    session.delete(session.get(Object, 1))
+    session.commit()
+
+    assert changes_since(session, "objects", watermark, now=_later(days=365)).reset
+    assert purge_tombstones(session.connection(), now=_later(days=365)) == 1
+    assert session.query(DeletedRecord).count() == 0
+
+
+@pytest.mark.parametrize("table_name, watermark", [("users", None), ("objects", "broken"),
+                                                   ("materials", "_objects_watermark_")])
+def test_invalid_requests_are_rejected(session, table_name, watermark):
+    if watermark == "_objects_watermark_":
+        watermark = changes_since(session, "objects").watermark
+    with pytest.raises(ValidationError):
+        changes_since(session, table_name, watermark)
+
+
+def test_migration_backfills_missing_updated_at(session):
+    engine = session.get_bind()
+    session.close()
+    upgrade(engine)
+    downgrade(engine, target=4)
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE objects SET updated_at = NULL"))
+
+    upgrade(engine)
+
+    assert "deleted_records" in inspect(engine).get_table_names()
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT COUNT(*) FROM objects WHERE updated_at IS NULL")).scalar() == 0
+
+
+FIELD_DATA_FIELDS = ("id", "object_id", "line_type", "length", "width", "material_used", "date", "notes")
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """The field data routes of the Flask backends on their own models"""
+    monkeypatch.setattr(settings, "SYNC_SETTLE_SECONDS", 0)
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    db = SQLAlchemy(app)
+
+    class FieldData(db.Model):
+        __table_args__ = (db.Index("ux_field_data_idempotency_key", "idempotency_key", unique=True),)
+        id = db.Column(db.Integer, primary_key=True)
+        object_id = db.Column(db.Integer)
+        line_type = db.Column(db.String)
+        length = db.Column(db.Float)
+        width = db.Column(db.Float)
+        material_used = db.Column(db.Float)
+        date = db.Column(db.DateTime)
+        notes = db.Column(db.String)
+        idempotency_key = db.Column(db.String(64))
+        updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    class Tombstone(db.Model):
+        __tablename__ = "deleted_records"
+        id = db.Column(db.Integer, primary_key=True)
+        table_name = db.Column(db.String(64), nullable=False)
+        record_id = db.Column(db.Integer, nullable=False)
+        deleted_at = db.Column(db.DateTime, nullable=False)
+
+    feed = ChangeFeed({"field_data": FieldData}, Tombstone.__table__, {"field_data": FIELD_DATA_FIELDS})
+
+    @app.route("/api/field_data", methods=["GET"])
+    def field_data_page():
+        return keyset_response(db.session, FieldData.__table__, FIELD_DATA_FIELDS, {"id": ["id"]})
+
+    @app.route("/api/field_data/batch", methods=["POST"])
+    def add_batch():
+        return jsonify(asdict(save_batch(db.session, FieldData, read_batch(request))))
+
+    @app.route("/api/field_data/<int:record_id>", methods=["PUT"])
+    def update(record_id):
+        record = db.session.get(FieldData, record_id)
+        for name, value in request.json.items():
+            setattr(record, name, value)
+        db.session.commit()
+        return jsonify({"status": "success"})
+
+    @app.route("/api/field_data/<int:record_id>", methods=["DELETE"])
+    def remove(record_id):
+        db.session.delete(db.session.get(FieldData, record_id))
+        db.session.commit()
+        return jsonify({"status": "success"})
+
+    @app.route("/api/sync/<table_name>", methods=["GET"])
+    def sync(table_name):
+        try:
+            page = feed.changes_since(db.session, table_name, request.args.get("since"))
+        except ValidationError as e:
+            return jsonify({"message": e.message}), 400
+        return jsonify(asdict(page))
+
+    with app.app_context():
+        db.create_all()
+    return app.test_client()
+
+
+def test_http_changes_come_from_the_database_of_the_list_endpoints(api):
+    items = [{"object_id": 1, "line_type": f"1.{i}", "length": 10.0 + i, "date": "2024-05-02T10:00:00",
+              "idempotency_key": f"key-{i}"} for i in range(1, 5)]
+    ids = [result["id"] for result in api.post("/api/field_data/batch", json=items).get_json()["results"]]
+
+    local = {row["id"]: row for row in api.get("/api/field_data").get_json()}
+    first = api.get("/api/sync/field_data").get_json()
+    assert {row["id"]: row for row in first["changes"]} == local
+
+    api.put(f"/api/field_data/{ids[1]}", json={"notes": "исправлено"})
+    api.delete(f"/api/field_data/{ids[2]}")
+    api.post("/api/field_data/batch", json=[dict(items[0], idempotency_key="key-5", line_type="2.1")])
+
+    delta = api.get("/api/sync/field_data", query_string={"since": first["watermark"]}).get_json()
+    assert delta["deleted"] == [ids[2]]
+    assert sorted(row["id"] for row in delta["changes"]) == [ids[1], ids[3] + 1]
+    for record_id in delta["deleted"]:
+        local.pop(record_id)
+    local.update((row["id"], row) for row in delta["changes"])
+
+    assert local == {row["id"]: row for row in api.get("/api/field_data").get_json()}
+    assert local[ids[1]]["notes"] == "исправлено"
+    assert all("idempotency_key" not in row for row in delta["changes"])
@@ -0,0 +1,62 @@
+"""Unit tests for the persistent thumbnail cache."""
+import os
+
+import pytest
+from PIL import Image
+
+from src.strodservice.utils.thumbnail_cache import ThumbnailCache
+
+
+@pytest.fixture
+def photos(tmp_path, monkeypatch):
+    """Create a few JPEG photos in a temporary working directory."""
+    monkeypatch.chdir(tmp_path)
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"photo_{i}.jpg"
+        Image.new("RGB", (1200, 900), (40 * i, 80, 120)).save(path, "JPEG")
+        paths.append(path)
+    return paths
+
+
+def test_thumbnail_is_reused_until_source_changes(photos, tmp_path):
+    """Test that a cached thumbnail is served until the photo is modified."""
+    cache = ThumbnailCache(tmp_path / "thumbs", max_bytes=10 * 1024 * 1024)
+
+    first = cache.get_or_create(photos[0], (160, 120))
+    assert Image.open(first).size == (160, 120)
+    assert cache.get(photos[0], (160, 120)) == first
+    assert cache.get(photos[0], (320, 240)) is None
+
+    os.utime(photos[0], ns=(0, 10 ** 9))
+    assert cache.get(photos[0], (160, 120)) is None
+    assert cache.get_or_create(photos[0], (160, 120)) != first
+
+
+def test_least_recently_used_thumbnails_are_evicted(photos, tmp_path):
+    """Test that the cache stays under its size limit and keeps recent entries."""
+    cache = ThumbnailCache(tmp_path / "thumbs")
+    cache.max_bytes = cache.get_or_create(photos[0], (160, 120)).stat().st_size * 2 + 1
+    cache.get_or_create(photos[1], (160, 120))
+    cache.get(photos[0], (160, 120))
+    cache.get_or_create(photos[2], (160, 120))
+
+    assert len(cache) == 2
+    assert cache.get(photos[1], (160, 120)) is None
+    assert cache.get(photos[0], (160, 120)) is not None
+
+    reopened = ThumbnailCache(tmp_path / "thumbs")
+    assert len(reopened) == 2
+
+
+
+def test_thumbnails_are_pregenerated_in_the_background(photos, tmp_path):
+    """Test that pregenerate fills the cache on its thread pool and skips non-images."""
+    cache = ThumbnailCache(tmp_path / "thumbs")
+    (tmp_path / "notes.txt").write_text("not an image")
+
+    futures = cache.pregenerate([photos[0], photos[1], tmp_path / "notes.txt"], sizes=[(160, 120)])
+    cache.shutdown(wait=True)
+
+    assert len(futures) == 2 and len(cache) == 2
+    assert cache.get(photos[0], (160, 120)) is not None